@@ -0,0 +1,262 @@
+"""
+File Responses
+Serves stored files over HTTP with validators, conditional requests and byte ranges
+
+Browsers revalidate with If-None-Match / If-Modified-Since and get an empty
+304 instead of the file again, and PDF viewers load pages lazily with Range
+requests (206). If the ASGI server offers the zero-copy send extension the
+kernel copies the bytes straight from the file (sendfile); otherwise the
+file is streamed in chunks read off the event loop.
+"""
+
+import asyncio
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import RedirectResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from app.services.storage_service import get_storage
+
+# ASGI extensions (https://asgi.readthedocs.io/en/latest/extensions.html)
+ZEROCOPY_SEND = "http.response.zerocopysend"
+PATH_SEND = "http.response.pathsend"
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the file (416)"""
+
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """
+    Strong ETag from the file's identity
+    
+    Stored files are written once and replaced atomically, never changed in
+    place, so inode, size and modification time identify the bytes.
+    """
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range: "bytes=0-499", "bytes=500-" or "bytes=-500"
+    
+    Returns:
+        (start, end) with end inclusive, or None if the header is to be
+        ignored and the whole file sent (other units, several ranges,
+        invalid syntax)
+    
+    Raises:
+        RangeNotSatisfiable: If no byte of the range is in the file
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    
+    first, separator, last = ranges.strip().partition("-")
+    if not separator or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    
+    if not first:
+        # Suffix range - the last N bytes
+        if not last:
+            return None
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def _etag_listed(header: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison - W/ prefixes are ignored)"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def _not_modified(request: Request, etag: str, modified: float) -> bool:
+    """Whether the client's cached copy is current (If-None-Match wins over If-Modified-Since)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_listed(if_none_match, etag)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _range_allowed(request: Request, etag: str, last_modified: str) -> bool:
+    """If-Range: a range is only served if the client's copy is still current"""
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag  # Strong comparison
+    return if_range == last_modified
+
+
+def _content_disposition(filename: str, disposition_type: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition_type}; filename*=utf-8''{quoted}"
+    return f'{disposition_type}; filename="{filename}"'
+
+
+class FileRangeResponse(Response):
+    """Sends a file, or one byte range of it"""
+    
+    chunk_size = 256 * 1024
+    
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        method: Optional[str] = None
+    ):
+        self.path = path
+        self.start = start
+        self.count = max(end - start + 1, 0)
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.send_header_only = method is not None and method.upper() == "HEAD"
+        self.init_headers({**(headers or {}), "content-length": str(self.count)})
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        
+        if self.send_header_only or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        
+        extensions = scope.get("extensions") or {}
+        
+        if ZEROCOPY_SEND in extensions:
+            # The server calls sendfile() - the bytes never enter Python
+            file = await asyncio.to_thread(open, self.path, "rb")
+            try:
+                await send({
+                    "type": ZEROCOPY_SEND,
+                    "file": file,
+                    "offset": self.start,
+                    "count": self.count,
+                    "more_body": False
+                })
+            finally:
+                await asyncio.to_thread(file.close)
+            return
+        
+        if PATH_SEND in extensions and self.status_code == 200:
+            await send({"type": PATH_SEND, "path": str(self.path)})
+            return
+        
+        fd = await asyncio.to_thread(os.open, self.path, os.O_RDONLY)
+        try:
+            offset, remaining = self.start, self.count
+            while remaining:
+                chunk = await asyncio.to_thread(os.pread, fd, min(self.chunk_size, remaining), offset)
+                if not chunk:
+                    break  # File got shorter - the response is cut off
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": bool(remaining)})
+            if remaining:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+
+async def file_response(
+    request: Request,
+    key: str,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+    etag: Optional[str] = None,
+    cache_control: str = "private, no-cache"
+) -> Optional[Response]:
+    """
+    Response serving a stored file
+    
+    Local files are sent with ETag, Last-Modified and Accept-Ranges, and
+    answer conditional (304) and Range (206/416) requests. Remote files get
+    a redirect to a short-lived download link - the bucket handles those
+    headers itself.
+    
+    Args:
+        request: The incoming request (conditional and Range headers)
+        key: Storage key of the file
+        media_type: Content type (guessed from the key if not given)
+        filename: Download name for Content-Disposition
+        etag: Strong validator if one is known (e.g. the file's SHA-256)
+        cache_control: Cache-Control header
+    
+    Returns:
+        The response, or None if the file does not exist
+    """
+    storage = get_storage()
+    path = storage.local_path(key)
+    
+    if path is None:
+        return RedirectResponse(await storage.url(key, filename=filename), status_code=307)
+    
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(stat_result.st_mode):
+        return None
+    
+    size = stat_result.st_size
+    etag = f'"{etag}"' if etag else make_etag(stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "cache-control": cache_control,
+        "accept-ranges": "bytes"
+    }
+    
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+    
+    if filename:
+        headers["content-disposition"] = _content_disposition(filename)
+    media_type = media_type or mimetypes.guess_type(key)[0] or "application/octet-stream"
+    
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if range_header and _range_allowed(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        
+        if byte_range:
+            start, end = byte_range
+            status_code = 206
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+    
+    return FileRangeResponse(path, start, end, status_code, headers, media_type, method=request.method)
@@ -4,6 +4,7 @@ Handles user registration, login, profile management
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from datetime import datetime, timedelta
@@ -11,10 +12,10 @@ import random
 import string
 import logging
 import os
-import shutil
 from pathlib import Path
 
 from app.db.database import get_db
+from app.db.hooks import after_commit
 from app.models.user import User
 from app.models.password_reset import PasswordReset
 from app.schemas.user import (
@@ -27,6 +28,10 @@ from app.core.security import (
 )
 from app.core.config import Settings
 from app.core.email import get_email_service
+from app.services.image_service import (
+    ImageProcessingError, render_avatar, avatar_variant_keys, stored_variant_keys
+)
+from app.services.storage_service import get_storage
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -207,6 +212,10 @@ async def upload_avatar(
 ):
     """
     Upload user avatar image
+    
+    The image is re-encoded as small WebP variants (AVATAR_SIZES) without
+    its metadata; the original is not kept. Variant URLs carry a hash of
+    the image, so browsers may cache them forever.
     """
     # Validate file type
     allowed_types = ["image/jpeg", "image/png", "image/jpg", "image/webp"]
@@ -227,35 +236,53 @@ async def upload_avatar(
             detail="File size must be less than 5MB"
         )
     
-    # Use settings for avatar directory
+    # Decode and re-encode in a worker process
+    try:
+        variants = await render_avatar(await file.read())
+    except ImageProcessingError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Avatar directory is the staging area before the files go to storage
     from app.core.config import settings
     avatar_dir = settings.AVATARS_PATH
     avatar_dir.mkdir(parents=True, exist_ok=True)
     
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"user_{current_user.id}_{datetime.utcnow().timestamp()}.{file_extension}"
-    file_path = avatar_dir / unique_filename
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Delete old avatar if exists
-    if current_user.avatar:
-        old_avatar_filename = current_user.avatar.split("/")[-1]
-        old_avatar_path = avatar_dir / old_avatar_filename
-        if old_avatar_path.exists():
-            old_avatar_path.unlink()
+    storage = get_storage()
+    variant_keys = avatar_variant_keys(variants, current_user.id)
+    for size, key in variant_keys.items():
+        staged_path = avatar_dir / f".{Path(key).name}.part"
+        await run_in_threadpool(staged_path.write_bytes, variants[size])
+        await storage.put_file(staged_path, key)
+    avatar_key = variant_keys[max(variant_keys)]
+    
+    # Delete old avatar (all its sizes) once the new one is saved - unless the same
+    # image was uploaded again, or another user still has it (keys from before
+    # avatar keys included the user ID)
+    old_avatar = current_user.avatar
+    if old_avatar and old_avatar != avatar_key:
+        shared = await db.scalar(
+            select(User.id).where(User.avatar == old_avatar, User.id != current_user.id).limit(1)
+        )
+        if shared is None:
+            old_keys = list(stored_variant_keys(old_avatar).values()) or [old_avatar]
+            
+            async def delete_old_avatar():
+                for key in old_keys:
+                    await storage.delete(key)
+            
+            after_commit(db, delete_old_avatar)
     
-    # Update user avatar in database (store relative path)
-    current_user.avatar = f"avatars/{unique_filename}"
+    # Update user avatar in database (store the storage key)
+    current_user.avatar = avatar_key
     await db.commit()
     await db.refresh(current_user)
     
     return {
         "message": "Avatar uploaded successfully",
-        "avatar_url": f"/media/avatars/{unique_filename}",
+        "avatar_url": f"/media/{avatar_key}",
         "user": UserResponse.from_orm(current_user)
     }
 
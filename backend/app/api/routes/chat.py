@@ -11,7 +11,7 @@ from sqlalchemy import select
 from app.db.database import get_db
 from app.models.user import User
 from app.models.chat import ChatSession, ChatMessage
-from app.models.document import Document, Page
+from app.models.document import Document
 from app.schemas.chat import (
     ChatSessionCreate, ChatSessionUpdate, MessageSend, ConceptExplain,
     ChatSessionResponse, ChatSessionListResponse,
@@ -19,7 +19,8 @@ from app.schemas.chat import (
 )
 from app.core.security import get_current_user
 from app.services.ai_service import get_ai_service
-from app.services.vector_service import get_vector_service
+from app.services.content_service import get_content_ids
+from app.services.retrieval_service import hybrid_search
 
 router = APIRouter()
 
@@ -248,33 +249,24 @@ async def send_message(
             "content": msg.content
         })
     
-    # Get document context using vector search
+    # Get document context using hybrid (keyword + vector) search
     context = None
-    if session.document_id:
-        # Use vector search to find relevant chunks
-        vector_service = get_vector_service()
-        search_results = await vector_service.search(
+    content_ids = await get_content_ids(db, current_user.id, [session.document_id]) if session.document_id else []
+    if content_ids:
+        search_results = await hybrid_search(
+            db,
             query=message_data.content,
-            user_id=current_user.id,
-            document_ids=[session.document_id],
+            content_ids=content_ids,
             n_results=5
         )
         
         if search_results:
             # Combine relevant chunks into context
-            context = "\n\n".join([result['content'] for result in search_results])
+            context = "\n\n".join([
+                f"[Page {result['metadata']['page_number']}]: {result['content']}"
+                for result in search_results
+            ])
             print(f"📚 Found {len(search_results)} relevant chunks for query")
-        else:
-            # Fallback to getting first few pages if vector search fails
-            result = await db.execute(
-                select(Page)
-                .join(Document)
-                .where(Document.id == session.document_id)
-                .limit(5)
-            )
-            pages = result.scalars().all()
-            if pages:
-                context = "\n\n".join([p.content for p in pages])
     
     # Get AI response
     ai_service = get_ai_service()
@@ -329,16 +321,14 @@ async def explain_concept(
 ):
     """
     Explain a concept using RAG (Retrieval Augmented Generation)
-    - Uses vector search to find relevant document chunks
+    - Uses hybrid keyword + vector search to find relevant document chunks
     - Supports chat history for context
     - Returns AI-generated explanation
     """
     context = None
     
-    # Get document context using vector search (RAG)
+    # Get document context using hybrid (keyword + vector) search (RAG)
     if data.document_id:
-        from app.services.vector_service import get_vector_service
-        
         # Verify user owns the document
         result = await db.execute(
             select(Document).where(
@@ -351,12 +341,11 @@ async def explain_concept(
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Use vector search to find relevant chunks
-        vector_service = get_vector_service()
-        search_results = await vector_service.search(
+        # Find relevant chunks by keywords and meaning
+        search_results = await hybrid_search(
+            db,
             query=data.concept,
-            user_id=current_user.id,
-            document_ids=[data.document_id],
+            content_ids=[document.content_id],
             n_results=5  # Get top 5 most relevant chunks
         )
         
@@ -368,16 +357,7 @@ async def explain_concept(
             ])
             print(f"✅ Found {len(search_results)} relevant chunks for query: {data.concept[:50]}...")
         else:
-            print(f"⚠️ No relevant chunks found, falling back to first pages")
-            # Fallback to first 5 pages if vector search fails
-            result = await db.execute(
-                select(Page)
-                .where(Page.document_id == data.document_id)
-                .limit(5)
-            )
-            pages = result.scalars().all()
-            if pages:
-                context = "\n\n".join([f"[Page {p.page_number}]: {p.content}" for p in pages])
+            print(f"⚠️ No relevant chunks found, answering without document context")
     
     # Prepare chat history for AI
     history = []
@@ -3,26 +3,82 @@ Document Routes
 Handles PDF upload, listing, viewing, and deletion
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
-import os
+from sqlalchemy import select, func
+from typing import Dict, List, Optional
+import asyncio
+import json
 
-from app.db.database import get_db
+from app.db.database import get_db, AsyncSessionLocal
 from app.models.user import User
-from app.models.document import Document, Page
-from app.schemas.document import DocumentResponse, DocumentListResponse, DocumentDetailResponse
+from app.models.document import Document, DocumentContent, Page
+from app.models.ingestion import IngestionJob
+from app.schemas.document import DocumentResponse, DocumentListResponse, DocumentDetailResponse, DocumentPagesResponse
 from app.core.security import get_current_user
 from app.core.config import settings
-from app.services.pdf_service import save_uploaded_file, extract_pdf_text, delete_file
-from app.services.vector_service import get_vector_service
+from app.api.file_responses import file_response
+from app.services.pdf_service import save_uploaded_file, delete_file, UploadRejectedError
+from app.services.content_service import acquire_content, release_content, get_sample_pages
+from app.services.ingestion_service import enqueue_content
+from app.services.progress_service import TERMINAL_STAGES, format_sse, get_progress_broker
+from app.services.reader_service import read_pages
 from jose import JWTError, jwt
 
 router = APIRouter()
 
 
+def _user_id_from_token(token: Optional[str]) -> int:
+    """
+    Get the user ID from an access token passed as query parameter
+    (for <iframe> and EventSource, which can't send an Authorization header)
+    """
+    user_id = None
+    if token:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            user_id = payload.get("user_id")
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+    
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    return user_id
+
+
+def _add_document(db: AsyncSession, user_id: int, content: DocumentContent, created: bool, title: str):
+    """
+    Add a user's document for shared content to the session, with an
+    ingestion job if the content still needs processing
+    
+    Returns:
+        (document, job) - job is None if the content is already processed
+    """
+    # Only new (or previously failed) content needs an ingestion job
+    job = None
+    if created or content.processing_status == "failed":
+        job = enqueue_content(db, content)
+    
+    document = Document(
+        user_id=user_id,
+        content_id=content.id,
+        title=title,
+        file_size=content.file_size,
+        content_hash=content.sha256,
+        total_pages=content.total_pages,
+        word_count=content.word_count,
+        processing_status=content.processing_status,
+        is_processed=content.is_processed,
+        is_embedded=content.is_embedded,
+        processing_error=content.processing_error
+    )
+    db.add(document)
+    
+    return document, job
+
+
 @router.get("/documents", response_model=DocumentListResponse)
 async def list_documents(
     current_user: User = Depends(get_current_user),
@@ -37,84 +93,139 @@ async def list_documents(
     return {"documents": [DocumentResponse.from_orm(doc) for doc in documents]}
 
 
-@router.post("/documents/upload", status_code=status.HTTP_201_CREATED)
+@router.post("/documents/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
     file: UploadFile = File(...),
     title: str = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Upload a new PDF document"""
+    """
+    Upload a new PDF document
+    
+    The file is saved and an ingestion job is queued - text extraction and
+    embeddings are done by a worker. Poll the document's processing_status.
+    """
     # Validate file type
-    if not file.filename.endswith('.pdf'):
+    if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only PDF files are allowed"
         )
     
-    # Save file
-    file_path = await save_uploaded_file(file, settings.DOCUMENTS_PATH)
-    file_size = os.path.getsize(file_path)
+    # Save file (streamed, hashed and checked for PDF magic bytes / size cap)
+    try:
+        saved = await save_uploaded_file(file, settings.DOCUMENTS_PATH)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    # Create document record
-    document = Document(
-        user_id=current_user.id,
-        title=title or file.filename,
-        file_path=file_path,
-        file_size=file_size
-    )
+    # Share stored content with identical earlier uploads
+    content, created = await acquire_content(db, saved)
     
-    db.add(document)
+    # Create document record and its ingestion job in one transaction
+    document, job = _add_document(db, current_user.id, content, created, title or file.filename)
     await db.commit()
     await db.refresh(document)
     
-    # Extract text in background
+    return {
+        "message": "Document uploaded, processing started" if job else "Document uploaded",
+        "job_id": job.id if job else None,
+        "document": DocumentResponse.from_orm(document)
+    }
+
+
+@router.post("/documents/upload/batch", status_code=status.HTTP_202_ACCEPTED)
+async def upload_documents_batch(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload many PDFs in one request (e.g. a whole course folder)
+    
+    Files are streamed to disk a few at a time (UPLOAD_BATCH_CONCURRENCY),
+    then all documents and their ingestion jobs are created in a single
+    transaction. The ingestion workers process the batch with bounded
+    parallelism. Rejected files are reported per file and don't fail the
+    rest of the batch; any other error fails the whole batch and removes
+    every file it saved.
+    """
+    if len(files) > settings.UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.UPLOAD_BATCH_MAX_FILES} files can be uploaded at once"
+        )
+    
+    semaphore = asyncio.Semaphore(max(settings.UPLOAD_BATCH_CONCURRENCY, 1))
+    saved_paths = []
+    
+    async def save(file: UploadFile):
+        if not file.filename.lower().endswith('.pdf'):
+            return UploadRejectedError(status.HTTP_400_BAD_REQUEST, "Only PDF files are allowed")
+        async with semaphore:
+            try:
+                saved = await save_uploaded_file(file, settings.DOCUMENTS_PATH)
+            except UploadRejectedError as e:
+                return e
+            saved_paths.append(saved.path)
+            return saved
+    
     try:
-        pages_text = await extract_pdf_text(file_path)
-        document.total_pages = len(pages_text)
+        # Let every save finish before failing, so none writes a file after the cleanup
+        saved_files = await asyncio.gather(*(save(file) for file in files), return_exceptions=True)
+        for saved in saved_files:
+            if isinstance(saved, BaseException) and not isinstance(saved, UploadRejectedError):
+                raise saved
         
-        # Prepare pages for database and vectorization
-        pages_data = []
-        for page_num, text in enumerate(pages_text, start=1):
-            page = Page(
-                document_id=document.id,
-                page_number=page_num,
-                content=text
-            )
-            db.add(page)
-            
-            # Collect for vectorization
-            pages_data.append({
-                'page_number': page_num,
-                'content': text
-            })
+        # Register every accepted file in one transaction
+        accepted = []
+        for file, saved in zip(files, saved_files):
+            if isinstance(saved, UploadRejectedError):
+                continue
+            content, created = await acquire_content(db, saved)
+            accepted.append(_add_document(db, current_user.id, content, created, file.filename))
         
-        document.is_processed = True
         await db.commit()
-        
-        # Vectorize the document
-        vector_service = get_vector_service()
-        success = await vector_service.add_document(
-            document_id=document.id,
-            pages=pages_data,
-            user_id=current_user.id
+    
+    except BaseException:
+        # Nothing of a failed batch is kept - stored content is removed by the rollback
+        await db.rollback()
+        for path in saved_paths:
+            delete_file(path)
+        raise
+    
+    # Load server-side defaults (upload_date) for all documents at once
+    if accepted:
+        await db.execute(
+            select(Document)
+            .where(Document.id.in_([document.id for document, _ in accepted]))
+            .execution_options(populate_existing=True)
         )
-        
-        if success:
-            document.is_embedded = True
-            await db.commit()
-            print(f"✅ Document {document.id} processed and vectorized successfully")
-        else:
-            print(f"⚠️ Document {document.id} processed but vectorization failed")
-        
-    except Exception as e:
-        print(f"Error processing PDF: {e}")
-        import traceback
-        traceback.print_exc()
+    
+    results = []
+    accepted_iter = iter(accepted)
+    for file, saved in zip(files, saved_files):
+        if isinstance(saved, UploadRejectedError):
+            results.append({
+                "filename": file.filename,
+                "status": "rejected",
+                "error": saved.detail,
+                "job_id": None,
+                "document": None
+            })
+            continue
+        document, job = next(accepted_iter)
+        results.append({
+            "filename": file.filename,
+            "status": document.processing_status,
+            "error": None,
+            "job_id": job.id if job else None,
+            "document": DocumentResponse.from_orm(document)
+        })
     
     return {
-        "message": "Document uploaded successfully",
-        "document": DocumentResponse.from_orm(document)
+        "message": f"{len(accepted)} of {len(files)} files uploaded",
+        "files": results
     }
 
 
@@ -139,47 +250,286 @@ async def get_document(
     return DocumentResponse.from_orm(document)
 
 
-@router.get("/documents/{document_id}/file")
+@router.api_route("/documents/{document_id}/file", methods=["GET", "HEAD"])
 async def get_document_file(
     document_id: str,
+    request: Request,
     token: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Download/view PDF file - supports both Bearer token and query parameter"""
-    # Try to get user from token query parameter
-    user_id = None
-    if token:
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            user_id = payload.get("user_id")
-        except JWTError:
-            raise HTTPException(status_code=401, detail="Invalid token")
+    """
+    Download/view PDF file - supports both Bearer token and query parameter
     
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
+    Answers Range requests (PDF viewers load pages as they are shown) and
+    revalidation: the ETag is the file's SHA-256, so a browser that has the
+    file gets an empty 304 instead of the whole PDF again.
+    """
+    user_id = _user_id_from_token(token)
     
-    # Get document
+    # Get the document's title and its shared file
     result = await db.execute(
-        select(Document).where(
+        select(Document.title, DocumentContent.file_path, DocumentContent.sha256)
+        .join(DocumentContent, Document.content_id == DocumentContent.id)
+        .where(
             Document.id == document_id,
             Document.user_id == user_id
         )
     )
+    row = result.one_or_none()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    title, file_path, sha256 = row
+    
+    response = await file_response(
+        request,
+        file_path,
+        media_type="application/pdf",
+        filename=f"{title}.pdf",
+        etag=sha256
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return response
+
+
+@router.get("/documents/{document_id}/pages", response_model=DocumentPagesResponse)
+async def get_document_pages(
+    document_id: str,
+    from_page: int = Query(1, alias="from", ge=1),
+    to_page: Optional[int] = Query(None, alias="to", ge=1),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Extracted text of a page range (text-mode reading without the PDF)
+    
+    At most READER_MAX_PAGES_PER_REQUEST pages are returned; when the range
+    is cut short, next_from is the page to continue from. While a document
+    is still processing, pages not extracted yet are left out.
+    """
+    result = await db.execute(
+        select(Document).where(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        )
+    )
     document = result.scalar_one_or_none()
     
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    if not os.path.exists(document.file_path):
-        raise HTTPException(status_code=404, detail="File not found")
+    if to_page is not None and to_page < from_page:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be smaller than 'from'"
+        )
     
-    return FileResponse(
-        document.file_path,
-        media_type="application/pdf",
-        filename=f"{document.title}.pdf"
+    # Without 'to', read up to the end of the document (in windows)
+    window_end = from_page + settings.READER_MAX_PAGES_PER_REQUEST - 1
+    end = to_page or document.total_pages or window_end
+    if document.total_pages:
+        end = min(end, document.total_pages)
+    last_page = min(end, window_end)
+    
+    pages = await read_pages(db, document.content_id, from_page, last_page) if from_page <= last_page else []
+    
+    return {
+        "document_id": document.id,
+        "total_pages": document.total_pages,
+        "processing_status": document.processing_status,
+        "first_page": from_page,
+        "last_page": last_page,
+        "next_from": last_page + 1 if last_page < end else None,
+        "pages": pages
+    }
+
+
+async def _stored_progress(content_id: str) -> Dict:
+    """
+    Progress as stored in the database (used when no worker in this process reports it)
+    
+    While a job runs, this is the snapshot its worker stored last
+    (progress_service.run_progress_writer).
+    """
+    async with AsyncSessionLocal() as db:
+        content = await db.get(DocumentContent, content_id)
+        progress = await db.scalar(
+            select(IngestionJob.progress)
+            .where(IngestionJob.content_id == content_id, IngestionJob.status == "running")
+            .limit(1)
+        )
+        pages_extracted = None if progress else await db.scalar(
+            select(func.count(Page.id)).where(Page.content_id == content_id)
+        )
+    
+    if content is None:
+        return {"stage": "failed", "error": "Document no longer exists"}
+    
+    if progress and content.processing_status == "processing":
+        return json.loads(progress)
+    
+    stage = {"queued": "saved", "processing": "extracting"}.get(content.processing_status, content.processing_status)
+    return {
+        "stage": stage,
+        "total_pages": content.total_pages,
+        "pages_extracted": pages_extracted,
+        "error": content.processing_error
+    }
+
+
+async def _progress_events(request: Request, document_id: str, content_id: str):
+    """Yield progress events for one document until it is ready or failed"""
+    broker = get_progress_broker()
+    
+    # Subscribe before reading the current state so no event is missed
+    with broker.subscribe(content_id) as queue:
+        event = broker.snapshot(content_id) or await _stored_progress(content_id)
+        sent = None
+        quiet = 0.0
+        
+        while True:
+            if event != sent:
+                yield format_sse({**event, "document_id": document_id})
+                sent = event
+                quiet = 0.0
+            if event.get("stage") in TERMINAL_STAGES:
+                return
+            
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.PROGRESS_POLL_SECONDS)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            
+            if await request.is_disconnected():
+                return
+            
+            # No worker in this process reports the job - it may run in another process
+            if broker.snapshot(content_id) is None:
+                event = await _stored_progress(content_id)
+            
+            quiet += settings.PROGRESS_POLL_SECONDS
+            if event == sent and quiet >= settings.PROGRESS_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                quiet = 0.0
+
+
+@router.get("/documents/{document_id}/progress")
+async def stream_document_progress(
+    document_id: str,
+    request: Request,
+    token: Optional[str] = None
+):
+    """
+    Live ingestion progress as Server-Sent Events
+    
+    Pass the access token as ?token= (EventSource can't send headers).
+    Every `progress` event has the stage (saved, extracting, embedding,
+    ready, failed) and the counters pages_extracted / total_pages and
+    chunks_embedded / chunks_total. Chunk counters cover the pages
+    extracted so far. The stream ends when the document is ready or failed.
+    """
+    user_id = _user_id_from_token(token)
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Document.content_id).where(
+                Document.id == document_id,
+                Document.user_id == user_id
+            )
+        )
+        content_id = result.scalar_one_or_none()
+    
+    if not content_id:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return StreamingResponse(
+        _progress_events(request, document_id, content_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+@router.put("/documents/{document_id}/file", status_code=status.HTTP_202_ACCEPTED)
+async def replace_document_file(
+    document_id: str,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Replace a document's PDF with a new version (e.g. revised lecture notes)
+    
+    The document keeps its ID, so chat sessions stay linked to it. Only
+    pages whose text changed are embedded again - the others reuse the
+    embeddings of the previous version.
+    """
+    result = await db.execute(
+        select(Document).where(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        )
+    )
+    document = result.scalar_one_or_none()
+    
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only PDF files are allowed"
+        )
+    
+    try:
+        saved = await save_uploaded_file(file, settings.DOCUMENTS_PATH)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    if saved.sha256 == document.content_hash:
+        delete_file(saved.path)
+        return {
+            "message": "File unchanged",
+            "job_id": None,
+            "document": DocumentResponse.from_orm(document)
+        }
+    
+    # The previous version may be shared with other users, so it is never
+    # changed in place - the document moves to content for the new file
+    previous_content_id = document.content_id
+    content, created = await acquire_content(db, saved)
+    
+    job = None
+    if created or content.processing_status == "failed":
+        # The job takes over this document's reference to the previous
+        # version and releases it once the unchanged pages are copied
+        job = enqueue_content(db, content, source_content_id=previous_content_id)
+    else:
+        # New version is already stored and embedded - nothing to copy
+        await release_content(db, previous_content_id)
+    
+    document.content_id = content.id
+    document.file_size = content.file_size
+    document.content_hash = content.sha256
+    document.total_pages = content.total_pages
+    document.word_count = content.word_count
+    document.processing_status = content.processing_status
+    document.is_processed = content.is_processed
+    document.is_embedded = content.is_embedded
+    document.processing_error = content.processing_error
+    
+    await db.commit()
+    await db.refresh(document)
+    
+    return {
+        "message": "Document replaced, processing changed pages" if job else "Document replaced",
+        "job_id": job.id if job else None,
+        "document": DocumentResponse.from_orm(document)
+    }
+
+
 @router.delete("/documents/{document_id}")
 async def delete_document(
     document_id: str,
@@ -198,15 +548,11 @@ async def delete_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Delete vectors first
-    vector_service = get_vector_service()
-    await vector_service.delete_document(document.id)
-    
-    # Delete file
-    delete_file(document.file_path)
-    
-    # Delete database record
+    # Delete database record, then drop its reference to the shared content
+    # (file, pages and vectors go away with the last reference)
+    content_id = document.content_id
     await db.delete(document)
+    await release_content(db, content_id)
     await db.commit()
     
     return {"message": "Document deleted successfully"}
@@ -230,19 +576,8 @@ async def get_document_summary(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Get sample pages
-    result = await db.execute(
-        select(Page).where(Page.document_id == document_id).limit(3)
-    )
-    pages = result.scalars().all()
-    
-    sample_pages = []
-    for page in pages:
-        preview = page.content[:200] + "..." if len(page.content) > 200 else page.content
-        sample_pages.append({
-            "page_number": page.page_number,
-            "content_preview": preview
-        })
+    # Get sample pages (previews are stored at ingestion - no page text is loaded)
+    sample_pages = await get_sample_pages(db, document.content_id)
     
     response = DocumentResponse.from_orm(document)
     return {"sample_pages": sample_pages, **response.dict()}
@@ -0,0 +1,39 @@
+"""
+Media Routes
+Serves public stored files (avatars) through the storage backend
+
+Only keys under avatars/ are served. Documents are private and go through
+the ownership-checked /api/reader/documents/{id}/file route instead.
+"""
+
+from pathlib import PurePosixPath
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.api.file_responses import file_response
+from app.core.config import settings
+from app.services.image_service import is_avatar_variant
+from app.services.storage_service import is_valid_key
+
+router = APIRouter()
+
+# Key prefixes anyone may read
+PUBLIC_PREFIXES = ("avatars",)
+
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"])
+async def get_media(key: str, request: Request):
+    """Serve a public stored file by its storage key (e.g. /media/avatars/3f/a2/user_1.png)"""
+    if not is_valid_key(key) or PurePosixPath(key).parts[0] not in PUBLIC_PREFIXES:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    if is_avatar_variant(key):
+        # Hash-named - the bytes behind this URL never change
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = f"private, max-age={settings.MEDIA_CACHE_MAX_AGE_SECONDS}"
+    
+    response = await file_response(request, key, cache_control=cache_control)
+    if response is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return response
@@ -0,0 +1,6 @@
+"""
+Maintenance commands
+
+Run from the backend directory, e.g.:
+    python -m app.cli.rechunk
+"""
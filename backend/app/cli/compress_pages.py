@@ -0,0 +1,119 @@
+"""
+Compress Pages Command
+Trains the shared zstd dictionary and rewrites stored pages with the current PAGE_COMPRESSION
+
+Usage:
+    python -m app.cli.compress_pages --train-dictionary data/pages.zdict   # then set ZSTD_DICTIONARY_PATH
+    python -m app.cli.compress_pages --recompress --vacuum                 # apply PAGE_COMPRESSION to old rows
+
+Pages are always readable whatever they were written with, so this is
+only needed to shrink (or uncompress) pages stored before the setting
+was changed.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import bindparam, func, select, text, update
+
+from app.core.config import settings
+from app.db.database import init_db, engine, AsyncSessionLocal
+from app.db.types import zstandard
+from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+from app.models.document import Page
+
+
+async def train_dictionary(path: Path, samples: int, size: int):
+    """Train a zstd dictionary on a random sample of stored pages"""
+    if zstandard is None:
+        raise SystemExit("❌ Training a dictionary needs the zstandard package (pip install zstandard)")
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Page.content).order_by(func.random()).limit(samples))
+        texts = [content.encode("utf-8") for content in result.scalars().all() if content]
+
+    if len(texts) < 10:
+        raise SystemExit("❌ Not enough stored pages to train a dictionary")
+
+    dictionary = zstandard.train_dictionary(size, texts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(dictionary.as_bytes())
+
+    print(f"✅ Trained a {len(dictionary.as_bytes()) // 1024} KB dictionary on {len(texts)} pages: {path}")
+    print(f"   Set ZSTD_DICTIONARY_PATH={path} (keep the file - pages compressed with it need it to be read)")
+
+
+async def recompress_pages(batch_size: int = 500) -> int:
+    """
+    Rewrite every page with the current PAGE_COMPRESSION
+
+    Returns:
+        Number of pages rewritten
+    """
+    pages_table = Page.__table__
+    statement = (
+        update(pages_table)
+        .where(pages_table.c.id == bindparam("page_id"))
+        .values(content=bindparam("page_content"))
+    )
+    rewritten = 0
+    last_id = 0
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            # Keyset pagination keeps memory bounded
+            result = await db.execute(
+                select(Page.id, Page.content)
+                .where(Page.id > last_id)
+                .order_by(Page.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            await db.execute(
+                statement,
+                [{"page_id": page_id, "page_content": content} for page_id, content in rows]
+            )
+            await db.commit()
+
+            rewritten += len(rows)
+            last_id = rows[-1][0]
+
+    return rewritten
+
+
+async def vacuum():
+    """Give the space freed by compression back to the file system"""
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM"))
+
+
+async def main(args):
+    await init_db()
+
+    if args.train_dictionary:
+        await train_dictionary(Path(args.train_dictionary), args.samples, args.dictionary_size)
+
+    if args.recompress:
+        rewritten = await recompress_pages()
+        print(f"✅ Rewrote {rewritten} pages with PAGE_COMPRESSION={settings.PAGE_COMPRESSION}")
+
+    if args.vacuum:
+        await vacuum()
+        print("✅ Database vacuumed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress stored page text")
+    parser.add_argument("--train-dictionary", metavar="PATH", help="Train a zstd dictionary and write it to PATH")
+    parser.add_argument("--samples", type=int, default=2000, help="Pages used to train the dictionary")
+    parser.add_argument("--dictionary-size", type=int, default=112640, help="Dictionary size in bytes")
+    parser.add_argument("--recompress", action="store_true", help="Rewrite all pages with PAGE_COMPRESSION")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,51 @@
+"""
+Index Pages Command
+Adds stored pages to the FTS5 keyword index used by hybrid search
+
+Usage:
+    python -m app.cli.index_pages            # only content that is not indexed yet
+    python -m app.cli.index_pages --rebuild  # everything (e.g. after changing CHUNK_SIZE_TOKENS)
+
+New pages are indexed as they are stored, so this is only needed for
+pages stored before the index existed. Each document is indexed in its
+own transaction.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import select
+
+from app.db.database import init_db, AsyncSessionLocal
+from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+from app.models.document import DocumentContent
+from app.services import lexical_service
+
+
+async def main(rebuild: bool):
+    """Index the stored pages of every content"""
+    await init_db()
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(DocumentContent.id))
+        content_ids = result.scalars().all()
+    
+    done = 0
+    chunks = 0
+    for content_id in content_ids:
+        async with AsyncSessionLocal() as db:
+            if not rebuild and await lexical_service.is_indexed(db, content_id):
+                continue
+            chunks += await lexical_service.reindex_content(db, content_id)
+            await db.commit()
+            done += 1
+    
+    print(f"✅ Indexed {chunks} chunks of {done} of {len(content_ids)} documents")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add stored pages to the keyword index")
+    parser.add_argument("--rebuild", action="store_true", help="Re-index content that is already indexed")
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.rebuild))
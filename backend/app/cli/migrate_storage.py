@@ -0,0 +1,173 @@
+"""
+Migrate Storage Command
+Moves stored files into the sharded layout of the configured storage backend
+
+Usage:
+    python -m app.cli.migrate_storage --dry-run        # count what would move
+    python -m app.cli.migrate_storage --batch-size 200
+
+Files written before sharding (flat DOCUMENTS_PATH / AVATARS_PATH folders,
+absolute paths in document_contents.file_path) are copied to their sharded
+key, the rows are updated batch by batch, and the old files are deleted
+once the batch is committed. With STORAGE_BACKEND=s3 the same run uploads
+local files to the bucket. Safe to re-run - files already in place are
+skipped, so an interrupted run just continues.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+
+from app.core.config import settings
+from app.db.database import init_db, AsyncSessionLocal
+from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+from app.models.document import DocumentContent
+from app.models.user import User
+from app.services.image_service import AVATAR_VARIANT_NAME, stored_variant_keys
+from app.services.storage_service import LocalStorage, get_storage, shard_key
+
+
+async def migrate_files(
+    model,
+    column,
+    sharded_key: Callable,
+    batch_size: int,
+    dry_run: bool,
+    *extra_columns,
+    siblings: Optional[Callable[[str, str], List[Tuple[str, str]]]] = None
+) -> Tuple[int, int]:
+    """
+    Move the files referenced by one column to their sharded keys
+    
+    Args:
+        model: Table to walk (keyset pagination on its id)
+        column: Column holding the storage key or legacy path
+        sharded_key: Row -> new storage key
+        batch_size: Rows per batch (one commit each)
+        dry_run: Only count
+        extra_columns: More columns sharded_key needs
+        siblings: (old key, new key) -> more (old, new) key pairs that move
+            with the file (e.g. the other sizes of an avatar)
+    
+    Returns:
+        (moved, missing) - missing files are reported and left alone
+    """
+    source = LocalStorage(settings.MEDIA_ROOT)
+    storage = get_storage()
+    table = model.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values({column.key: bindparam("new_key")})
+    )
+    moved = missing = 0
+    last_id = None
+    
+    async with AsyncSessionLocal() as db:
+        while True:
+            query = select(model.id, column, *extra_columns).where(column.is_not(None)).order_by(model.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(model.id > last_id)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            updates = []
+            old_files = []
+            for row in rows:
+                row_id, key = row[0], row[1]
+                new_key = sharded_key(row)
+                try:
+                    old_path = source.local_path(key)
+                except ValueError:
+                    print(f"⚠️ Skipping {table.name} {row_id}: invalid file key {key!r}")
+                    continue
+                on_disk = await asyncio.to_thread(old_path.is_file)
+                
+                # Already in place (same key, and for remote storage: not a local file any more)
+                if new_key == key and (not on_disk or storage.local_path(new_key) == old_path):
+                    continue
+                
+                if not on_disk and not await storage.exists(new_key):
+                    print(f"⚠️ Missing file for {table.name} {row_id}: {key}")
+                    missing += 1
+                    continue
+                
+                moved += 1
+                if dry_run:
+                    continue
+                
+                # Copy first - old files are only deleted once the row points at the new ones
+                if on_disk:
+                    files = [(old_path, new_key)]
+                    for old_sibling, new_sibling in (siblings(key, new_key) if siblings else []):
+                        files.append((source.local_path(old_sibling), new_sibling))
+                    
+                    for path, target_key in files:
+                        if not await asyncio.to_thread(path.is_file):
+                            continue
+                        await storage.put_file(path, target_key, move=False)
+                        if storage.local_path(target_key) != path:
+                            old_files.append(path)
+                updates.append({"row_id": row_id, "new_key": new_key})
+            
+            if updates:
+                await db.execute(statement, updates)
+                await db.commit()
+            
+            for path in old_files:
+                await asyncio.to_thread(path.unlink, missing_ok=True)
+    
+    return moved, missing
+
+
+def _avatar_key(row) -> str:
+    """Avatar variants are sharded by their image hash, older avatars by name"""
+    name = Path(row.avatar).name
+    match = AVATAR_VARIANT_NAME.match(name)
+    return shard_key("avatars", name, digest=match.group("digest") if match else None)
+
+
+def _avatar_siblings(old_key: str, new_key: str) -> List[Tuple[str, str]]:
+    """The other sizes of an avatar move with the one stored in User.avatar"""
+    old_keys, new_keys = stored_variant_keys(old_key), stored_variant_keys(new_key)
+    return [(old_keys[size], new_keys[size]) for size in old_keys if old_keys[size] != old_key]
+
+
+async def main(args):
+    await init_db()
+    
+    verb = "Would move" if args.dry_run else "Moved"
+    
+    moved, missing = await migrate_files(
+        DocumentContent,
+        DocumentContent.file_path,
+        lambda row: shard_key("documents", Path(row.file_path).name, digest=row.sha256),
+        args.batch_size,
+        args.dry_run,
+        DocumentContent.sha256
+    )
+    print(f"✅ {verb} {moved} document file(s) to {settings.STORAGE_BACKEND} storage ({missing} missing)")
+    
+    moved, missing = await migrate_files(
+        User,
+        User.avatar,
+        _avatar_key,
+        args.batch_size,
+        args.dry_run,
+        siblings=_avatar_siblings
+    )
+    print(f"✅ {verb} {moved} avatar(s) to {settings.STORAGE_BACKEND} storage ({missing} missing)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move stored files into the sharded storage layout")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows updated per commit")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved")
+    args = parser.parse_args()
+    
+    asyncio.run(main(args))
@@ -0,0 +1,91 @@
+"""
+Partition Vectors Command
+Moves vectors from the global "documents" collection into per-content partitions
+
+Usage:
+    python -m app.cli.partition_vectors
+    python -m app.cli.partition_vectors --batch-size 2000
+
+Stored embeddings are copied as they are - nothing is re-embedded. Each
+batch is upserted into its partitions before it is deleted from the old
+collection, so search keeps working and an interrupted run can simply be
+started again. The old collection is dropped once it is empty.
+
+Vectors from before shared contents only name their document; they are
+moved to that document's content (see migrations/versions/0002) and
+dropped if the document no longer exists.
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from typing import Dict
+
+from sqlalchemy import select
+
+from app.db.database import init_db, AsyncSessionLocal
+from app.models.document import Document
+from app.services.vector_service import LEGACY_COLLECTION, get_vector_service
+
+
+async def load_document_contents() -> Dict[str, str]:
+    """Document ID -> content ID of every document"""
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Document.id, Document.content_id))
+        return dict(result.all())
+
+
+def main(batch_size: int):
+    """Move every legacy vector into its content's partition"""
+    vector_service = get_vector_service()
+    legacy = vector_service.legacy_collection
+    if legacy is None:
+        print("✅ No legacy vector collection - nothing to migrate")
+        return
+    
+    document_contents = asyncio.run(load_document_contents())
+    moved = 0
+    dropped = 0
+    contents = set()
+    while True:
+        # Moved vectors are deleted, so the next batch always starts at the front
+        results = legacy.get(limit=batch_size, include=["embeddings", "documents", "metadatas"])
+        if not results['ids']:
+            break
+        
+        by_content = defaultdict(lambda: {"ids": [], "embeddings": [], "documents": [], "metadatas": []})
+        for i, vector_id in enumerate(results['ids']):
+            metadata = results['metadatas'][i]
+            content_id = metadata.get("content_id") or document_contents.get(metadata.get("document_id"))
+            if content_id is None:
+                dropped += 1
+                continue
+            
+            group = by_content[content_id]
+            group["ids"].append(vector_id)
+            group["embeddings"].append(results['embeddings'][i])
+            group["documents"].append(results['documents'][i])
+            group["metadatas"].append({**metadata, "content_id": content_id})
+        
+        for content_id, group in by_content.items():
+            vector_service.get_partition(content_id, create=True).upsert(**group)
+        legacy.delete(ids=results['ids'])
+        
+        moved += sum(len(group["ids"]) for group in by_content.values())
+        contents.update(by_content)
+        print(f"📦 Moved {moved} vectors...")
+    
+    vector_service.client.delete_collection(name=LEGACY_COLLECTION)
+    vector_service.legacy_collection = None
+    print(f"✅ Moved {moved} vectors of {len(contents)} documents into partitions")
+    if dropped:
+        print(f"⚠️ Dropped {dropped} vectors of deleted documents")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move vectors into per-content partitions")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Vectors per batch")
+    args = parser.parse_args()
+    
+    main(max(args.batch_size, 1))
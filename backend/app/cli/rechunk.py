@@ -0,0 +1,103 @@
+"""
+Re-chunk Command
+Rebuilds the vectors of already embedded documents as token-sized chunks
+
+Usage:
+    python -m app.cli.rechunk            # only content still using one vector per page
+    python -m app.cli.rechunk --force    # everything (e.g. after changing CHUNK_SIZE_TOKENS)
+
+New chunk vectors are upserted first and stale vectors deleted afterwards,
+so search keeps working while a document is being re-chunked. The keyword
+index of a re-chunked document is rebuilt with the same chunks.
+"""
+
+import argparse
+import asyncio
+import re
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import init_db, AsyncSessionLocal
+from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+from app.models.document import DocumentContent, Page
+from app.services import lexical_service
+from app.services.chunking_service import chunk_pages
+from app.services.vector_service import get_vector_service, make_chunk_id
+
+CHUNK_ID_PATTERN = re.compile(r"_chunk_\d+$")
+
+
+async def rechunk_content(content_id: str, force: bool = False) -> bool:
+    """
+    Re-chunk the vectors of one content
+    
+    Returns:
+        True if the content was re-chunked, False if it was skipped
+    """
+    vector_service = get_vector_service()
+    old_ids = set(await vector_service.get_ids(content_id))
+    
+    if not force and old_ids and all(CHUNK_ID_PATTERN.search(i) for i in old_ids):
+        return False
+    
+    new_ids = set()
+    last_page = 0
+    batch_size = max(settings.INGESTION_BATCH_SIZE, 1)
+    
+    async with AsyncSessionLocal() as db:
+        while True:
+            # Keyset pagination keeps memory bounded for large documents
+            result = await db.execute(
+                select(Page.page_number, Page.content)
+                .where(Page.content_id == content_id, Page.page_number > last_page)
+                .order_by(Page.page_number)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            
+            pages = [{'page_number': number, 'content': text} for number, text in rows]
+            if not await vector_service.add_document(content_id=content_id, pages=pages):
+                if any(page['content'] and page['content'].strip() for page in pages):
+                    raise RuntimeError(f"Vectorization failed for content {content_id}")
+            
+            new_ids.update(make_chunk_id(content_id, chunk) for chunk in chunk_pages(pages))
+            last_page = rows[-1][0]
+        
+        # Keyword index rows use the same chunk IDs
+        await lexical_service.reindex_content(db, content_id)
+        await db.commit()
+    
+    await vector_service.delete_ids(content_id, list(old_ids - new_ids))
+    return True
+
+
+async def main(force: bool):
+    """Re-chunk every embedded content"""
+    await init_db()
+    
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DocumentContent.id).where(DocumentContent.is_embedded == True)  # noqa: E712
+        )
+        content_ids = result.scalars().all()
+    
+    done = 0
+    for content_id in content_ids:
+        try:
+            if await rechunk_content(content_id, force):
+                done += 1
+        except Exception as e:
+            print(f"❌ Could not re-chunk content {content_id}: {e}")
+    
+    print(f"✅ Re-chunked {done} of {len(content_ids)} embedded documents")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-chunk embedded documents")
+    parser.add_argument("--force", action="store_true", help="Re-chunk content that is already chunked")
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.force))
@@ -0,0 +1,31 @@
+"""
+Recover Command
+Re-queues document ingestion that was interrupted (crash, deploy, restart)
+
+Usage:
+    python -m app.cli.recover
+
+The API and `python -m app.worker` do the same on startup unless
+INGESTION_RECOVER_ON_STARTUP is off. Workers resume from the per-page
+checkpoints, so pages already stored or embedded are not redone.
+"""
+
+import asyncio
+
+from app.db.database import init_db, AsyncSessionLocal
+from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+from app.services.ingestion_service import recover_ingestion
+
+
+async def main():
+    """Recover interrupted ingestion jobs"""
+    await init_db()
+    
+    async with AsyncSessionLocal() as db:
+        recovered = await recover_ingestion(db)
+    
+    print(f"✅ {recovered} ingestion job(s) re-queued")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,7 +5,7 @@ Simple and clean configuration using Pydantic
 
 from pydantic_settings import BaseSettings
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -32,6 +32,84 @@ class Settings(BaseSettings):
     DOCUMENTS_PATH: Path = MEDIA_ROOT / "documents"
     AVATARS_PATH: Path = MEDIA_ROOT / "avatars"
     VECTOR_DB_PATH: Path = PROJECT_ROOT / "data" / "vector_db" / "chroma_db"
+    STORAGE_BACKEND: str = "local"  # local (files under MEDIA_ROOT) or s3 (any S3-compatible store, needs boto3)
+    STORAGE_SHARD_LEVELS: int = 2  # Hash-prefix directory levels for new files (documents/3f/a2/...; 0 = flat)
+    
+    # S3-compatible storage (STORAGE_BACKEND=s3)
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO (None = AWS)
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_KEY_PREFIX: str = ""  # Prepended to every object key, e.g. "mentora/"
+    S3_URL_EXPIRE_SECONDS: int = 3600  # Lifetime of download links
+    MEDIA_CACHE_MAX_AGE_SECONDS: int = 86400  # Browser cache lifetime of /media files (PDFs always revalidate)
+    
+    # Avatars (re-encoded as WebP, one file per size)
+    AVATAR_SIZES: List[int] = [32, 96, 256]  # Square variants in px - User.avatar is the largest
+    AVATAR_WEBP_QUALITY: int = 80
+    AVATAR_MAX_PIXELS: int = 40_000_000  # Larger images are rejected before decoding
+    
+    # Uploads
+    MAX_UPLOAD_SIZE_MB: int = 100
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes read/written per step while saving uploads
+    UPLOAD_BATCH_MAX_FILES: int = 50  # Files accepted by one batch upload request
+    UPLOAD_BATCH_CONCURRENCY: int = 4  # Files of a batch saved to disk at the same time
+    
+    # PDF Processing
+    PDF_EXTRACT_WORKERS: int = 0  # Processes used for text extraction (0 = one per CPU core)
+    PDF_EXTRACT_PAGES_PER_TASK: int = 25  # Pages handed to a worker process at a time
+    PDF_PARSE_TIMEOUT_SECONDS: int = 300  # Time ingestion may wait on the parser per document
+    PDF_PARSE_MEMORY_LIMIT_MB: int = 1024  # Extra address space a parser process may allocate
+    PDF_MAX_PAGES: int = 2000  # Larger PDFs are rejected
+    
+    # Text Normalization (before pages are stored and embedded)
+    TEXT_NORMALIZATION: bool = True
+    BOILERPLATE_SAMPLE_PAGES: int = 40  # Pages sampled to find running headers/footers
+    BOILERPLATE_MIN_PAGE_RATIO: float = 0.5  # A line on at least this share of sampled pages is boilerplate
+    BOILERPLATE_EDGE_LINES: int = 3  # Only lines this close to the top/bottom of a page can be boilerplate
+    
+    # Page Storage
+    PAGE_COMPRESSION: str = "none"  # none, zlib or zstd (needs the zstandard package)
+    PAGE_COMPRESSION_LEVEL: int = 0  # 0 = codec default
+    PAGE_COMPRESSION_MIN_BYTES: int = 256  # Shorter pages are stored as plain text
+    ZSTD_DICTIONARY_PATH: Optional[Path] = None  # Shared dictionary trained by `python -m app.cli.compress_pages --train-dictionary`
+    
+    # Reader (page text API)
+    READER_MAX_PAGES_PER_REQUEST: int = 20  # Largest page window one request returns
+    PAGE_CACHE_MAX_MB: int = 64  # Memory for decoded pages kept by the API process
+    
+    # Chunking (tokens are approximated by words and punctuation)
+    CHUNK_SIZE_TOKENS: int = 200  # Stays under the embedding model's 256-token limit
+    CHUNK_OVERLAP_TOKENS: int = 40
+    
+    # Vector Store
+    CHROMA_SERVER_URL: Optional[str] = None  # Chroma server, e.g. http://localhost:8001 (None = files in VECTOR_DB_PATH, one process only)
+    VECTOR_STORE_WORKERS: int = 4  # Threads running ChromaDB calls (searches beyond this queue up)
+    SEARCH_BATCH_WINDOW_MS: float = 5.0  # How long a search waits for others to share its embed-and-query call
+    SEARCH_BATCH_MAX_SIZE: int = 32  # Searches per batch (1 = no batching)
+    EMBEDDING_CACHE_MAX_MB: int = 16  # Memory for cached query embeddings (0 = no cache)
+    EMBEDDING_CACHE_PATH: Optional[Path] = None  # SQLite file keeping query embeddings across restarts (None = memory only)
+    EMBEDDING_CACHE_DISK_MAX_MB: int = 256  # Size of the on-disk tier before old entries are dropped
+    RESULT_CACHE_MAX_ENTRIES: int = 2048  # Cached search results (0 = no cache)
+    RESULT_CACHE_TTL_SECONDS: int = 300  # Entries expire even if their documents did not change
+    
+    # Hybrid Retrieval (BM25 over the FTS5 index + vector search)
+    HYBRID_CANDIDATES: int = 20  # Results taken from each search before fusion
+    RRF_K: int = 60  # Reciprocal rank fusion constant - larger values flatten the rank weights
+    
+    # Ingestion Jobs
+    INGESTION_EMBEDDED_WORKERS: int = 1  # Workers run inside the API process (0 = use `python -m app.worker` only)
+    INGESTION_LEASE_SECONDS: int = 300  # How long a worker owns a job before it can be reclaimed
+    INGESTION_MAX_ATTEMPTS: int = 3
+    INGESTION_BATCH_SIZE: int = 50  # Pages stored and embedded per batch (bounds memory use)
+    PAGE_INSERT_BATCH_SIZE: int = 500  # Rows per bulk INSERT statement
+    INGESTION_RETRY_BACKOFF_SECONDS: int = 30  # Doubled after every failed attempt
+    INGESTION_POLL_INTERVAL: float = 2.0  # Seconds between queue polls when idle
+    INGESTION_RECOVER_ON_STARTUP: bool = True  # Re-queue ingestion interrupted by a restart
+    PROGRESS_KEEPALIVE_SECONDS: float = 15.0  # Idle time before a progress stream sends a keepalive
+    PROGRESS_FLUSH_SECONDS: float = 1.0  # How often workers store progress for other processes
+    PROGRESS_POLL_SECONDS: float = 1.0  # How often a progress stream reads stored progress (job in another process)
     
     # AI Configuration
     GOOGLE_API_KEY: Optional[str] = None
@@ -3,6 +3,9 @@ Database configuration and session management
 Uses SQLAlchemy with async SQLite
 """
 
+from pathlib import Path
+
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
@@ -24,6 +27,10 @@ AsyncSessionLocal = async_sessionmaker(
 # Base class for models
 Base = declarative_base()
 
+# Alembic setup (backend/alembic.ini, backend/migrations)
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+BASELINE_REVISION = "0001"  # Schema created by create_all before migrations existed
+
 
 async def get_db() -> AsyncSession:
     """
@@ -42,10 +49,47 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def _alembic_config(connection):
+    from alembic.config import Config
+    
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def _migrate(connection):
+    """
+    Bring the schema up to date
+    
+    A new database is created from the models and stamped as current.
+    Databases from before migrations existed are stamped with the
+    baseline (or as current, if they were created from these models)
+    and then upgraded like any other.
+    """
+    from alembic import command
+    
+    config = _alembic_config(connection)
+    tables = set(inspect(connection).get_table_names())
+    
+    if "alembic_version" not in tables:
+        if "documents" not in tables:
+            Base.metadata.create_all(connection)
+            command.stamp(config, "head")
+            return
+        command.stamp(config, "head" if "document_contents" in tables else BASELINE_REVISION)
+    
+    command.upgrade(config, "head")
+
+
 async def init_db():
     """
-    Initialize database - create all tables
+    Initialize database - create or migrate the tables and the FTS5 search index
     Call this on startup
     """
+    from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+    from app.services.lexical_service import create_fts_table
+    
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_migrate)
+        await create_fts_table(conn)
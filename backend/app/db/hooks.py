@@ -0,0 +1,71 @@
+"""
+Transaction hooks
+Side effects outside the database that follow a transaction's outcome
+
+Stored files, vectors and caches can't roll back with the database, so
+code that changes them registers a callback instead of acting right away:
+after_commit callbacks run once the transaction has committed,
+after_rollback callbacks if it ends any other way (rolled back, or the
+session closed without committing). Callbacks are coroutine functions,
+started as tasks on the running loop; failures are logged, since the
+transaction they belong to is already over.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+Callback = Callable[[], Awaitable]
+
+AFTER_COMMIT = "after_commit"
+AFTER_ROLLBACK = "after_rollback"
+
+# Started callbacks - referenced so they aren't garbage collected mid-run
+_tasks: Set[asyncio.Task] = set()
+
+
+def after_commit(db: AsyncSession, callback: Callback):
+    """Run callback once the session's current transaction commits"""
+    db.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+
+def after_rollback(db: AsyncSession, callback: Callback):
+    """Run callback if the session's current transaction does not commit"""
+    db.info.setdefault(AFTER_ROLLBACK, []).append(callback)
+
+
+async def wait_for_callbacks():
+    """Wait for started callbacks (call on shutdown so cleanups aren't cut off)"""
+    while _tasks:
+        await asyncio.gather(*list(_tasks), return_exceptions=True)
+
+
+async def _run(callback: Callback):
+    try:
+        await callback()
+    except Exception as e:
+        print(f"❌ Post-transaction callback failed: {e}")
+
+
+def _start(callbacks: List[Callback]):
+    for callback in callbacks:
+        task = asyncio.get_running_loop().create_task(_run(callback))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session: Session):
+    session.info.pop(AFTER_ROLLBACK, None)
+    _start(session.info.pop(AFTER_COMMIT, []))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _on_transaction_end(session: Session, transaction):
+    # Runs after _on_commit for a commit - only what is left belongs to a rollback
+    if transaction.parent is None:
+        session.info.pop(AFTER_COMMIT, None)
+        _start(session.info.pop(AFTER_ROLLBACK, []))
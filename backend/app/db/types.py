@@ -0,0 +1,153 @@
+"""
+Custom column types
+Transparent compression for large text columns (page content)
+"""
+
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional, Union
+
+from sqlalchemy.types import Text, TypeDecorator
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # Optional - only needed for PAGE_COMPRESSION=zstd
+    zstandard = None
+
+# One-byte marker in front of every compressed value
+ZLIB_MARKER = b"z"
+ZSTD_MARKER = b"Z"
+ZSTD_DICT_MARKER = b"D"  # zstd with the shared trained dictionary
+
+COMPRESSION_METHODS = ("none", "zlib", "zstd")
+
+# zstd (de)compressors are not thread-safe - keep one per thread
+_local = threading.local()
+_dictionaries = {}
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("PAGE_COMPRESSION=zstd needs the zstandard package (pip install zstandard)")
+
+
+def load_zstd_dictionary(path: Optional[Path] = None):
+    """
+    Load the shared zstd dictionary (ZSTD_DICTIONARY_PATH), cached per path
+    
+    Returns:
+        The dictionary, or None if no dictionary is configured
+    """
+    path = path or settings.ZSTD_DICTIONARY_PATH
+    if not path:
+        return None
+    
+    path = str(path)
+    if path not in _dictionaries:
+        _require_zstandard()
+        with open(path, "rb") as file:
+            _dictionaries[path] = zstandard.ZstdCompressionDict(file.read())
+    return _dictionaries[path]
+
+
+def _thread_cache() -> dict:
+    if not hasattr(_local, "cache"):
+        _local.cache = {}
+    return _local.cache
+
+
+def _zstd_compressor(dictionary):
+    cache = _thread_cache()
+    key = ("compressor", id(dictionary))
+    if key not in cache:
+        level = settings.PAGE_COMPRESSION_LEVEL or 3
+        cache[key] = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+    return cache[key]
+
+
+def _zstd_decompressor(dictionary):
+    cache = _thread_cache()
+    key = ("decompressor", id(dictionary))
+    if key not in cache:
+        cache[key] = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return cache[key]
+
+
+def compress_text(text: str, method: Optional[str] = None) -> Union[str, bytes]:
+    """
+    Compress text for storage
+    
+    Short texts (under PAGE_COMPRESSION_MIN_BYTES) and method "none" are
+    returned unchanged as strings.
+    
+    Args:
+        text: Text to store
+        method: none, zlib or zstd (defaults to PAGE_COMPRESSION)
+    
+    Returns:
+        The text itself, or marker byte + compressed UTF-8 bytes
+    """
+    method = (method or settings.PAGE_COMPRESSION).lower()
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Unknown page compression '{method}' - use one of {', '.join(COMPRESSION_METHODS)}")
+    
+    data = text.encode("utf-8")
+    if method == "none" or len(data) < settings.PAGE_COMPRESSION_MIN_BYTES:
+        return text
+    
+    if method == "zlib":
+        return ZLIB_MARKER + zlib.compress(data, settings.PAGE_COMPRESSION_LEVEL or 6)
+    
+    _require_zstandard()
+    dictionary = load_zstd_dictionary()
+    marker = ZSTD_DICT_MARKER if dictionary is not None else ZSTD_MARKER
+    return marker + _zstd_compressor(dictionary).compress(data)
+
+
+def decompress_text(value: Union[str, bytes, None]) -> Optional[str]:
+    """Turn a stored value (plain or compressed) back into text"""
+    if value is None or isinstance(value, str):
+        return value
+    
+    value = bytes(value)
+    marker, payload = value[:1], value[1:]
+    
+    if marker == ZLIB_MARKER:
+        return zlib.decompress(payload).decode("utf-8")
+    
+    if marker in (ZSTD_MARKER, ZSTD_DICT_MARKER):
+        _require_zstandard()
+        dictionary = None
+        if marker == ZSTD_DICT_MARKER:
+            dictionary = load_zstd_dictionary()
+            if dictionary is None:
+                raise RuntimeError("Page was compressed with a zstd dictionary but ZSTD_DICTIONARY_PATH is not set")
+        return _zstd_decompressor(dictionary).decompress(payload).decode("utf-8")
+    
+    # Not written by compress_text - plain UTF-8 stored as a BLOB
+    return value.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column that is compressed transparently (PAGE_COMPRESSION)
+    
+    Compressed values are stored as BLOBs with a marker byte; plain strings
+    (compression off, short texts, rows written earlier) are stored and
+    returned unchanged, so the setting can be changed at any time without
+    a migration. Values are only decompressed when the column is loaded -
+    queries that don't select it never pay for decompression.
+    """
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+    
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
@@ -5,12 +5,21 @@ Entry point for the Mentora backend
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.core.config import settings
-from app.db.database import init_db
-from app.api.routes import auth, documents, chat, analytics
+from app.db.database import init_db, AsyncSessionLocal
+from app.db.hooks import wait_for_callbacks
+from app.api.routes import auth, documents, chat, analytics, media
+from app.models import ingestion  # noqa: F401 - register ingestion_jobs table
+from app.services.ingestion_service import run_worker, recover_ingestion
+from app.services.pdf_service import shutdown_process_pool
+from app.services.progress_service import run_progress_writer
+from app.services.embedding_cache import get_embedding_cache
+from app.services.result_cache import get_result_cache
+from app.services.vector_executor import get_vector_executor, shutdown_vector_executor
+from app.services.vector_service import init_vector_service
 
 
 @asynccontextmanager
@@ -23,10 +32,35 @@ async def lifespan(app: FastAPI):
     await init_db()
     print("✅ Database initialized")
     
+    # Open the vector store off the event loop
+    await init_vector_service()
+    
+    # Resume documents whose ingestion was cut off by the last shutdown
+    if settings.INGESTION_RECOVER_ON_STARTUP:
+        async with AsyncSessionLocal() as db:
+            await recover_ingestion(db)
+    
+    # Start in-process ingestion workers (standalone ones run via `python -m app.worker`)
+    stop_workers = asyncio.Event()
+    workers = [
+        asyncio.create_task(run_worker(stop_event=stop_workers))
+        for _ in range(settings.INGESTION_EMBEDDED_WORKERS)
+    ]
+    if workers:
+        # Progress streams served by other processes read it from the database
+        workers.append(asyncio.create_task(run_progress_writer(stop_workers)))
+    
     yield
     
     # Shutdown
     print("👋 Shutting down Mentora API...")
+    stop_workers.set()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await wait_for_callbacks()
+    shutdown_process_pool()
+    shutdown_vector_executor()
 
 
 # Create FastAPI application
@@ -44,17 +78,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # PDF viewers read these to load documents in ranges
+    expose_headers=["Accept-Ranges", "Content-Range", "Content-Length", "ETag"],
 )
 
-# Mount static files (for serving PDFs, avatars, etc.)
-app.mount("/media", StaticFiles(directory=str(settings.MEDIA_ROOT)), name="media")
-
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(documents.router, prefix="/api/reader", tags=["Documents"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 
+# Stored files (avatars, etc.), resolved through the storage backend
+app.include_router(media.router, prefix="/media", tags=["Media"])
+
 
 @app.get("/")
 async def root():
@@ -84,9 +120,14 @@ async def api_root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    embedding_cache = get_embedding_cache()
+    result_cache = get_result_cache()
     return {
         "status": "healthy",
-        "version": settings.VERSION
+        "version": settings.VERSION,
+        "vector_store": get_vector_executor().metrics(),
+        "embedding_cache": embedding_cache.metrics() if embedding_cache is not None else None,
+        "result_cache": result_cache.metrics() if result_cache is not None else None
     }
 
 
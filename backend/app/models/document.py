@@ -2,41 +2,88 @@
 Document models - handles PDF documents and pages
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.db.types import CompressedText
 import uuid
 
 
+class DocumentContent(Base):
+    """
+    Document content table - one row per unique PDF (by SHA-256)
+    
+    Identical uploads from different users share the stored file, the
+    extracted pages and the embeddings. ref_count tracks how many Document
+    rows point here; the content is removed when it drops to zero.
+    """
+    __tablename__ = "document_contents"
+    
+    # Primary key - using UUID
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    
+    # Content info
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    file_path = Column(String(500), nullable=False)  # Path to the shared PDF file
+    file_size = Column(Integer, default=0)  # Size in bytes
+    total_pages = Column(Integer, default=0)
+    word_count = Column(Integer, default=0)
+    ref_count = Column(Integer, default=0)  # Number of documents using this content
+    vector_version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped on every vector write
+    
+    # Processing status (driven by the ingestion job)
+    processing_status = Column(String(20), default="queued")  # queued, processing, ready, failed
+    is_processed = Column(Boolean, default=False)  # Text extracted?
+    is_embedded = Column(Boolean, default=False)  # Embeddings created?
+    processing_error = Column(Text, nullable=True)  # Why processing failed
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    pages = relationship("Page", back_populates="document_content", passive_deletes=True)
+    
+    def __repr__(self):
+        return f"<DocumentContent {self.sha256[:12]} ({self.ref_count} refs)>"
+
+
 class Document(Base):
     """
-    Document table - stores uploaded PDF files
+    Document table - a user's copy of an uploaded PDF
+    
+    Size, page count and status are copied from the shared content so
+    listings don't need a join; the ingestion worker keeps them in sync.
     """
     __tablename__ = "documents"
     
     # Primary key - using UUID for security
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     
-    # Foreign key to user
+    # Foreign keys
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    content_id = Column(String(36), ForeignKey("document_contents.id"), nullable=False, index=True)
     
     # Document info
     title = Column(String(255), nullable=False)
-    file_path = Column(String(500), nullable=False)  # Path to PDF file
     total_pages = Column(Integer, default=0)
+    word_count = Column(Integer, default=0)
     file_size = Column(Integer, default=0)  # Size in bytes
+    content_hash = Column(String(64), index=True, nullable=True)  # SHA-256 of the file
     
-    # Processing status
+    # Processing status (driven by the ingestion job)
+    processing_status = Column(String(20), default="queued")  # queued, processing, ready, failed
     is_processed = Column(Boolean, default=False)  # Text extracted?
     is_embedded = Column(Boolean, default=False)  # Embeddings created?
+    processing_error = Column(Text, nullable=True)  # Why processing failed
     
     # Timestamps
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
-    pages = relationship("Page", back_populates="document", cascade="all, delete-orphan")
+    content = relationship("DocumentContent")
     
     def __repr__(self):
         return f"<Document {self.title}>"
@@ -47,19 +94,57 @@ class Page(Base):
     Page table - stores extracted text from PDF pages
     """
     __tablename__ = "pages"
+    __table_args__ = (
+        Index("ix_pages_content_page", "content_id", "page_number", unique=True),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
     
-    # Foreign key to document
-    document_id = Column(String(36), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    # Foreign key to shared content
+    content_id = Column(String(36), ForeignKey("document_contents.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Page info
     page_number = Column(Integer, nullable=False)
-    content = Column(Text, nullable=False)  # Extracted text
+    # Extracted text (compressed if PAGE_COMPRESSION is set). Deferred: loading
+    # Page objects never pulls the text - select Page.content or undefer() it
+    content = deferred(Column(CompressedText, nullable=False), raiseload=True)
+    preview = Column(String(255), nullable=True)  # Start of the text, for summaries
+    word_count = Column(Integer, default=0)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the text, used to diff revisions
+    
+    # Ingestion checkpoint (a stored row means the page was extracted)
+    is_embedded = Column(Boolean, default=False)
     
     # Relationship
-    document = relationship("Document", back_populates="pages")
+    document_content = relationship("DocumentContent", back_populates="pages")
+    
+    def __repr__(self):
+        return f"<Page {self.page_number} of Content {self.content_id}>"
+
+
+class PageChunk(Base):
+    """
+    Page chunk table - chunks of stored pages in the keyword index
+    
+    The FTS5 index (lexical_service) is contentless: it keeps tokens, not
+    text. Each row here is one indexed chunk - its ID is the FTS5 rowid and
+    its text is the page text between start_char and end_char.
+    """
+    __tablename__ = "page_chunks"
+    
+    # Primary key (rowid in the FTS5 index)
+    id = Column(Integer, primary_key=True)
+    
+    # Foreign key to shared content
+    content_id = Column(String(36), ForeignKey("document_contents.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Chunk info (same chunk IDs as the vector store)
+    chunk_id = Column(String(100), nullable=False)
+    page_number = Column(Integer, nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    start_char = Column(Integer, nullable=False)
+    end_char = Column(Integer, nullable=False)
     
     def __repr__(self):
-        return f"<Page {self.page_number} of Document {self.document_id}>"
+        return f"<PageChunk {self.chunk_id}>"
@@ -0,0 +1,55 @@
+"""
+Ingestion models - durable job queue for document processing
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, text
+from sqlalchemy.sql import func
+from datetime import datetime
+from app.db.database import Base
+
+
+class IngestionJob(Base):
+    """
+    Ingestion job table - one row per document content waiting to be extracted and embedded
+    
+    Workers claim a job by taking a time-limited lease on it. If a worker dies,
+    the lease expires and another worker picks the job up again.
+    """
+    __tablename__ = "ingestion_jobs"
+    __table_args__ = (
+        # At most one active job per content, even when several processes enqueue at once
+        Index(
+            "ix_ingestion_jobs_active_content",
+            "content_id",
+            unique=True,
+            sqlite_where=text("status IN ('pending', 'running')")
+        ),
+    )
+    
+    # Primary key
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Foreign key to shared document content
+    content_id = Column(String(36), ForeignKey("document_contents.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Previous version when a file is replaced - unchanged pages are copied from it.
+    # The job holds a reference to it until the job finishes.
+    source_content_id = Column(String(36), ForeignKey("document_contents.id"), nullable=True)
+    
+    # Job state
+    status = Column(String(20), default="pending", index=True)  # pending, running, succeeded, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    last_error = Column(Text, nullable=True)
+    progress = Column(Text, nullable=True)  # Latest progress snapshot (JSON) for other processes' progress streams
+    
+    # Lease info
+    lease_owner = Column(String(64), nullable=True)  # Worker ID holding the job
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    run_after = Column(DateTime(timezone=True), default=datetime.utcnow)  # Used for retry backoff
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<IngestionJob {self.id} ({self.status}) for Content {self.content_id}>"
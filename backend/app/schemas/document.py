@@ -13,19 +13,41 @@ class PageResponse(BaseModel):
     """Schema for page data"""
     page_number: int
     content_preview: Optional[str] = None  # First 200 chars
+    word_count: Optional[int] = None
     
     class Config:
         from_attributes = True
 
 
+class PageTextResponse(BaseModel):
+    """Schema for the full text of a page"""
+    page_number: int
+    content: str
+    word_count: Optional[int] = None
+
+
+class DocumentPagesResponse(BaseModel):
+    """Schema for a window of page text"""
+    document_id: str
+    total_pages: int
+    processing_status: str
+    first_page: int
+    last_page: int
+    next_from: Optional[int] = None  # Pass as ?from= for the next window (None at the end)
+    pages: List[PageTextResponse]
+
+
 class DocumentResponse(BaseModel):
     """Schema for document data"""
     id: str
     title: str
     total_pages: int
+    word_count: Optional[int] = 0
     file_size: int
+    processing_status: str
     is_processed: bool
     is_embedded: bool
+    processing_error: Optional[str] = None
     upload_date: datetime
     
     class Config:
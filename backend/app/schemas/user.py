@@ -3,10 +3,12 @@ Pydantic schemas for User-related requests and responses
 These define the shape of data for API endpoints
 """
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, computed_field
 from datetime import datetime
 from typing import Optional, Dict
 
+from app.services.image_service import avatar_variant_urls
+
 
 # Request schemas (what we receive from frontend)
 
@@ -72,6 +74,12 @@ class UserResponse(BaseModel):
     avatar: Optional[str] = None
     created_at: datetime
     
+    @computed_field
+    @property
+    def avatar_urls(self) -> Dict[int, str]:
+        """Avatar URL per size in px (e.g. 32 for chat bubbles) - empty for old avatars"""
+        return avatar_variant_urls(self.avatar)
+    
     class Config:
         from_attributes = True  # Allows SQLAlchemy models
 
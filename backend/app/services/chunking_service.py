@@ -0,0 +1,91 @@
+"""
+Chunking Service
+Splits page text into overlapping, token-sized chunks for embedding
+
+Tokens are approximated by words and punctuation marks, which is close to
+what the embedding model's tokenizer produces and keeps character offsets
+exact. Chunks never cross page boundaries, so every chunk can be cited by
+page number.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from app.core.config import settings
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class Chunk(NamedTuple):
+    """A piece of a page's text with its position on the page"""
+    page_number: int
+    chunk_index: int  # Position of the chunk within its page
+    start_char: int  # Offset into the page text (inclusive)
+    end_char: int  # Offset into the page text (exclusive)
+    text: str
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text or ""))
+
+
+def chunk_page(
+    page_number: int,
+    text: str,
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None
+) -> List[Chunk]:
+    """
+    Split one page into overlapping chunks
+    
+    Args:
+        page_number: Page the text comes from
+        text: Page text
+        chunk_size: Tokens per chunk (defaults to CHUNK_SIZE_TOKENS)
+        overlap: Tokens shared by neighbouring chunks (defaults to CHUNK_OVERLAP_TOKENS)
+    
+    Returns:
+        List of chunks (empty for blank pages)
+    """
+    chunk_size = max(chunk_size or settings.CHUNK_SIZE_TOKENS, 1)
+    overlap = settings.CHUNK_OVERLAP_TOKENS if overlap is None else overlap
+    overlap = min(max(overlap, 0), chunk_size - 1)
+    
+    spans = [match.span() for match in TOKEN_PATTERN.finditer(text or "")]
+    if not spans:
+        return []
+    
+    chunks = []
+    step = chunk_size - overlap
+    for index, start in enumerate(range(0, len(spans), step)):
+        end = min(start + chunk_size, len(spans))
+        start_char = spans[start][0]
+        end_char = spans[end - 1][1]
+        chunks.append(Chunk(
+            page_number=page_number,
+            chunk_index=index,
+            start_char=start_char,
+            end_char=end_char,
+            text=text[start_char:end_char]
+        ))
+        if end == len(spans):
+            break
+    
+    return chunks
+
+
+def chunk_pages(pages: Iterable[Dict[str, any]]) -> List[Chunk]:
+    """
+    Chunk a batch of pages
+    
+    Args:
+        pages: Page dictionaries with 'page_number' and 'content'
+    
+    Returns:
+        Chunks of all pages, in page order
+    """
+    chunks = []
+    for page in pages:
+        chunks.extend(chunk_page(page['page_number'], page['content']))
+    return chunks
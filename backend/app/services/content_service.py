@@ -0,0 +1,248 @@
+"""
+Content Service
+Content-addressed storage shared between identical uploads
+
+Identical PDFs (same SHA-256) are stored once. Every user's Document row
+points at a shared DocumentContent that owns the file, the extracted pages
+and the embeddings. Access control stays on Document.user_id and is
+applied whenever document IDs are turned into content IDs.
+"""
+
+import hashlib
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.hooks import after_commit, after_rollback
+from app.models.document import Document, DocumentContent, Page
+from app.models.ingestion import IngestionJob
+from app.services import lexical_service
+from app.services.pdf_service import SavedUpload, delete_file
+from app.services.reader_service import get_page_cache
+from app.services.storage_service import get_storage, shard_key
+from app.services.vector_service import get_vector_service
+
+PREVIEW_CHARS = 200
+
+
+async def acquire_content(db: AsyncSession, saved: SavedUpload) -> Tuple[DocumentContent, bool]:
+    """
+    Get the shared content for a saved upload and add a reference to it
+    
+    New content is stored under its hash (a sharded storage key); if the
+    same file is already stored, the freshly saved copy is deleted. The insert is race-free
+    (INSERT ... ON CONFLICT DO NOTHING on the sha256 column). If the
+    caller's transaction does not commit, the stored file is removed again.
+    
+    Args:
+        db: Database session (caller commits)
+        saved: Result of save_uploaded_file
+    
+    Returns:
+        (content, created) - created is True if this upload is new
+    """
+    new_id = str(uuid.uuid4())
+    saved_path = Path(saved.path)
+    storage_key = shard_key("documents", f"{saved.sha256}{saved_path.suffix}", digest=saved.sha256)
+    
+    await db.execute(
+        sqlite_insert(DocumentContent)
+        .values(
+            id=new_id,
+            sha256=saved.sha256,
+            file_path=storage_key,
+            file_size=saved.size,
+            ref_count=0
+        )
+        .on_conflict_do_nothing(index_elements=["sha256"])
+    )
+    await db.execute(
+        update(DocumentContent)
+        .where(DocumentContent.sha256 == saved.sha256)
+        .values(ref_count=DocumentContent.ref_count + 1)
+    )
+    
+    result = await db.execute(
+        select(DocumentContent)
+        .where(DocumentContent.sha256 == saved.sha256)
+        .execution_options(populate_existing=True)
+    )
+    content = result.scalar_one()
+    created = content.id == new_id
+    
+    if created:
+        await get_storage().put_file(saved_path, storage_key)
+        after_rollback(db, lambda: delete_unreferenced_file(storage_key))
+    else:
+        # Same bytes are already stored - drop the duplicate
+        delete_file(saved.path)
+    
+    return content, created
+
+
+async def release_content(db: AsyncSession, content_id: str) -> Optional[DocumentContent]:
+    """
+    Drop one reference to shared content
+    
+    When the last reference goes away the pages, jobs and content row are
+    removed inside the caller's write transaction, so a concurrent upload
+    of the same file waits for it. The vectors, the file and cached pages
+    are removed once that transaction commits.
+    
+    Returns:
+        The removed content, or None if other documents still use it
+    """
+    await db.execute(
+        update(DocumentContent)
+        .where(DocumentContent.id == content_id)
+        .values(ref_count=DocumentContent.ref_count - 1)
+    )
+    
+    content = await db.get(DocumentContent, content_id, populate_existing=True)
+    if content is None or content.ref_count > 0:
+        return None
+    
+    # Last owner is gone - remove everything derived from the file
+    await lexical_service.delete_content(db, content_id)  # Needs the page text
+    await db.execute(delete(Page).where(Page.content_id == content_id))
+    
+    # Unfinished jobs may still hold a reference to a previous version
+    result = await db.execute(
+        select(IngestionJob.source_content_id).where(
+            IngestionJob.content_id == content_id,
+            IngestionJob.source_content_id.is_not(None)
+        )
+    )
+    source_ids = result.scalars().all()
+    await db.execute(delete(IngestionJob).where(IngestionJob.content_id == content_id))
+    for source_id in source_ids:
+        await release_content(db, source_id)
+    
+    await db.delete(content)
+    
+    file_path = content.file_path
+    
+    async def remove_derived_data():
+        get_page_cache().invalidate(content_id)
+        await get_vector_service().delete_document(content_id)
+        await delete_unreferenced_file(file_path)
+    
+    after_commit(db, remove_derived_data)
+    return content
+
+
+async def delete_unreferenced_file(file_path: str) -> bool:
+    """
+    Delete a stored file unless a content row uses it
+    
+    Runs after the transaction that dropped (or never committed) the row;
+    a re-upload of the same file may have stored it again in the meantime.
+    
+    Returns:
+        True if the file was deleted
+    """
+    async with AsyncSessionLocal() as db:
+        in_use = await db.scalar(
+            select(DocumentContent.id).where(DocumentContent.file_path == file_path).limit(1)
+        )
+    if in_use is not None:
+        return False
+    return await get_storage().delete(file_path)
+
+
+def make_page_preview(text: str) -> str:
+    """Start of a page's text for summaries"""
+    text = text or ""
+    return text[:PREVIEW_CHARS] + "..." if len(text) > PREVIEW_CHARS else text
+
+
+def hash_page_text(text: str) -> str:
+    """SHA-256 of a page's text (used to find changed pages between revisions)"""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+async def bulk_insert_pages(
+    db: AsyncSession,
+    content_id: str,
+    pages: List[Tuple[int, str]],
+    batch_size: Optional[int] = None
+) -> int:
+    """
+    Insert pages with Core executemany statements
+    
+    Skips the ORM unit of work and identity map entirely - no Page objects
+    are created. Previews and word counts are computed here, once, so
+    summaries never need the page text. The caller commits (and adds the
+    pages to the keyword index - lexical_service.index_pages).
+    
+    Args:
+        db: Database session
+        content_id: Content the pages belong to
+        pages: (page_number, text) tuples
+        batch_size: Rows per executemany call (defaults to PAGE_INSERT_BATCH_SIZE)
+    
+    Returns:
+        Number of inserted pages
+    """
+    batch_size = max(batch_size or settings.PAGE_INSERT_BATCH_SIZE, 1)
+    
+    for start in range(0, len(pages), batch_size):
+        await db.execute(
+            insert(Page.__table__),
+            [
+                {
+                    "content_id": content_id,
+                    "page_number": page_number,
+                    "content": text,
+                    "content_hash": hash_page_text(text),
+                    "preview": make_page_preview(text),
+                    "word_count": len(text.split())
+                }
+                for page_number, text in pages[start:start + batch_size]
+            ]
+        )
+    
+    return len(pages)
+
+
+async def get_sample_pages(db: AsyncSession, content_id: str, limit: int = 3) -> List[Dict]:
+    """
+    First pages of a document as previews (reads no page text)
+    
+    Returns:
+        Dictionaries with 'page_number', 'content_preview' and 'word_count'
+    """
+    result = await db.execute(
+        select(Page.page_number, Page.preview, Page.word_count)
+        .where(Page.content_id == content_id)
+        .order_by(Page.page_number)
+        .limit(limit)
+    )
+    return [
+        {"page_number": page_number, "content_preview": preview, "word_count": word_count}
+        for page_number, preview, word_count in result.all()
+    ]
+
+
+async def get_content_ids(db: AsyncSession, user_id: int, document_ids: List[str]) -> List[str]:
+    """
+    Map document IDs to content IDs, keeping only documents the user owns
+    
+    Use this before any search over shared pages or vectors.
+    """
+    if not document_ids:
+        return []
+    
+    result = await db.execute(
+        select(Document.content_id).where(
+            Document.id.in_(document_ids),
+            Document.user_id == user_id
+        )
+    )
+    return list(dict.fromkeys(result.scalars().all()))
@@ -0,0 +1,247 @@
+"""
+Embedding Cache
+Query embeddings kept in a memory LRU, with an optional on-disk tier
+
+Students send the same questions again and again ("explain this",
+"summarize page 3"). Embeddings are cached by embedding model and
+normalized query text, so a repeated question skips the embedding model.
+The memory tier is bounded by the bytes its vectors use; the disk tier
+(EMBEDDING_CACHE_PATH, a SQLite file) survives restarts and drops the
+least recently used rows when it outgrows EMBEDDING_CACHE_DISK_MAX_MB.
+Disk hits don't write on their own: access times are collected and saved
+with the next insert (or every TOUCH_FLUSH_INTERVAL hits), so recency on
+disk may lag a little - enough for trimming.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# Disk rows are trimmed after this many inserts, not on every one
+TRIM_INTERVAL = 256
+
+# Pending access times are saved after this many disk hits without an insert
+TOUCH_FLUSH_INTERVAL = 64
+
+# Keys looked up per SELECT (stays under SQLite's bound parameter limit)
+DISK_READ_BATCH = 500
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key form of a query - Unicode-normalized, case-folded, single-spaced
+    
+    The default model (all-MiniLM-L6-v2) is uncased, so case folding does
+    not change its embedding.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+def model_id(embedding_function) -> str:
+    """Identify the model behind an embedding function (part of every cache key)"""
+    name = type(embedding_function).__name__
+    model = getattr(embedding_function, "MODEL_NAME", None)
+    return f"{name}:{model}" if model else name
+
+
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings, bounded by the memory their vectors use
+    
+    Used from vector store executor threads, so every access takes a lock.
+    The disk tier has its own lock - memory hits never wait on disk I/O.
+    """
+    
+    def __init__(self, max_bytes: int, disk_path: Optional[Path] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], array]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.disk_max_bytes = disk_max_bytes
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        self._disk_inserts = 0
+        self._touched: Dict[Tuple[str, str], float] = {}  # Access times not saved yet
+        if disk_path is not None:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, used_at REAL NOT NULL, "
+                "PRIMARY KEY (model, query))"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_used_at ON embeddings (used_at)")
+            self._disk.commit()
+    
+    def embed(self, texts: Sequence[str], embedding_function) -> List[List[float]]:
+        """
+        Embeddings of texts, calling the embedding function only for uncached ones
+        
+        All misses are embedded in one call. Texts are embedded in their
+        normalized form, so a hit and a miss for the same key give the same
+        vector.
+        """
+        model = model_id(embedding_function)
+        keys = [normalize_query(text) for text in texts]
+        
+        vectors: Dict[str, array] = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._entries.get((model, key))
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end((model, key))
+                    self.hits += 1
+                    vectors[key] = vector
+        
+        if missing and self._disk is not None:
+            found = self._read_disk(model, missing)
+            with self._lock:
+                for key, vector in found.items():
+                    self._put(model, key, vector)
+                    vectors[key] = vector
+                self.hits += len(found)
+                self.disk_hits += len(found)
+            missing = [key for key in missing if key not in found]
+        
+        if missing:
+            # Outside the lock - other threads keep hitting the cache meanwhile
+            embedded = [array("f", vector) for vector in embedding_function(missing)]
+            with self._lock:
+                self.misses += len(missing)
+                for key, vector in zip(missing, embedded):
+                    self._put(model, key, vector)
+                    vectors[key] = vector
+            if self._disk is not None:
+                self._write_disk(model, list(zip(missing, embedded)))
+        
+        return [vectors[key].tolist() for key in keys]
+    
+    def metrics(self) -> Dict:
+        """Hit/miss counters and memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+    
+    def _put(self, model: str, key: str, vector: array):
+        """Cache a vector in memory and evict the least recently used ones over the limit"""
+        size = vector.itemsize * len(vector) + len(key)
+        if size > self.max_bytes:
+            return
+        
+        old = self._entries.pop((model, key), None)
+        if old is not None:
+            self.size -= old.itemsize * len(old) + len(key)
+        self._entries[(model, key)] = vector
+        self.size += size
+        
+        while self.size > self.max_bytes:
+            (_, oldest_key), oldest = self._entries.popitem(last=False)
+            self.size -= oldest.itemsize * len(oldest) + len(oldest_key)
+    
+    def _read_disk(self, model: str, keys: List[str]) -> Dict[str, array]:
+        """Vectors of the keys found on disk; their access times are saved later"""
+        found = {}
+        with self._disk_lock:
+            for start in range(0, len(keys), DISK_READ_BATCH):
+                batch = keys[start:start + DISK_READ_BATCH]
+                rows = self._disk.execute(
+                    f"SELECT query, vector FROM embeddings WHERE model = ? AND query IN ({', '.join('?' * len(batch))})",
+                    (model, *batch)
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+            
+            now = time.time()
+            for key in found:
+                self._touched[(model, key)] = now
+            if len(self._touched) >= TOUCH_FLUSH_INTERVAL:
+                self._flush_touched()
+                self._disk.commit()
+        return found
+    
+    def _write_disk(self, model: str, items: List[Tuple[str, array]]):
+        """Store new vectors (and pending access times) in one transaction"""
+        with self._disk_lock:
+            self._flush_touched()
+            now = time.time()
+            self._disk.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, query, vector, used_at) VALUES (?, ?, ?, ?)",
+                [(model, key, vector.tobytes(), now) for key, vector in items]
+            )
+            self._disk.commit()
+            
+            inserts = self._disk_inserts
+            self._disk_inserts += len(items)
+            if inserts // TRIM_INTERVAL != self._disk_inserts // TRIM_INTERVAL:
+                self._trim_disk()
+    
+    def _flush_touched(self):
+        """Save pending access times (the caller holds the disk lock and commits)"""
+        if self._touched:
+            self._disk.executemany(
+                "UPDATE embeddings SET used_at = ? WHERE model = ? AND query = ?",
+                [(used_at, model, key) for (model, key), used_at in self._touched.items()]
+            )
+            self._touched.clear()
+    
+    def _trim_disk(self):
+        """Drop the least recently used rows while the disk tier is over its limit"""
+        if self.disk_max_bytes <= 0:
+            return
+        
+        rows, row_bytes = self._disk.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector) + LENGTH(query)), 0) FROM embeddings"
+        ).fetchone()
+        if row_bytes <= self.disk_max_bytes:
+            return
+        
+        # Keep the most recently used rows that fit, assuming rows of average size
+        keep = int(rows * self.disk_max_bytes / row_bytes)
+        self._disk.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (keep,)
+        )
+        self._disk.commit()
+
+
+# Singleton instance
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get or create embedding cache instance (None when EMBEDDING_CACHE_MAX_MB is 0)"""
+    global _embedding_cache
+    if _embedding_cache is None and settings.EMBEDDING_CACHE_MAX_MB > 0:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+                    disk_path=settings.EMBEDDING_CACHE_PATH,
+                    disk_max_bytes=settings.EMBEDDING_CACHE_DISK_MAX_MB * 1024 * 1024
+                )
+    return _embedding_cache
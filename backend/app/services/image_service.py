@@ -0,0 +1,137 @@
+"""
+Image Service
+Avatar processing - decode once, strip metadata, store small WebP variants
+
+Uploaded images are decoded in the process pool (untrusted input, CPU
+bound), cropped square and re-encoded as WebP at AVATAR_SIZES. Re-encoding
+drops EXIF, GPS and ICC data. Variant keys carry a hash of the owner and
+the processed image, so a URL's bytes never change and can be cached
+forever, and users who upload the same picture don't share (and delete)
+each other's files.
+"""
+
+import hashlib
+import io
+import re
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+from app.services.pdf_service import run_in_process_pool
+from app.services.storage_service import shard_key
+
+ALLOWED_FORMATS = ("JPEG", "PNG", "WEBP")
+
+# avatars/<shards>/<hash>_<size>.webp
+AVATAR_VARIANT_NAME = re.compile(r"^(?P<digest>[0-9a-f]{32})_(?P<size>\d+)\.webp$")
+
+
+class ImageProcessingError(Exception):
+    """An upload is not a usable image (the message is shown to the user)"""
+
+
+def _render_variants(data: bytes, sizes: List[int], quality: int, max_pixels: int) -> Dict[int, bytes]:
+    """
+    Decode an image and encode square WebP variants (runs in a worker process)
+    
+    Returns:
+        Size in px -> WebP bytes
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError:
+        raise ImageProcessingError("Image dimensions are too large")
+    except (UnidentifiedImageError, OSError):
+        raise ImageProcessingError("File is not a valid image")
+    
+    if image.format not in ALLOWED_FORMATS:
+        raise ImageProcessingError("Only image files (JPEG, PNG, WebP) are allowed")
+    
+    # Checked before decoding - the header is all that has been read so far
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageProcessingError("Image dimensions are too large")
+    
+    # JPEG can decode at a fraction of full size - much faster for photos
+    largest = max(sizes)
+    image.draft("RGB", (largest * 2, largest * 2))
+    
+    try:
+        image = ImageOps.exif_transpose(image)  # Apply camera rotation before EXIF is dropped
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    except (OSError, SyntaxError, ValueError):
+        raise ImageProcessingError("File is not a valid image")
+    
+    variants = {}
+    square = ImageOps.fit(image, (largest, largest), Image.LANCZOS)
+    for size in sorted(sizes, reverse=True):
+        variant = square if size == largest else square.resize((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, "WEBP", quality=quality, method=4)
+        variants[size] = buffer.getvalue()
+    return variants
+
+
+async def render_avatar(data: bytes) -> Dict[int, bytes]:
+    """
+    Turn an uploaded image into WebP variants at AVATAR_SIZES
+    
+    Raises:
+        ImageProcessingError: If the data is not a usable image
+    """
+    try:
+        return await run_in_process_pool(
+            _render_variants,
+            data,
+            settings.AVATAR_SIZES,
+            settings.AVATAR_WEBP_QUALITY,
+            settings.AVATAR_MAX_PIXELS
+        )
+    except MemoryError:
+        raise ImageProcessingError("Image is too large to process")
+    except BrokenProcessPool:
+        raise ImageProcessingError("Image could not be processed")
+
+
+def avatar_variant_keys(variants: Dict[int, bytes], user_id: int) -> Dict[int, str]:
+    """
+    Storage keys for rendered variants, named by a hash of the user ID and the largest one
+    
+    Example:
+        {32: "avatars/3f/a2/3fa2..._32.webp", 96: ..., 256: ...}
+    """
+    digest = hashlib.sha256(f"{user_id}:".encode() + variants[max(variants)]).hexdigest()[:32]
+    return {
+        size: shard_key("avatars", f"{digest}_{size}.webp", digest=digest)
+        for size in variants
+    }
+
+
+def stored_variant_keys(avatar: Optional[str]) -> Dict[int, str]:
+    """
+    Storage keys of all variants of a stored avatar (User.avatar is the largest one)
+    
+    Returns:
+        Size in px -> key, or an empty dict for avatars stored before variants existed
+    """
+    path = PurePosixPath(avatar or "")
+    match = AVATAR_VARIANT_NAME.match(path.name)
+    if not match:
+        return {}
+    
+    digest = match.group("digest")
+    return {size: str(path.parent / f"{digest}_{size}.webp") for size in settings.AVATAR_SIZES}
+
+
+def avatar_variant_urls(avatar: Optional[str]) -> Dict[int, str]:
+    """Size in px -> /media URL of each variant of a stored avatar"""
+    return {size: f"/media/{key}" for size, key in stored_variant_keys(avatar).items()}
+
+
+def is_avatar_variant(key: str) -> bool:
+    """Whether a storage key is a hash-named avatar variant (content never changes)"""
+    path = PurePosixPath(key)
+    return path.parts[:1] == ("avatars",) and AVATAR_VARIANT_NAME.match(path.name) is not None
@@ -0,0 +1,775 @@
+"""
+Ingestion Service
+Durable job queue for document processing (text extraction + embeddings)
+
+Uploads only save the file and enqueue a job. Workers - either inside the API
+process or standalone via `python -m app.worker` - claim jobs with a lease,
+run the pipeline and update the document status.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.document import Document, DocumentContent, Page
+from app.models.ingestion import IngestionJob
+from app.services.pdf_service import (
+    PdfParseError,
+    PdfSandbox,
+    TextNormalizer,
+    count_pdf_pages,
+    detect_boilerplate,
+    iter_pdf_pages
+)
+from app.services.chunking_service import Chunk, chunk_page
+from app.services import lexical_service
+from app.services.content_service import bulk_insert_pages, hash_page_text, release_content
+from app.services.progress_service import get_progress_broker
+from app.services.storage_service import get_storage
+from app.services.vector_service import get_vector_service
+
+
+class JobCancelled(Exception):
+    """The job's content was deleted, or its lease lost, while it was running"""
+
+
+def make_worker_id() -> str:
+    """Create a unique ID for a worker (host, process and random suffix)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def enqueue_content(
+    db: AsyncSession,
+    content: DocumentContent,
+    source_content_id: Optional[str] = None
+) -> IngestionJob:
+    """
+    Add an ingestion job for shared document content to the session
+    
+    The caller is responsible for committing, so the document and its job
+    are stored in the same transaction.
+    
+    Args:
+        db: Database session
+        content: Content to process
+        source_content_id: Previous version of a replaced file. The caller
+            hands one reference to it over to the job, which releases it
+            when it finishes.
+    """
+    job = IngestionJob(
+        content_id=content.id,
+        source_content_id=source_content_id,
+        max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+        run_after=datetime.utcnow()
+    )
+    content.processing_status = "queued"
+    content.processing_error = None
+    db.add(job)
+    return job
+
+
+async def enqueue_if_idle(db: AsyncSession, content: DocumentContent) -> bool:
+    """
+    Add an ingestion job for content unless it already has an active one
+    
+    Unlike enqueue_content this is safe when several processes do it at
+    once (e.g. recovery on startup): the insert is skipped if it conflicts
+    with ix_ingestion_jobs_active_content. The caller commits.
+    
+    Returns:
+        True if a job was added
+    """
+    result = await db.execute(
+        sqlite_insert(IngestionJob)
+        .values(
+            content_id=content.id,
+            status="pending",
+            attempts=0,
+            max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+            run_after=datetime.utcnow()
+        )
+        .on_conflict_do_nothing()
+    )
+    if result.rowcount != 1:
+        return False
+    
+    content.processing_status = "queued"
+    content.processing_error = None
+    return True
+
+
+async def _set_content_status(db: AsyncSession, content: DocumentContent, **values):
+    """
+    Update status fields on the content and on every document using it
+    
+    Example:
+        await _set_content_status(db, content, processing_status="ready")
+    """
+    for key, value in values.items():
+        setattr(content, key, value)
+    
+    await db.execute(
+        update(Document)
+        .where(Document.content_id == content.id)
+        .values(**values)
+    )
+
+
+def _claimable(now: datetime):
+    """Filter for jobs a worker is allowed to take"""
+    return and_(
+        IngestionJob.attempts < IngestionJob.max_attempts,
+        or_(
+            and_(
+                IngestionJob.status == "pending",
+                # No run_after - jobs backfilled by older migrations
+                or_(IngestionJob.run_after.is_(None), IngestionJob.run_after <= now)
+            ),
+            # Lease expired - the previous worker died or hung
+            and_(IngestionJob.status == "running", IngestionJob.lease_expires_at < now)
+        )
+    )
+
+
+async def claim_next_job(db: AsyncSession, worker_id: str) -> Optional[IngestionJob]:
+    """
+    Claim the oldest available job by taking a lease on it
+    
+    Uses a conditional UPDATE so two workers can never own the same job.
+    
+    Returns:
+        The claimed job, or None if the queue is empty
+    """
+    now = datetime.utcnow()
+    
+    result = await db.execute(
+        select(IngestionJob.id)
+        .where(_claimable(now))
+        .order_by(IngestionJob.id)
+        .limit(1)
+    )
+    job_id = result.scalar_one_or_none()
+    
+    if job_id is None:
+        return None
+    
+    result = await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, _claimable(now))
+        .values(
+            status="running",
+            lease_owner=worker_id,
+            lease_expires_at=now + timedelta(seconds=settings.INGESTION_LEASE_SECONDS),
+            attempts=IngestionJob.attempts + 1,
+            progress=None
+        )
+    )
+    await db.commit()
+    
+    if result.rowcount != 1:
+        # Another worker won the race
+        return None
+    
+    return await db.get(IngestionJob, job_id, populate_existing=True)
+
+
+async def fail_exhausted_jobs(db: AsyncSession) -> int:
+    """
+    Mark jobs whose lease expired after their last attempt as failed
+    
+    Returns:
+        Number of jobs marked failed
+    """
+    now = datetime.utcnow()
+    
+    result = await db.execute(
+        select(IngestionJob).where(
+            IngestionJob.status == "running",
+            IngestionJob.lease_expires_at < now,
+            IngestionJob.attempts >= IngestionJob.max_attempts
+        )
+    )
+    jobs = result.scalars().all()
+    
+    for job in jobs:
+        job.status = "failed"
+        job.lease_owner = None
+        job.last_error = job.last_error or "Worker lease expired"
+        content = await db.get(DocumentContent, job.content_id)
+        if content is not None:
+            await _set_content_status(db, content, processing_status="failed", processing_error=job.last_error)
+        await _release_source(db, job)
+    
+    if jobs:
+        await db.commit()
+    
+    for job in jobs:
+        get_progress_broker().publish(job.content_id, stage="failed", error=job.last_error)
+    
+    return len(jobs)
+
+
+async def _renew_lease(job_id: int, worker_id: str):
+    """
+    Keep extending the lease while a job is being processed
+    
+    Returns once the lease is lost - the job was deleted with its content,
+    or another worker took it over after the lease expired.
+    """
+    interval = max(settings.INGESTION_LEASE_SECONDS / 3, 1)
+    
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    update(IngestionJob)
+                    .where(
+                        IngestionJob.id == job_id,
+                        IngestionJob.lease_owner == worker_id,
+                        IngestionJob.status == "running"
+                    )
+                    .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=settings.INGESTION_LEASE_SECONDS))
+                )
+                await db.commit()
+        except Exception as e:
+            # Try again next time - the lease outlasts a few missed renewals
+            print(f"⚠️ Could not renew the lease of ingestion job {job_id}: {e}")
+            continue
+        
+        if result.rowcount == 0:
+            print(f"🛑 Ingestion job {job_id} lost its lease")
+            return
+
+
+async def _run_while_leased(coro, heartbeat: asyncio.Task):
+    """
+    Run coro unless the heartbeat ends first, which means the lease was lost
+    
+    Raises:
+        JobCancelled: If the lease was lost (coro is cancelled)
+    """
+    task = asyncio.ensure_future(coro)
+    await asyncio.wait({task, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+    if not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        raise JobCancelled("The job's lease was lost")
+    return task.result()
+
+
+async def _ensure_content_exists(db: AsyncSession, content: DocumentContent):
+    """
+    Stop the job if its content was deleted (every document using it was deleted or replaced)
+    
+    Called after writing a batch. Inside a write transaction this sees
+    the latest state and a concurrent delete waits for the commit - and
+    then removes the batch's pages with the others.
+    
+    Raises:
+        JobCancelled: If the content no longer exists
+    """
+    exists = await db.scalar(select(DocumentContent.id).where(DocumentContent.id == content.id))
+    if exists is None:
+        raise JobCancelled(f"Content {content.id} was deleted")
+
+
+def _chunk_batch(batch: List[Tuple[int, str]]) -> List[Chunk]:
+    """
+    Chunks of a batch of pages, in page order (blank pages have none)
+    
+    Computed once per batch, in a thread, and shared by the keyword index,
+    the vector store and the progress count.
+    """
+    return [chunk for page_number, text in batch for chunk in chunk_page(page_number, text or "")]
+
+
+async def _embed_page_batch(
+    db: AsyncSession,
+    content: DocumentContent,
+    batch: List[Tuple[int, str]],
+    chunks: List[Chunk]
+):
+    """
+    Embed one batch of stored pages and checkpoint them as embedded
+    
+    Vectors are upserted, so a batch interrupted before its checkpoint is
+    simply written again on the next attempt.
+    """
+    pages_data = [
+        {'page_number': page_number, 'content': text}
+        for page_number, text in batch
+        if text and text.strip()
+    ]
+    
+    if pages_data:
+        vector_service = get_vector_service()
+        success = await vector_service.add_document(
+            content_id=content.id,
+            pages=pages_data,
+            chunks=chunks
+        )
+        
+        if not success:
+            raise RuntimeError("Vectorization failed")
+        
+        if not content.is_embedded:
+            await _set_content_status(db, content, is_embedded=True)
+    
+    # Blank pages are marked too - there is nothing left to embed for them
+    await db.execute(
+        update(Page)
+        .where(
+            Page.content_id == content.id,
+            Page.page_number.in_([page_number for page_number, _ in batch])
+        )
+        .values(is_embedded=True)
+    )
+    await db.commit()
+
+
+async def _copy_unchanged_pages(
+    db: AsyncSession,
+    content: DocumentContent,
+    batch: List[Tuple[int, str]],
+    source_content_id: str
+) -> List[Tuple[int, str]]:
+    """
+    Reuse the embeddings of pages that did not change since the previous version
+    
+    A page is unchanged if some page of the previous version has the same
+    text hash and was already embedded there - wherever it was, so pages
+    moved by an inserted or removed page are reused too. The same page
+    number is preferred when several old pages have the text.
+    
+    Returns:
+        Pages of the batch that still have to be embedded
+    """
+    hashes = {page_number: hash_page_text(text) for page_number, text in batch}
+    result = await db.execute(
+        select(Page.page_number, Page.content_hash).where(
+            Page.content_id == source_content_id,
+            Page.content_hash.in_(set(hashes.values())),
+            Page.is_embedded == True
+        )
+    )
+    source_pages = defaultdict(set)
+    for page_number, content_hash in result.all():
+        source_pages[content_hash].add(page_number)
+    
+    unchanged = {}
+    for page_number, content_hash in hashes.items():
+        candidates = source_pages.get(content_hash)
+        if candidates:
+            unchanged[page_number] = page_number if page_number in candidates else min(candidates)
+    
+    copied = await get_vector_service().copy_pages(source_content_id, content.id, unchanged)
+    
+    if copied:
+        if not content.is_embedded and any(text and text.strip() for page_number, text in batch if page_number in copied):
+            await _set_content_status(db, content, is_embedded=True)
+        
+        await db.execute(
+            update(Page)
+            .where(Page.content_id == content.id, Page.page_number.in_(copied))
+            .values(is_embedded=True)
+        )
+        await db.commit()
+    
+    return [(page_number, text) for page_number, text in batch if page_number not in copied]
+
+
+async def _embed_or_copy_page_batch(
+    db: AsyncSession,
+    content: DocumentContent,
+    batch: List[Tuple[int, str]],
+    source_content_id: Optional[str] = None,
+    chunks: Optional[List[Chunk]] = None
+) -> int:
+    """
+    Embed one batch of stored pages, copying unchanged pages from the previous version
+    
+    Args:
+        chunks: Chunks of the batch (_chunk_batch), if the caller has them already
+    
+    Returns:
+        Number of pages whose embeddings were copied
+    """
+    if chunks is None:
+        chunks = await asyncio.to_thread(_chunk_batch, batch)
+    
+    progress = get_progress_broker()
+    progress.publish(content.id, stage="embedding")
+    progress.advance(content.id, chunks_total=len(chunks))
+    
+    remaining = batch
+    if source_content_id:
+        remaining = await _copy_unchanged_pages(db, content, batch, source_content_id)
+    
+    if remaining:
+        remaining_pages = {page_number for page_number, _ in remaining}
+        await _embed_page_batch(
+            db, content, remaining, [chunk for chunk in chunks if chunk.page_number in remaining_pages]
+        )
+    
+    try:
+        await _ensure_content_exists(db, content)
+    except JobCancelled:
+        # The delete may have dropped the partition before these vectors were written
+        await get_vector_service().delete_document(content.id)
+        raise
+    
+    progress.advance(content.id, chunks_embedded=len(chunks))
+    return len(batch) - len(remaining)
+
+
+async def _store_page_batch(
+    db: AsyncSession,
+    content: DocumentContent,
+    batch: List[Tuple[int, str]],
+    source_content_id: Optional[str] = None
+) -> int:
+    """
+    Store one batch of extracted pages, then embed them
+    
+    Pages are written with bulk Core inserts, so no ORM objects pile up
+    in the session and memory use stays bounded by the batch size. They
+    are added to the keyword index in the same transaction; the commit is
+    the "extracted" checkpoint for these pages.
+    
+    Returns:
+        Number of pages whose embeddings were copied from the previous version
+    """
+    chunks = await asyncio.to_thread(_chunk_batch, batch)
+    
+    await bulk_insert_pages(db, content.id, batch)
+    await lexical_service.index_chunks(db, content.id, chunks)
+    await _ensure_content_exists(db, content)
+    await db.commit()
+    get_progress_broker().advance(content.id, pages_extracted=len(batch))
+    return await _embed_or_copy_page_batch(db, content, batch, source_content_id, chunks)
+
+
+async def process_document(
+    db: AsyncSession,
+    content: DocumentContent,
+    source_content_id: Optional[str] = None
+):
+    """
+    Run the ingestion pipeline for shared document content: extract text,
+    store pages and create embeddings
+    
+    Pages stream through extraction, database insert and embedding in
+    batches of INGESTION_BATCH_SIZE, so memory use does not depend on the
+    document's page count.
+    
+    Resumable - every page is checkpointed once stored and again once
+    embedded. A re-run only embeds pages that were stored but not embedded
+    and only extracts pages that are missing.
+    Raises an exception if a step fails so the job can be retried.
+    
+    Args:
+        db: Database session
+        content: Content to process
+        source_content_id: Previous version of a replaced file - pages with
+            unchanged text get its embeddings instead of being embedded again
+    """
+    # Remote storage downloads the file for the parser, local storage does not
+    async with get_storage().open_local(content.file_path) as pdf_path:
+        with PdfSandbox() as sandbox:
+            await _process_in_sandbox(db, content, str(pdf_path), sandbox, source_content_id)
+
+
+async def _process_in_sandbox(
+    db: AsyncSession,
+    content: DocumentContent,
+    pdf_path: str,
+    sandbox: PdfSandbox,
+    source_content_id: Optional[str] = None
+):
+    """Pipeline body of process_document - all parsing runs in the given sandbox"""
+    total_pages = await count_pdf_pages(pdf_path, sandbox)
+    await _set_content_status(db, content, processing_status="processing", total_pages=total_pages)
+    await db.commit()
+    
+    if not total_pages:
+        raise PdfParseError("The PDF has no pages")
+    
+    if total_pages > settings.PDF_MAX_PAGES:
+        raise PdfParseError(f"The PDF has {total_pages} pages - the limit is {settings.PDF_MAX_PAGES}")
+    
+    batch_size = max(settings.INGESTION_BATCH_SIZE, 1)
+    reused = 0
+    
+    # Checkpoints left by an earlier, interrupted attempt
+    result = await db.execute(
+        select(Page.page_number, Page.is_embedded).where(Page.content_id == content.id)
+    )
+    checkpoints = dict(result.all())
+    
+    get_progress_broker().publish(
+        content.id,
+        stage="extracting",
+        total_pages=total_pages,
+        pages_extracted=len(checkpoints),
+        chunks_embedded=0,
+        chunks_total=0
+    )
+    
+    if checkpoints:
+        print(f"🔁 Resuming content {content.id}: {len(checkpoints)} of {total_pages} pages already stored")
+    
+    # 1. Embed pages that were stored but not embedded yet
+    not_embedded = sorted(number for number, embedded in checkpoints.items() if not embedded)
+    for start in range(0, len(not_embedded), batch_size):
+        result = await db.execute(
+            select(Page.page_number, Page.content)
+            .where(
+                Page.content_id == content.id,
+                Page.page_number.in_(not_embedded[start:start + batch_size])
+            )
+            .order_by(Page.page_number)
+        )
+        reused += await _embed_or_copy_page_batch(
+            db, content, [tuple(row) for row in result.all()], source_content_id
+        )
+    
+    # 2. Extract, store and embed the missing pages
+    missing = [number for number in range(1, total_pages + 1) if number not in checkpoints]
+    batch = []
+    normalizer = None
+    
+    if missing and settings.TEXT_NORMALIZATION:
+        normalizer = TextNormalizer(await detect_boilerplate(pdf_path, total_pages, sandbox))
+    
+    if missing:
+        async for page_batch in iter_pdf_pages(pdf_path, sandbox, page_numbers=missing):
+            if normalizer:
+                # CPU-bound regex work - keep it off the event loop
+                page_batch = await asyncio.to_thread(normalizer.normalize_batch, page_batch)
+            batch.extend(page_batch)
+            while len(batch) >= batch_size:
+                reused += await _store_page_batch(db, content, batch[:batch_size], source_content_id)
+                batch = batch[batch_size:]
+    
+    if batch:
+        reused += await _store_page_batch(db, content, batch, source_content_id)
+    
+    if normalizer:
+        print(f"🧹 Normalized content {content.id}: {normalizer.summary()}")
+    
+    if source_content_id:
+        print(f"♻️ Content {content.id}: reused embeddings of {reused} unchanged page(s), embedded {total_pages - reused}")
+    
+    if not content.is_embedded:
+        print(f"⚠️ Content {content.id} has no text to vectorize")
+    
+    word_count = await db.scalar(
+        select(func.sum(Page.word_count)).where(Page.content_id == content.id)
+    )
+    await _set_content_status(db, content, is_processed=True, processing_status="ready", word_count=word_count or 0)
+    await db.commit()
+
+
+async def recover_ingestion(db: AsyncSession) -> int:
+    """
+    Put interrupted ingestion back on the queue
+    
+    - Running jobs whose worker was on this host and no longer exists
+      (e.g. killed during a deploy) are released at once, without waiting
+      for the lease to expire and without counting the lost attempt.
+    - Content that is not ready or failed but has no active job gets a
+      new one.
+    
+    The pipeline resumes from its page checkpoints in both cases.
+    
+    Returns:
+        Number of jobs released or created
+    """
+    recovered = 0
+    host_prefix = f"{socket.gethostname()}:"
+    
+    result = await db.execute(
+        select(IngestionJob).where(
+            IngestionJob.status == "running",
+            IngestionJob.lease_owner.startswith(host_prefix)
+        )
+    )
+    for job in result.scalars().all():
+        if _worker_alive(job.lease_owner):
+            continue
+        job.status = "pending"
+        job.lease_owner = None
+        job.lease_expires_at = None
+        job.run_after = datetime.utcnow()
+        job.attempts = max(job.attempts - 1, 0)
+        recovered += 1
+    
+    active_jobs = select(IngestionJob.content_id).where(IngestionJob.status.in_(["pending", "running"]))
+    result = await db.execute(
+        select(DocumentContent).where(
+            DocumentContent.processing_status.in_(["queued", "processing"]),
+            DocumentContent.id.not_in(active_jobs)
+        )
+    )
+    for content in result.scalars().all():
+        # Another process may be recovering the same content right now
+        if await enqueue_if_idle(db, content):
+            recovered += 1
+    
+    await db.commit()
+    
+    if recovered:
+        print(f"🔁 Recovered {recovered} interrupted ingestion job(s)")
+    
+    return recovered
+
+
+async def _release_source(db: AsyncSession, job: IngestionJob):
+    """Drop the job's reference to the previous version of a replaced file"""
+    if job.source_content_id:
+        source_content_id = job.source_content_id
+        job.source_content_id = None
+        await release_content(db, source_content_id)
+
+
+def _worker_alive(worker_id: str) -> bool:
+    """Check if a worker on this host (host:pid:suffix) is still running"""
+    try:
+        pid = int(worker_id.split(":")[1])
+    except (IndexError, ValueError):
+        return True
+    
+    # Same PID as us means a previous run of this process (e.g. PID 1 in a container)
+    if pid == os.getpid():
+        return False
+    
+    # os.kill(pid, 0) would terminate the process on Windows
+    if os.name == "nt":
+        return True
+    
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    
+    return True
+
+
+async def run_job(job: IngestionJob, worker_id: str):
+    """
+    Process a claimed job and record the outcome
+    
+    Failed jobs go back to the queue with exponential backoff until
+    max_attempts is reached, then the document is marked failed. PDFs that
+    hit a parser limit fail at once - retrying would hit it again. If
+    the content is deleted or the lease lost meanwhile, the job stops and
+    records nothing.
+    """
+    heartbeat = asyncio.create_task(_renew_lease(job.id, worker_id))
+    
+    try:
+        async with AsyncSessionLocal() as db:
+            content = await db.get(DocumentContent, job.content_id)
+            error = None
+            permanent = False
+            
+            if content is None:
+                error = "Content no longer exists"
+            else:
+                try:
+                    await _run_while_leased(process_document(db, content, job.source_content_id), heartbeat)
+                except JobCancelled as e:
+                    await db.rollback()
+                    print(f"🛑 Ingestion job {job.id} stopped: {e}")
+                    return
+                except PdfParseError as e:
+                    await db.rollback()
+                    error = str(e)
+                    permanent = True
+                    print(f"❌ Ingestion job {job.id} rejected the PDF: {error}")
+                except Exception as e:
+                    await db.rollback()
+                    error = str(e) or e.__class__.__name__
+                    print(f"❌ Ingestion job {job.id} failed (attempt {job.attempts}/{job.max_attempts}): {error}")
+            
+            job = await db.get(IngestionJob, job.id, populate_existing=True)
+            if job is None:
+                # Job was removed together with its content
+                return
+            
+            job.lease_owner = None
+            job.lease_expires_at = None
+            
+            if error is None:
+                job.status = "succeeded"
+                job.last_error = None
+                print(f"✅ Content {job.content_id} processed and vectorized successfully")
+            elif content is not None and not permanent and job.attempts < job.max_attempts:
+                backoff = settings.INGESTION_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+                job.status = "pending"
+                job.last_error = error
+                job.run_after = datetime.utcnow() + timedelta(seconds=backoff)
+                await _set_content_status(db, content, processing_status="queued")
+            else:
+                job.status = "failed"
+                job.last_error = error
+                if content is not None:
+                    await _set_content_status(db, content, processing_status="failed", processing_error=error)
+            
+            if job.status in ("succeeded", "failed"):
+                await _release_source(db, job)
+            
+            await db.commit()
+            
+            stage = {"succeeded": "ready", "pending": "saved"}.get(job.status, "failed")
+            get_progress_broker().publish(job.content_id, stage=stage, error=job.last_error)
+    finally:
+        heartbeat.cancel()
+
+
+async def run_worker(worker_id: Optional[str] = None, stop_event: Optional[asyncio.Event] = None):
+    """
+    Worker loop - claim and run jobs until stop_event is set
+    
+    Args:
+        worker_id: Unique worker name (generated if omitted)
+        stop_event: Set this event to stop the worker after its current job
+    """
+    worker_id = worker_id or make_worker_id()
+    stop_event = stop_event or asyncio.Event()
+    print(f"👷 Ingestion worker {worker_id} started")
+    
+    while not stop_event.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                await fail_exhausted_jobs(db)
+                job = await claim_next_job(db, worker_id)
+            
+            if job is not None:
+                await run_job(job, worker_id)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Ingestion worker {worker_id} error: {e}")
+        
+        # Queue empty (or error) - wait before polling again
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=settings.INGESTION_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+    
+    print(f"👋 Ingestion worker {worker_id} stopped")
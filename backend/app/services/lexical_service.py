@@ -0,0 +1,273 @@
+"""
+Lexical Service
+BM25 keyword search over page chunks using SQLite FTS5
+
+Embedding search misses exact terms students type - theorem names,
+formulas, course codes. Pages are indexed in the same token-sized chunks
+(and under the same chunk IDs) as the vector store, so both rankings can be
+fused chunk by chunk. Rows are written with the pages (by the ingestion
+pipeline) and removed with them (release_content), inside the same
+transaction.
+
+The FTS5 table is contentless - it holds the token index only, not a
+second copy of the page text. Chunk positions are kept in page_chunks
+(whose IDs are the FTS5 rowids), and chunk text is sliced from the stored
+pages when it is needed: for search results, and for FTS5 deletes, which
+must be given the indexed values.
+"""
+
+import asyncio
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+from app.models.document import Page, PageChunk
+from app.services.chunking_service import Chunk, chunk_page
+from app.services.vector_service import make_chunk_id
+
+FTS_TABLE = "page_chunks_fts"
+
+# Query terms used per search - long messages would only add noise
+MAX_QUERY_TERMS = 32
+
+# Both columns are tokenized; content_id is matched to scope searches.
+# The rowid is PageChunk.id.
+CREATE_FTS_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    text,
+    content_id,
+    content = '',
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+async def create_fts_table(conn: AsyncConnection):
+    """Create the FTS5 index if it does not exist (part of init_db)"""
+    await conn.exec_driver_sql(CREATE_FTS_TABLE)
+
+
+def _content_filter(content_ids: List[str]) -> str:
+    """FTS5 expression matching rows of any of the contents"""
+    return "content_id : (" + " OR ".join(f'"{content_id}"' for content_id in content_ids) + ")"
+
+
+def build_match_query(query: str) -> str:
+    """
+    FTS5 query for free text - every word becomes a quoted term, OR-ed together
+    
+    Quoting keeps user input from being parsed as FTS5 syntax; BM25 ranks
+    chunks containing more (and rarer) terms first.
+    
+    Returns:
+        The query, or an empty string if the text has no words
+    """
+    terms = list(dict.fromkeys(word.lower() for word in WORD_PATTERN.findall(query)))[:MAX_QUERY_TERMS]
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+async def _page_batches(
+    db: AsyncSession,
+    content_id: str,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[List[Tuple[int, str]]]:
+    """Stored (page_number, text) of a content, a batch at a time in page order"""
+    batch_size = max(batch_size or settings.INGESTION_BATCH_SIZE, 1)
+    last_page = 0
+    while True:
+        # Keyset pagination keeps memory bounded for large documents
+        result = await db.execute(
+            select(Page.page_number, Page.content)
+            .where(Page.content_id == content_id, Page.page_number > last_page)
+            .order_by(Page.page_number)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return
+        yield rows
+        last_page = rows[-1][0]
+
+
+def _chunk(pages: List[Tuple[int, str]]) -> List[Chunk]:
+    return [
+        chunk
+        for page_number, page_text in pages
+        for chunk in chunk_page(page_number, page_text or "")
+    ]
+
+
+async def index_pages(db: AsyncSession, content_id: str, pages: List[Tuple[int, str]]) -> int:
+    """
+    Add the chunks of pages to the index (the caller commits)
+    
+    Pages are chunked in a thread - the tokenizer regex is CPU-bound.
+    
+    Args:
+        pages: (page_number, text) tuples, as stored in pages.content
+    
+    Returns:
+        Number of indexed chunks
+    """
+    return await index_chunks(db, content_id, await asyncio.to_thread(_chunk, pages))
+
+
+async def index_chunks(db: AsyncSession, content_id: str, chunks: List[Chunk]) -> int:
+    """
+    Add already chunked pages to the index (the caller commits)
+    
+    Three statements per call, however many chunks: page_chunks rows are
+    inserted with one executemany, their IDs read back with one query and
+    used as the FTS5 rowids of a second executemany. (RETURNING would
+    fetch the IDs one row at a time.)
+    
+    Returns:
+        Number of indexed chunks
+    """
+    if not chunks:
+        return 0
+    
+    await db.execute(
+        insert(PageChunk.__table__),
+        [
+            {
+                "content_id": content_id,
+                "chunk_id": make_chunk_id(content_id, chunk),
+                "page_number": chunk.page_number,
+                "chunk_index": chunk.chunk_index,
+                "start_char": chunk.start_char,
+                "end_char": chunk.end_char
+            }
+            for chunk in chunks
+        ]
+    )
+    result = await db.execute(
+        select(PageChunk.id, PageChunk.page_number, PageChunk.chunk_index).where(
+            PageChunk.content_id == content_id,
+            PageChunk.page_number.in_({chunk.page_number for chunk in chunks})
+        )
+    )
+    rowids = {(page_number, chunk_index): rowid for rowid, page_number, chunk_index in result.all()}
+    await db.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, text, content_id) VALUES (:rowid, :text, :content_id)"),
+        [
+            {"rowid": rowids[chunk.page_number, chunk.chunk_index], "text": chunk.text, "content_id": content_id}
+            for chunk in chunks
+        ]
+    )
+    return len(chunks)
+
+
+async def delete_content(db: AsyncSession, content_id: str, batch_size: Optional[int] = None):
+    """
+    Remove every indexed chunk of a content (the caller commits)
+    
+    Call it before the content's pages are deleted - a contentless FTS5
+    table can only drop a row when given the text it indexed.
+    """
+    async for pages in _page_batches(db, content_id, batch_size):
+        texts = dict(pages)
+        result = await db.execute(
+            select(PageChunk.id, PageChunk.page_number, PageChunk.start_char, PageChunk.end_char).where(
+                PageChunk.content_id == content_id,
+                PageChunk.page_number.in_(texts)
+            )
+        )
+        rows = [
+            {"rowid": rowid, "text": (texts[page_number] or "")[start_char:end_char], "content_id": content_id}
+            for rowid, page_number, start_char, end_char in result.all()
+        ]
+        if rows:
+            await db.execute(
+                text(
+                    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, text, content_id) "
+                    "VALUES ('delete', :rowid, :text, :content_id)"
+                ),
+                rows
+            )
+    
+    await db.execute(delete(PageChunk).where(PageChunk.content_id == content_id))
+
+
+async def reindex_content(db: AsyncSession, content_id: str, batch_size: Optional[int] = None) -> int:
+    """
+    Rebuild the index rows of a content from its stored pages (the caller commits)
+    
+    Returns:
+        Number of indexed chunks
+    """
+    await delete_content(db, content_id, batch_size)
+    
+    indexed = 0
+    async for pages in _page_batches(db, content_id, batch_size):
+        indexed += await index_pages(db, content_id, pages)
+    return indexed
+
+
+async def is_indexed(db: AsyncSession, content_id: str) -> bool:
+    """Whether a content has any indexed chunk"""
+    result = await db.execute(
+        select(PageChunk.id).where(PageChunk.content_id == content_id).limit(1)
+    )
+    return result.first() is not None
+
+
+async def search(db: AsyncSession, query: str, content_ids: List[str], n_results: int = 5) -> List[Dict]:
+    """
+    BM25 search for chunks of the given contents
+    
+    Args:
+        query: Free text, as typed by the user
+        content_ids: Content IDs to search within - get them from
+            content_service.get_content_ids so ownership is checked
+        n_results: Number of results to return
+    
+    Returns:
+        Chunks in the result shape of VectorService.search, best first,
+        with a 'bm25' score (lower is better) instead of a distance
+    """
+    terms = build_match_query(query)
+    if not terms or not content_ids:
+        return []
+    
+    result = await db.execute(
+        text(
+            f"SELECT c.chunk_id, c.content_id, c.page_number, c.chunk_index, c.start_char, c.end_char, "
+            f"bm25({FTS_TABLE}, 1.0, 0.0) AS score "
+            f"FROM {FTS_TABLE} JOIN page_chunks AS c ON c.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match ORDER BY score LIMIT :limit"
+        ),
+        {"match": f"text : ({terms}) AND {_content_filter(list(dict.fromkeys(content_ids)))}", "limit": n_results}
+    )
+    rows = result.all()
+    if not rows:
+        return []
+    
+    # Chunk text comes from the pages the chunks were cut from
+    pages = {(content_id, page_number) for _, content_id, page_number, *_ in rows}
+    result = await db.execute(
+        select(Page.content_id, Page.page_number, Page.content)
+        .where(tuple_(Page.content_id, Page.page_number).in_(list(pages)))
+    )
+    texts = {(content_id, page_number): page_text or "" for content_id, page_number, page_text in result.all()}
+    
+    return [
+        {
+            "id": chunk_id,
+            "content": texts.get((content_id, page_number), "")[start_char:end_char],
+            "metadata": {
+                "content_id": content_id,
+                "page_number": page_number,
+                "chunk_index": chunk_index,
+                "start_char": start_char,
+                "end_char": end_char
+            },
+            "bm25": score
+        }
+        for chunk_id, content_id, page_number, chunk_index, start_char, end_char, score in rows
+    ]
@@ -4,62 +4,588 @@ Handles PDF upload, text extraction, and file management
 """
 
 import PyPDF2
+import asyncio
+import hashlib
+import math
+import multiprocessing
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List
-import shutil
+from typing import AsyncIterator, Iterable, List, NamedTuple, Optional, Set, Tuple
 import uuid
 from fastapi import UploadFile
 
+from app.core.config import settings
+from app.services.chunking_service import count_tokens
 
-async def extract_pdf_text(pdf_path: str) -> List[str]:
+try:
+    import resource
+except ImportError:  # Windows - no address-space limits
+    resource = None
+
+
+# Shared process pool for text extraction (created on first use)
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _mp_context():
     """
-    Extract text from PDF file
+    Start method for parser processes - forkserver (spawn where it is missing)
+    
+    Forking this process would copy locks held by its other threads
+    (vector store executor, ONNX runtime) mid-acquire and could deadlock
+    the child. The fork server imports this module once, so new workers
+    start without re-importing the parser.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def _limit_address_space(limit_mb: int):
+    """
+    Cap the address space of a parser process (pool initializer)
+    
+    The limit is added to the size the process already has (interpreter
+    and imported modules). Allocations beyond it raise MemoryError inside
+    the worker instead of exhausting the host.
+    """
+    if resource is None or limit_mb <= 0:
+        return
+    
+    try:
+        with open("/proc/self/statm") as statm:
+            current = int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        current = 0
+    
+    limit = current + limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get or create the process pool used for PDF text extraction"""
+    global _process_pool
+    if _process_pool is None:
+        workers = settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+        _process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=_mp_context(),
+            initializer=_limit_address_space,
+            initargs=(settings.PDF_PARSE_MEMORY_LIMIT_MB,)
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the extraction process pool (call on shutdown)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def reset_process_pool(pool: ProcessPoolExecutor):
+    """
+    Drop the shared pool after one of its workers died
+    
+    A ProcessPoolExecutor is unusable once a worker is killed (OOM killer,
+    crash in a native library). Only the pool that broke is replaced, so
+    concurrent callers that hit the same failure don't discard a new one.
+    """
+    global _process_pool
+    if _process_pool is pool:
+        shutdown_process_pool()
+
+
+async def run_in_process_pool(func, *args):
+    """Run a function on the shared pool, retrying once on a fresh pool if it broke"""
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        print("⚠️ Process pool broke, restarting it")
+        reset_process_pool(pool)
+        return await loop.run_in_executor(get_process_pool(), func, *args)
+
+
+class PdfParseError(Exception):
+    """A PDF could not be parsed within the sandbox limits (the message is shown to the user)"""
+
+
+class PdfSandbox(ProcessPoolExecutor):
+    """
+    Isolated parser processes for one document
+    
+    Workers run with an address-space limit, and the document gets a
+    wall-clock budget for the time spent waiting on the parser. When a
+    limit is hit the workers are killed and PdfParseError is raised - a
+    malformed PDF never blocks the API process or other documents.
+    
+    Example:
+        with PdfSandbox() as sandbox:
+            total_pages = await count_pdf_pages(path, sandbox)
+    """
+    
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None
+    ):
+        self.timeout = settings.PDF_PARSE_TIMEOUT_SECONDS if timeout is None else timeout
+        self.memory_limit_mb = settings.PDF_PARSE_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.remaining = self.timeout
+        super().__init__(
+            max_workers=max_workers or settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1,
+            mp_context=_mp_context(),
+            initializer=_limit_address_space,
+            initargs=(self.memory_limit_mb,)
+        )
+    
+    async def wait(self, future: asyncio.Future):
+        """Wait for a parser task, charging the wait against the document's time budget"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        
+        try:
+            return await asyncio.wait_for(future, timeout=max(self.remaining, 0))
+        except asyncio.TimeoutError:
+            self.kill()
+            raise PdfParseError(f"Parsing the PDF took longer than {self.timeout:g} seconds")
+        except MemoryError:
+            self.kill()
+            raise PdfParseError(f"Parsing the PDF needed more than {self.memory_limit_mb} MB of memory")
+        except BrokenProcessPool:
+            self.kill()
+            raise PdfParseError("The PDF parser crashed (the file may be malformed)")
+        finally:
+            self.remaining -= loop.time() - started
+    
+    def kill(self):
+        """Kill the worker processes, even if they are still busy"""
+        processes = list((self._processes or {}).values())
+        self.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+        for process in processes:
+            process.join(timeout=1)
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Never wait for a worker that may be stuck on a bad page
+        self.kill()
+        return False
+
+
+async def _wait_parse(executor: Executor, future: asyncio.Future):
+    """Await a parser task, applying the sandbox limits if the executor has them"""
+    if isinstance(executor, PdfSandbox):
+        return await executor.wait(future)
+    return await future
+
+
+def _count_pages(pdf_path: str) -> int:
+    """Count the pages of a PDF (runs in a worker process)"""
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """
+    Extract text from pages [start, end) of a PDF (runs in a worker process)
+    
+    Each worker opens the file itself, so only the page text travels
+    back to the parent process.
+    """
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[page_num].extract_text() for page_num in range(start, end)]
+
+
+def _extract_pages(pdf_path: str, page_indexes: List[int]) -> List[str]:
+    """Extract text from scattered pages (0-based) of a PDF (runs in a worker process)"""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[page_num].extract_text() for page_num in page_indexes]
+
+
+def split_page_ranges(total_pages: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """
+    Split a page count into consecutive [start, end) ranges
+    
+    Example:
+        split_page_ranges(60, 25) -> [(0, 25), (25, 50), (50, 60)]
+    """
+    pages_per_task = max(pages_per_task, 1)
+    return [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+
+
+def group_page_ranges(page_numbers: Iterable[int], pages_per_task: int) -> List[Tuple[int, int]]:
+    """
+    Turn page numbers (starting at 1) into [start, end) ranges of
+    consecutive pages, each at most pages_per_task long
+    
+    Example:
+        group_page_ranges([1, 2, 3, 7, 8], 2) -> [(0, 2), (2, 3), (6, 8)]
+    """
+    pages_per_task = max(pages_per_task, 1)
+    ranges = []
+    
+    for page_number in sorted(set(page_numbers)):
+        index = page_number - 1
+        if ranges and ranges[-1][1] == index and ranges[-1][1] - ranges[-1][0] < pages_per_task:
+            ranges[-1] = (ranges[-1][0], index + 1)
+        else:
+            ranges.append((index, index + 1))
+    
+    return ranges
+
+
+async def count_pdf_pages(pdf_path: str, executor: Optional[Executor] = None) -> int:
+    """Count the pages of a PDF without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    if executor is None:
+        return await run_in_process_pool(_count_pages, pdf_path)
+    return await _wait_parse(executor, loop.run_in_executor(executor, _count_pages, pdf_path))
+
+
+async def iter_pdf_pages(
+    pdf_path: str,
+    executor: Optional[Executor] = None,
+    total_pages: Optional[int] = None,
+    page_numbers: Optional[Iterable[int]] = None
+) -> AsyncIterator[List[Tuple[int, str]]]:
+    """
+    Stream the text of a PDF in page order, one page range at a time
+    
+    Only a bounded number of ranges (one per pool worker) are extracted
+    ahead of the consumer, so memory use does not grow with the page count.
     
     Args:
         pdf_path: Path to the PDF file
+        executor: Pool to run on (defaults to the shared extraction pool)
+        total_pages: Page count if already known
+        page_numbers: Only extract these pages (e.g. when resuming)
     
-    Returns:
-        List of strings, one per page
+    Yields:
+        Lists of (page_number, text) tuples, page numbers starting at 1
     """
-    pages_text = []
+    loop = asyncio.get_running_loop()
+    pool = executor or get_process_pool()
+    
+    if page_numbers is not None:
+        ranges = deque(group_page_ranges(page_numbers, settings.PDF_EXTRACT_PAGES_PER_TASK))
+    else:
+        if total_pages is None:
+            total_pages = await count_pdf_pages(pdf_path, pool)
+        ranges = deque(split_page_ranges(total_pages, settings.PDF_EXTRACT_PAGES_PER_TASK))
+    max_in_flight = getattr(pool, "_max_workers", None) or 1
+    in_flight = deque()
     
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
+        while ranges or in_flight:
+            # Keep every worker busy, but never run further ahead than that
+            while ranges and len(in_flight) < max_in_flight:
+                start, end = ranges.popleft()
+                future = loop.run_in_executor(pool, _extract_page_range, pdf_path, start, end)
+                in_flight.append((start, future))
             
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text()
-                pages_text.append(text)
+            start, future = in_flight.popleft()
+            range_text = await _wait_parse(pool, future)
+            yield [(start + offset + 1, text) for offset, text in enumerate(range_text)]
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+async def extract_pdf_text(pdf_path: str, executor: Optional[Executor] = None) -> List[str]:
+    """
+    Extract text from PDF file
+    
+    Pages are split into ranges and extracted in parallel on a process pool,
+    so large PDFs use every core and the event loop is never blocked.
+    Prefer iter_pdf_pages for large documents - this loads every page.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        executor: Pool to run on (defaults to the shared extraction pool)
+    
+    Returns:
+        List of strings, one per page (in page order)
+    """
+    pool = executor or get_process_pool()
+    try:
+        pages_text = []
+        async for page_batch in iter_pdf_pages(pdf_path, pool):
+            pages_text.extend(text for _, text in page_batch)
         
         return pages_text
-        
+    
+    except BrokenProcessPool:
+        if executor is not None:
+            print("Error extracting PDF text: parser process died")
+            return []
+        # The shared pool broke - start again once on a fresh one
+        print("⚠️ Process pool broke, restarting it")
+        reset_process_pool(pool)
+        return await extract_pdf_text(pdf_path, get_process_pool())
+    
     except Exception as e:
         print(f"Error extracting PDF text: {e}")
         return []
 
 
-async def save_uploaded_file(file: UploadFile, save_path: Path) -> str:
+DIGITS_PATTERN = re.compile(r"\d+")
+HYPHEN_BREAK_PATTERN = re.compile(r"(\w)-[ \t]*\n[ \t]*([a-z])")
+INLINE_SPACE_PATTERN = re.compile(r"[^\S\n]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+
+def _line_signature(line: str) -> str:
+    """
+    Key used to compare lines across pages - case, spacing and numbers
+    are ignored, so "Page 3 of 40" and "Page 4 of 40" match
+    """
+    return DIGITS_PATTERN.sub("#", " ".join(line.split()).lower())
+
+
+def _edge_line_indexes(lines: List[str], edge_lines: int) -> Set[int]:
+    """
+    Indexes of the first and last edge_lines non-blank lines (at most a
+    third of the page each, so short pages keep their body text)
+    """
+    non_blank = [index for index, line in enumerate(lines) if line.strip()]
+    edge_lines = min(edge_lines, len(non_blank) // 3)
+    if edge_lines <= 0:
+        return set()
+    return set(non_blank[:edge_lines] + non_blank[-edge_lines:])
+
+
+def find_boilerplate_lines(
+    pages_text: List[str],
+    min_ratio: Optional[float] = None,
+    edge_lines: Optional[int] = None
+) -> Set[str]:
     """
-    Save an uploaded file to disk
+    Find running headers and footers (incl. page numbers) in sampled pages
+    
+    Args:
+        pages_text: Text of the sampled pages
+        min_ratio: Share of pages a line must appear on (defaults to BOILERPLATE_MIN_PAGE_RATIO)
+        edge_lines: Lines at the top/bottom of a page to look at (defaults to BOILERPLATE_EDGE_LINES)
+    
+    Returns:
+        Line signatures to strip from the top and bottom of every page
+    """
+    min_ratio = settings.BOILERPLATE_MIN_PAGE_RATIO if min_ratio is None else min_ratio
+    edge_lines = settings.BOILERPLATE_EDGE_LINES if edge_lines is None else edge_lines
+    
+    # Too few pages to tell boilerplate from content
+    if len(pages_text) < 3:
+        return set()
+    
+    counts = Counter()
+    for text in pages_text:
+        lines = (text or "").splitlines()
+        counts.update({_line_signature(lines[index]) for index in _edge_line_indexes(lines, edge_lines)})
+    
+    threshold = max(2, math.ceil(min_ratio * len(pages_text)))
+    return {signature for signature, count in counts.items() if count >= threshold}
+
+
+def normalize_text(text: str, boilerplate: Optional[Set[str]] = None, edge_lines: Optional[int] = None) -> str:
+    """
+    Clean up extracted page text
+    
+    Strips boilerplate lines at the top/bottom of the page, joins words
+    hyphenated across line breaks, collapses runs of spaces and blank lines.
+    
+    Example:
+        normalize_text("Intro-\nduction   to   graphs\n\n\n\n12") -> "Introduction to graphs\n\n12"
+    """
+    text = text or ""
+    edge_lines = settings.BOILERPLATE_EDGE_LINES if edge_lines is None else edge_lines
+    
+    if boilerplate:
+        lines = text.splitlines()
+        edges = _edge_line_indexes(lines, edge_lines)
+        text = "\n".join(
+            line for index, line in enumerate(lines)
+            if index not in edges or _line_signature(line) not in boilerplate
+        )
+    
+    text = HYPHEN_BREAK_PATTERN.sub(r"\1\2", text)
+    text = INLINE_SPACE_PATTERN.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    text = BLANK_LINES_PATTERN.sub("\n\n", text)
+    
+    return text.strip()
+
+
+async def detect_boilerplate(pdf_path: str, total_pages: int, executor: Optional[Executor] = None) -> Set[str]:
+    """
+    Find running headers and footers of a PDF from an evenly spaced page sample
+    
+    The sample only depends on the page count, so a resumed ingestion
+    strips exactly the same lines as the first attempt.
+    """
+    sample_size = min(total_pages, max(settings.BOILERPLATE_SAMPLE_PAGES, 0))
+    if sample_size < 3:
+        return set()
+    
+    step = total_pages / sample_size
+    page_indexes = sorted({int(i * step) for i in range(sample_size)})
+    
+    loop = asyncio.get_running_loop()
+    if executor is None:
+        sample = await run_in_process_pool(_extract_pages, pdf_path, page_indexes)
+    else:
+        sample = await _wait_parse(executor, loop.run_in_executor(executor, _extract_pages, pdf_path, page_indexes))
+    return find_boilerplate_lines(sample)
+
+
+class TextNormalizer:
+    """Normalizes the pages of one document and counts what was removed"""
+    
+    def __init__(self, boilerplate: Optional[Set[str]] = None):
+        self.boilerplate = boilerplate or set()
+        self.pages = 0
+        self.chars_before = 0
+        self.chars_after = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+    
+    def normalize_batch(self, batch: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """Normalize (page_number, text) tuples"""
+        normalized = []
+        for page_number, text in batch:
+            clean_text = normalize_text(text, self.boilerplate)
+            self.pages += 1
+            self.chars_before += len(text or "")
+            self.chars_after += len(clean_text)
+            self.tokens_before += count_tokens(text)
+            self.tokens_after += count_tokens(clean_text)
+            normalized.append((page_number, clean_text))
+        return normalized
+    
+    @property
+    def chars_saved(self) -> int:
+        return self.chars_before - self.chars_after
+    
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+    
+    def summary(self) -> str:
+        """Human readable savings report"""
+        percent = 100 * self.chars_saved / self.chars_before if self.chars_before else 0
+        return (
+            f"saved {self.chars_saved} chars ({percent:.1f}%) and {self.tokens_saved} tokens "
+            f"on {self.pages} pages, {len(self.boilerplate)} boilerplate line(s) stripped"
+        )
+
+
+class UploadRejectedError(Exception):
+    """Raised when an upload fails validation while it is being saved"""
+    
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class SavedUpload(NamedTuple):
+    """Result of saving an upload to disk"""
+    path: str
+    size: int
+    sha256: str
+
+
+PDF_MAGIC = b"%PDF"
+
+
+async def save_uploaded_file(
+    file: UploadFile,
+    save_path: Path,
+    max_size: Optional[int] = None,
+    require_pdf: bool = True
+) -> SavedUpload:
+    """
+    Stream an uploaded file to disk chunk by chunk
+    
+    The SHA-256 is computed in the same pass. File reads and writes run
+    in a thread so the event loop is never blocked. The file is written
+    under a temporary name and renamed once complete, so a rejected upload
+    never leaves a partial file behind.
     
     Args:
         file: The uploaded file from FastAPI
         save_path: Directory to save the file
+        max_size: Size cap in bytes (defaults to MAX_UPLOAD_SIZE_MB)
+        require_pdf: Reject files without the %PDF magic bytes
     
     Returns:
-        Path to the saved file
+        SavedUpload with path, size and sha256
+    
+    Raises:
+        UploadRejectedError: If the file is too large or not a PDF
     """
+    max_size = max_size or settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    too_large = UploadRejectedError(413, f"File is larger than {max_size / (1024 * 1024):g} MB")
+    
+    # Reject early when the size is already known
+    if file.size is not None and file.size > max_size:
+        raise too_large
+    
     # Create unique filename
     file_extension = Path(file.filename).suffix
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     file_path = save_path / unique_filename
+    temp_path = save_path / f".{unique_filename}.part"
+    
+    sha256 = hashlib.sha256()
+    size = 0
+    buffer = await asyncio.to_thread(open, temp_path, "wb")
+    
+    try:
+        while True:
+            chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            
+            # PDF readers accept the header anywhere in the first 1 KB
+            if size == 0 and require_pdf and PDF_MAGIC not in chunk[:1024]:
+                raise UploadRejectedError(400, "File is not a valid PDF")
+            
+            size += len(chunk)
+            if size > max_size:
+                raise too_large
+            
+            sha256.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+        
+        if size == 0:
+            raise UploadRejectedError(400, "File is empty")
+        
+        await asyncio.to_thread(buffer.close)
+        await asyncio.to_thread(os.replace, temp_path, file_path)
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        temp_path.unlink(missing_ok=True)
+        raise
     
-    return str(file_path)
+    return SavedUpload(path=str(file_path), size=size, sha256=sha256.hexdigest())
 
 
 def delete_file(file_path: str) -> bool:
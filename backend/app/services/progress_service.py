@@ -0,0 +1,172 @@
+"""
+Progress Service
+Pub/sub for live ingestion progress (streamed to clients as SSE)
+
+Ingestion workers publish every stage and page/chunk counter here. The
+progress endpoint subscribes per content, so a job run by a worker in the
+same process is streamed without touching the database. For jobs run by
+other processes (standalone `python -m app.worker`, other API workers),
+every process with workers also stores the latest snapshot in
+ingestion_jobs.progress every PROGRESS_FLUSH_SECONDS, and the endpoint
+reads it from there.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+
+from sqlalchemy import bindparam, update
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.ingestion import IngestionJob
+
+# Stages: saved (queued for a worker), extracting, embedding, ready, failed
+TERMINAL_STAGES = ("ready", "failed")
+
+
+class ProgressBroker:
+    """
+    Fan-out of progress events, keyed by content ID
+    
+    Every event is a full snapshot (stage and counters), so a slow
+    subscriber can safely miss intermediate events.
+    """
+    
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._snapshots: Dict[str, Dict] = {}
+        self._unsaved: Set[str] = set()  # Content IDs with changes not stored yet
+    
+    def snapshot(self, content_id: str) -> Optional[Dict]:
+        """Latest progress of content being processed in this process (None if unknown)"""
+        snapshot = self._snapshots.get(content_id)
+        return dict(snapshot) if snapshot else None
+    
+    def publish(self, content_id: str, **values):
+        """
+        Set snapshot fields and notify subscribers
+        
+        Example:
+            broker.publish(content.id, stage="extracting", total_pages=120)
+        """
+        snapshot = self._snapshots.setdefault(content_id, {})
+        snapshot.update(values)
+        self._deliver(content_id, snapshot)
+    
+    def advance(self, content_id: str, **deltas: int):
+        """
+        Add to snapshot counters and notify subscribers
+        
+        Example:
+            broker.advance(content.id, pages_extracted=50)
+        """
+        snapshot = self._snapshots.setdefault(content_id, {})
+        for key, delta in deltas.items():
+            snapshot[key] = snapshot.get(key, 0) + delta
+        self._deliver(content_id, snapshot)
+    
+    def _deliver(self, content_id: str, snapshot: Dict):
+        event = dict(snapshot)
+        
+        # Finished content needs no snapshot - its state is in the database
+        if event.get("stage") in TERMINAL_STAGES:
+            self._snapshots.pop(content_id, None)
+            self._unsaved.discard(content_id)
+        else:
+            self._unsaved.add(content_id)
+        
+        for queue in self._subscribers.get(content_id, ()):
+            if queue.full():
+                # Drop the oldest snapshot - the new one supersedes it
+                queue.get_nowait()
+            queue.put_nowait(event)
+    
+    def take_unsaved(self) -> Dict[str, Dict]:
+        """Snapshots changed since the last call (content ID -> snapshot)"""
+        unsaved = {
+            content_id: dict(self._snapshots[content_id])
+            for content_id in self._unsaved
+            if content_id in self._snapshots
+        }
+        self._unsaved.clear()
+        return unsaved
+    
+    @contextmanager
+    def subscribe(self, content_id: str) -> Iterator[asyncio.Queue]:
+        """
+        Receive progress events for content while the block runs
+        
+        Example:
+            with broker.subscribe(content_id) as queue:
+                event = await queue.get()
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[content_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(content_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[content_id]
+
+
+async def save_progress(broker: "ProgressBroker") -> int:
+    """
+    Store changed snapshots on the running jobs of their contents
+    
+    Returns:
+        Number of snapshots stored
+    """
+    snapshots = broker.take_unsaved()
+    if not snapshots:
+        return 0
+    
+    table = IngestionJob.__table__
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(table)
+            .where(table.c.content_id == bindparam("target_id"), table.c.status == "running")
+            .values(progress=bindparam("snapshot")),
+            [
+                {"target_id": content_id, "snapshot": json.dumps(snapshot)}
+                for content_id, snapshot in snapshots.items()
+            ]
+        )
+        await db.commit()
+    return len(snapshots)
+
+
+async def run_progress_writer(stop_event: asyncio.Event):
+    """Store progress every PROGRESS_FLUSH_SECONDS until stop_event is set (run next to workers)"""
+    broker = get_progress_broker()
+    while not stop_event.is_set():
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=settings.PROGRESS_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await save_progress(broker)
+        except Exception as e:
+            print(f"⚠️ Could not store ingestion progress: {e}")
+
+
+def format_sse(data: Dict, event: str = "progress") -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Singleton instance
+_progress_broker = None
+
+def get_progress_broker() -> ProgressBroker:
+    """Get or create progress broker instance"""
+    global _progress_broker
+    if _progress_broker is None:
+        _progress_broker = ProgressBroker()
+    return _progress_broker
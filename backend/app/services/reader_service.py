@@ -0,0 +1,141 @@
+"""
+Reader Service
+Page text for text-mode reading, served through an in-memory LRU cache
+
+Pages are read in bounded windows with keyset access on the
+(content_id, page_number) index, and decoded (decompressed) pages are kept
+in a size-bounded LRU cache. Page text never changes for a content row, so
+the cache only has to forget content when it is deleted - a replaced
+document moves to new content.
+"""
+
+import sys
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.document import Page
+
+
+class PageCache:
+    """
+    LRU cache of decoded pages, bounded by the memory their text uses
+    
+    Only used from the event loop, so it needs no locking.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._pages: "OrderedDict[Tuple[str, int], Tuple[Dict, int]]" = OrderedDict()
+        self._content_pages: Dict[str, Set[int]] = defaultdict(set)
+    
+    def get(self, content_id: str, page_number: int) -> Optional[Dict]:
+        """Cached page, or None"""
+        entry = self._pages.get((content_id, page_number))
+        if entry is None:
+            return None
+        self._pages.move_to_end((content_id, page_number))
+        return entry[0]
+    
+    def put(self, content_id: str, page: Dict):
+        """
+        Cache a page and evict the least recently used ones over the limit
+        
+        Example:
+            cache.put(content_id, {"page_number": 3, "content": text, "word_count": 412})
+        """
+        key = (content_id, page["page_number"])
+        size = sys.getsizeof(page["content"])
+        if size > self.max_bytes:
+            return
+        
+        self._remove(key)
+        self._pages[key] = (page, size)
+        self._content_pages[content_id].add(page["page_number"])
+        self.size += size
+        
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._pages))
+            self._remove(oldest)
+    
+    def invalidate(self, content_id: str) -> int:
+        """
+        Forget every cached page of the content
+        
+        Returns:
+            Number of pages dropped
+        """
+        page_numbers = self._content_pages.pop(content_id, set())
+        for page_number in page_numbers:
+            _, size = self._pages.pop((content_id, page_number))
+            self.size -= size
+        return len(page_numbers)
+    
+    def _remove(self, key: Tuple[str, int]):
+        entry = self._pages.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry[1]
+        
+        content_id, page_number = key
+        page_numbers = self._content_pages[content_id]
+        page_numbers.discard(page_number)
+        if not page_numbers:
+            del self._content_pages[content_id]
+
+
+async def read_pages(db: AsyncSession, content_id: str, first: int, last: int) -> List[Dict]:
+    """
+    Text of pages first..last (inclusive), cached pages first
+    
+    The leading run of cached pages is served from memory; the rest of the
+    window comes from one range query on (content_id, page_number). Pages
+    that are not extracted yet are simply missing from the result.
+    
+    Returns:
+        Dictionaries with 'page_number', 'content' and 'word_count', in page order
+    """
+    cache = get_page_cache()
+    pages = []
+    
+    page_number = first
+    while page_number <= last:
+        page = cache.get(content_id, page_number)
+        if page is None:
+            break
+        pages.append(page)
+        page_number += 1
+    
+    if page_number > last:
+        return pages
+    
+    result = await db.execute(
+        select(Page.page_number, Page.content, Page.word_count)
+        .where(
+            Page.content_id == content_id,
+            Page.page_number >= page_number,
+            Page.page_number <= last
+        )
+        .order_by(Page.page_number)
+    )
+    for number, content, word_count in result.all():
+        page = {"page_number": number, "content": content, "word_count": word_count}
+        cache.put(content_id, page)
+        pages.append(page)
+    
+    return pages
+
+
+# Singleton instance
+_page_cache = None
+
+def get_page_cache() -> PageCache:
+    """Get or create page cache instance"""
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = PageCache(settings.PAGE_CACHE_MAX_MB * 1024 * 1024)
+    return _page_cache
@@ -0,0 +1,177 @@
+"""
+Result Cache
+Search rankings kept per (content IDs, normalized query, k)
+
+Popular questions on shared course material repeat the same search. A hit
+returns the ranking without embedding the query or walking an index. Only
+chunk IDs, distances and metadata are kept - VectorService loads the chunk
+text by ID on a hit - so an entry's size doesn't grow with the chunk size.
+
+Every write to a content's vectors bumps its vector_version column, in
+whichever process made it (API, standalone worker, CLI). An entry holds
+the versions its contents had when the search started and is only used
+while they are unchanged - one primary key read per lookup. Entries also
+expire after RESULT_CACHE_TTL_SECONDS.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.document import DocumentContent
+from app.services.embedding_cache import normalize_query
+
+CacheKey = Tuple[Tuple[str, ...], str, int]
+Hit = Tuple[str, Optional[float], Dict]  # Chunk ID, distance, metadata
+Versions = Tuple[Optional[int], ...]  # Vector versions of a key's contents (None: content is gone)
+
+
+def make_key(query: str, content_ids: Iterable[str], n_results: int) -> CacheKey:
+    """Cache key of a search - the order of content IDs does not matter"""
+    return (tuple(sorted(set(content_ids))), normalize_query(query), n_results)
+
+
+async def read_versions(content_ids: Tuple[str, ...]) -> Versions:
+    """Stored vector versions of contents, in the given order - read them before searching"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DocumentContent.id, DocumentContent.vector_version)
+            .where(DocumentContent.id.in_(content_ids))
+        )
+        versions = dict(result.all())
+    return tuple(versions.get(content_id) for content_id in content_ids)
+
+
+async def bump_version(content_id: str):
+    """Mark a content's vectors as changed (call after writing them)"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(DocumentContent)
+                .where(DocumentContent.id == content_id)
+                .values(vector_version=DocumentContent.vector_version + 1)
+            )
+            await db.commit()
+    except Exception as e:
+        # Cached results of the content stay until they expire
+        print(f"⚠️ Could not bump vector version of content {content_id}: {e}")
+
+
+class ResultCache:
+    """
+    LRU cache of search rankings, checked against stored vector versions
+    
+    Searches read it on the event loop, writes invalidate it from vector
+    store executor threads, so every access takes a lock. A search that
+    raced a write stores its results under the versions it read before
+    the write, so the next lookup (which reads the bumped version) misses.
+    Invalidation only frees the entries early in the writing process.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[List[Hit], float, Versions]]" = OrderedDict()
+        self._content_keys: Dict[str, Set[CacheKey]] = defaultdict(set)
+        self._lock = threading.Lock()
+    
+    def get(self, key: CacheKey, versions: Versions) -> Optional[List[Dict]]:
+        """
+        Cached ranking, or None
+        
+        Args:
+            key: make_key of the search
+            versions: read_versions of the key's content IDs
+        
+        Returns:
+            Results without their 'content' - 'id', 'metadata' (a copy)
+            and 'distance' only
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic() or entry[2] != versions:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [
+                {"id": chunk_id, "metadata": dict(metadata), "distance": distance}
+                for chunk_id, distance, metadata in entry[0]
+            ]
+    
+    def put(self, key: CacheKey, results: List[Dict], versions: Versions):
+        """
+        Cache the ranking of results, valid while their contents have `versions`
+        
+        Example:
+            versions = await read_versions(key[0])
+            results = ...  # search
+            cache.put(key, results, versions)
+        """
+        content_ids = key[0]
+        with self._lock:
+            self._remove(key)
+            hits = [(result["id"], result.get("distance"), dict(result["metadata"])) for result in results]
+            self._entries[key] = (hits, time.monotonic() + self.ttl, versions)
+            for content_id in content_ids:
+                self._content_keys[content_id].add(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate(self, content_id: str) -> int:
+        """
+        Forget every cached search that includes the content
+        
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            keys = list(self._content_keys.get(content_id, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def metrics(self) -> Dict:
+        """Hit/miss counters and size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+    
+    def _remove(self, key: CacheKey):
+        if self._entries.pop(key, None) is None:
+            return
+        for content_id in key[0]:
+            keys = self._content_keys.get(content_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._content_keys[content_id]
+
+
+# Singleton instance
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Get or create result cache instance (None when RESULT_CACHE_MAX_ENTRIES is 0)"""
+    global _result_cache
+    if _result_cache is None and settings.RESULT_CACHE_MAX_ENTRIES > 0:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(settings.RESULT_CACHE_MAX_ENTRIES, settings.RESULT_CACHE_TTL_SECONDS)
+    return _result_cache
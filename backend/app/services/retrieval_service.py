@@ -0,0 +1,74 @@
+"""
+Retrieval Service
+Hybrid retrieval - BM25 keyword search and vector search, fused by rank
+
+Both searches run concurrently over the same chunks (they share chunk IDs)
+and their rankings are merged with reciprocal rank fusion: a chunk scores
+the sum of 1 / (RRF_K + rank) over the rankings it appears in. Exact terms
+(theorem names, formulas, course codes) are found by BM25 even when the
+embedding misses them, and paraphrases by the embedding.
+"""
+
+import asyncio
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services import lexical_service
+from app.services.vector_service import get_vector_service
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], k: int) -> List[Dict]:
+    """
+    Merge ranked result lists by chunk ID
+    
+    The first list a chunk appears in provides its result dictionary.
+    
+    Returns:
+        Results with an added 'score' (higher is better), best first
+    """
+    fused: Dict[str, Dict] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {**result, "score": 0.0}
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)
+
+
+async def hybrid_search(db: AsyncSession, query: str, content_ids: List[str], n_results: int = 5) -> List[Dict]:
+    """
+    Search for relevant document chunks with BM25 and embeddings
+    
+    Args:
+        db: Database session (for the FTS5 index)
+        query: Search query
+        content_ids: Content IDs to search within - get them from
+            content_service.get_content_ids so ownership is checked
+        n_results: Number of results to return
+    
+    Returns:
+        Matching chunks in the result shape of VectorService.search, with
+        a fused 'score'
+    """
+    if not content_ids:
+        return []
+    
+    candidates = max(settings.HYBRID_CANDIDATES, n_results)
+    vector_results, lexical_results = await asyncio.gather(
+        get_vector_service().search(query, content_ids, candidates),
+        lexical_service.search(db, query, content_ids, candidates),
+        return_exceptions=True
+    )
+    
+    # Either search alone is still a useful answer
+    rankings = []
+    for name, results in (("Vector", vector_results), ("Keyword", lexical_results)):
+        if isinstance(results, Exception):
+            print(f"❌ {name} search failed: {results}")
+        else:
+            rankings.append(results)
+    
+    return reciprocal_rank_fusion(rankings, settings.RRF_K)[:n_results]
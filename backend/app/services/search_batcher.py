@@ -0,0 +1,93 @@
+"""
+Search Batcher
+Groups concurrent vector searches into one embed-and-query call
+
+Searches that arrive within SEARCH_BATCH_WINDOW_MS of the first one in a
+batch (or until SEARCH_BATCH_MAX_SIZE have arrived) are handed to a batch
+function as one list and run on the vector store executor. N concurrent
+chat messages then cost one embedding pass and one query per collection
+instead of N of each.
+"""
+
+import asyncio
+from typing import Callable, Generic, List, Optional, Set, Tuple, TypeVar
+
+from app.core.config import settings
+from app.services.vector_executor import get_vector_executor
+
+R = TypeVar("R")  # Request
+T = TypeVar("T")  # Result
+
+
+class SearchBatcher(Generic[R, T]):
+    """
+    Collects requests on the event loop and runs them in batches
+    
+    Example:
+        batcher = SearchBatcher(vector_service.search_batch)
+        results = await batcher.submit(SearchRequest(query, content_ids, 5))
+    
+    The batch function is blocking, takes a list of requests and returns
+    one result per request in the same order. SEARCH_BATCH_MAX_SIZE=1
+    turns batching off - every request goes straight to the executor.
+    """
+    
+    def __init__(
+        self,
+        batch_fn: Callable[[List[R]], List[T]],
+        window_ms: Optional[float] = None,
+        max_size: Optional[int] = None
+    ):
+        self.batch_fn = batch_fn
+        self.window = (settings.SEARCH_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_size = max(settings.SEARCH_BATCH_MAX_SIZE if max_size is None else max_size, 1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[R, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()  # Running batches (keeps them from being garbage collected)
+    
+    async def submit(self, request: R) -> T:
+        """Queue a request and wait for its result"""
+        if self.max_size == 1:
+            return (await get_vector_executor().run(self.batch_fn, [request]))[0]
+        
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures belong to a loop - start over in a new one (CLI runs, tests)
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+        
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Start a batch with everything pending"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[R, asyncio.Future]]):
+        try:
+            results = await get_vector_executor().run(self.batch_fn, [request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # The caller may have been cancelled
+                future.set_result(result)
@@ -0,0 +1,245 @@
+"""
+Storage Service
+Where uploaded files (PDFs, avatars) live - local disk or an S3-compatible store
+
+Files are addressed by storage keys: relative POSIX paths such as
+"documents/3f/a2/3fa2...e1.pdf". New keys are sharded by a hash prefix, so no
+directory (or key prefix) grows to hundreds of thousands of entries.
+DocumentContent.file_path and User.avatar hold keys. Avatars are public at
+/media/<key>; PDFs are only served by the authenticated document file route
+(both through the configured backend, see app/api/file_responses.py).
+
+Rows written before sharding keep working: flat keys ("avatars/x.png")
+resolve like any other key, and absolute paths are read from local disk.
+`python -m app.cli.migrate_storage` moves them into the sharded layout.
+"""
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # Optional - only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+
+def shard_key(prefix: str, name: str, digest: Optional[str] = None, levels: Optional[int] = None) -> str:
+    """
+    Storage key for a new file, sharded by a hash prefix
+    
+    Args:
+        prefix: Top-level folder ("documents", "avatars")
+        name: File name
+        digest: Hex hash to shard by (defaults to the SHA-256 of the name)
+        levels: Two-character directory levels (defaults to STORAGE_SHARD_LEVELS)
+    
+    Example:
+        shard_key("documents", f"{sha256}.pdf", digest=sha256)  # documents/3f/a2/3fa2....pdf
+    """
+    digest = digest or hashlib.sha256(name.encode("utf-8")).hexdigest()
+    levels = settings.STORAGE_SHARD_LEVELS if levels is None else levels
+    shards = [digest[i * 2:i * 2 + 2] for i in range(levels)]
+    return "/".join([prefix, *shards, name])
+
+
+def is_valid_key(key: str) -> bool:
+    """A relative key that stays inside the storage root"""
+    path = PurePosixPath(key)
+    return bool(key) and not path.is_absolute() and ".." not in path.parts and "\\" not in key
+
+
+class StorageBackend:
+    """Interface of a storage backend"""
+    
+    name = "base"
+    
+    async def put_file(self, source: Path, key: str, move: bool = True):
+        """Store a local file under key (move=False keeps the source)"""
+        raise NotImplementedError
+    
+    async def delete(self, key: str) -> bool:
+        """Delete a stored file (True if deleted or already gone)"""
+        raise NotImplementedError
+    
+    async def exists(self, key: str) -> bool:
+        """Whether a file is stored under key"""
+        raise NotImplementedError
+    
+    def local_path(self, key: str) -> Optional[Path]:
+        """Path on this machine, or None if the backend is remote"""
+        return None
+    
+    async def url(self, key: str, filename: Optional[str] = None) -> str:
+        """Download link for a remote file"""
+        raise NotImplementedError
+    
+    @asynccontextmanager
+    async def open_local(self, key: str) -> AsyncIterator[Path]:
+        """
+        A local path for the file while the block runs (downloaded if remote)
+        
+        Example:
+            async with storage.open_local(content.file_path) as pdf_path:
+                total_pages = await count_pdf_pages(str(pdf_path))
+        """
+        raise NotImplementedError
+        yield
+
+
+class LocalStorage(StorageBackend):
+    """Files under a directory on local disk (MEDIA_ROOT)"""
+    
+    name = "local"
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+    
+    def local_path(self, key: str) -> Path:
+        # Rows from before the storage service hold absolute paths
+        if os.path.isabs(key):
+            return Path(key)
+        if not is_valid_key(key):
+            raise ValueError(f"Invalid storage key: {key}")
+        return self.root / key
+    
+    async def put_file(self, source: Path, key: str, move: bool = True):
+        target = self.local_path(key)
+        
+        def _put():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if not move:
+                try:
+                    os.link(source, target)  # Same disk - no copy needed
+                except OSError:
+                    shutil.copy2(source, target)
+                return
+            try:
+                os.replace(source, target)
+            except OSError:
+                # Different file system (e.g. staging folder on another disk)
+                shutil.move(str(source), str(target))
+        
+        await asyncio.to_thread(_put)
+    
+    async def delete(self, key: str) -> bool:
+        try:
+            path = self.local_path(key)
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+            return True
+        except Exception as e:
+            print(f"Error deleting file: {e}")
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.local_path(key).is_file)
+    
+    @asynccontextmanager
+    async def open_local(self, key: str) -> AsyncIterator[Path]:
+        yield self.local_path(key)
+
+
+class S3Storage(StorageBackend):
+    """
+    Files in an S3-compatible bucket (AWS S3, MinIO, ...)
+    
+    boto3 is blocking, so every call runs in a thread. Downloads are
+    redirects to presigned URLs - the bucket serves the bytes.
+    """
+    
+    name = "s3"
+    
+    def __init__(self):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs the boto3 package (pip install boto3)")
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        
+        self.bucket = settings.S3_BUCKET
+        self.prefix = settings.S3_KEY_PREFIX
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY
+        )
+    
+    def _object_key(self, key: str) -> str:
+        if not is_valid_key(key):
+            raise ValueError(f"Invalid storage key: {key}")
+        return self.prefix + key
+    
+    async def put_file(self, source: Path, key: str, move: bool = True):
+        content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        await asyncio.to_thread(
+            self.client.upload_file,
+            str(source),
+            self.bucket,
+            self._object_key(key),
+            ExtraArgs={"ContentType": content_type}
+        )
+        if move:
+            await asyncio.to_thread(Path(source).unlink, missing_ok=True)
+    
+    async def delete(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception as e:
+            print(f"Error deleting file: {e}")
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+    
+    async def url(self, key: str, filename: Optional[str] = None) -> str:
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if filename:
+            filename = filename.replace('"', "")
+            params["ResponseContentDisposition"] = f'inline; filename="{filename}"'
+        return await asyncio.to_thread(
+            self.client.generate_presigned_url,
+            "get_object",
+            Params=params,
+            ExpiresIn=settings.S3_URL_EXPIRE_SECONDS
+        )
+    
+    @asynccontextmanager
+    async def open_local(self, key: str) -> AsyncIterator[Path]:
+        with tempfile.TemporaryDirectory(prefix="mentora-") as tmp:
+            path = Path(tmp) / PurePosixPath(key).name
+            await asyncio.to_thread(self.client.download_file, self.bucket, self._object_key(key), str(path))
+            yield path
+
+
+# Singleton instance
+_storage = None
+
+def get_storage() -> StorageBackend:
+    """Get or create storage backend instance (STORAGE_BACKEND)"""
+    global _storage
+    if _storage is None:
+        backend = settings.STORAGE_BACKEND.lower()
+        if backend == "local":
+            _storage = LocalStorage(settings.MEDIA_ROOT)
+        elif backend == "s3":
+            _storage = S3Storage()
+        else:
+            raise ValueError(f"Unknown storage backend '{settings.STORAGE_BACKEND}' - use local or s3")
+    return _storage
@@ -0,0 +1,140 @@
+"""
+Vector Store Executor
+Runs blocking ChromaDB calls on a dedicated, size-bounded thread pool
+
+The chromadb client is synchronous - embedding a query and walking HNSW
+would otherwise block the event loop for every other request. Calls are
+queued to VECTOR_STORE_WORKERS threads of their own, so a burst of searches
+cannot take over the default executor used by file I/O either. Queue depth
+and wait/run latencies are kept for /health.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Latency samples kept for percentiles
+SAMPLE_SIZE = 1024
+
+
+def _percentile_ms(samples, percentile: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(int(len(ordered) * percentile / 100), len(ordered) - 1)
+    return round(ordered[index] * 1000, 2)
+
+
+class VectorStoreExecutor:
+    """
+    Thread pool for vector store calls, with queue and latency metrics
+    
+    Example:
+        results = await get_vector_executor().run(collection.query, query_texts=[query])
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max(max_workers or settings.VECTOR_STORE_WORKERS, 1)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vector-store")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self._wait_samples = deque(maxlen=SAMPLE_SIZE)
+        self._run_samples = deque(maxlen=SAMPLE_SIZE)
+    
+    def _call(self, submitted: float, fn: Callable[..., T], args, kwargs) -> T:
+        """Run one call on a pool thread, recording how long it waited and ran"""
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self._wait_samples.append(started - submitted)
+        
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            with self._lock:
+                self.running -= 1
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                self._run_samples.append(time.perf_counter() - started)
+    
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run a blocking function on the pool and wait for its result
+        
+        Cancelling the caller does not stop a call that already started -
+        chromadb has no way to interrupt one.
+        """
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._pool, self._call, time.perf_counter(), fn, args, kwargs)
+        except RuntimeError:
+            # Pool already shut down - the call never got queued
+            with self._lock:
+                self.queued -= 1
+            raise
+        return await future
+    
+    def metrics(self) -> Dict:
+        """Snapshot of queue depth, counters and p50/p99 latencies in ms"""
+        with self._lock:
+            wait_samples = list(self._wait_samples)
+            run_samples = list(self._run_samples)
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_ms_p50": _percentile_ms(wait_samples, 50),
+                "wait_ms_p99": _percentile_ms(wait_samples, 99),
+                "run_ms_p50": _percentile_ms(run_samples, 50),
+                "run_ms_p99": _percentile_ms(run_samples, 99),
+            }
+    
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Shared executor (created on first use)
+_vector_executor: Optional[VectorStoreExecutor] = None
+_vector_executor_lock = threading.Lock()
+
+
+def get_vector_executor() -> VectorStoreExecutor:
+    """Get or create the executor used for vector store calls"""
+    global _vector_executor
+    if _vector_executor is None:
+        with _vector_executor_lock:
+            if _vector_executor is None:
+                _vector_executor = VectorStoreExecutor()
+    return _vector_executor
+
+
+def shutdown_vector_executor():
+    """Stop the vector store threads (call on shutdown)"""
+    global _vector_executor
+    if _vector_executor is not None:
+        _vector_executor.shutdown()
+        _vector_executor = None
@@ -1,47 +1,227 @@
 """
 Vector Service
 Handles document vectorization and semantic search using ChromaDB
+
+Vectors are partitioned: every shared document content has its own
+collection ("content_<id>"), so a search only touches the HNSW indexes of
+the documents it is scoped to and needs no metadata filter. Vectors written
+before partitioning stay in the old global "documents" collection and are
+still read until `python -m app.cli.partition_vectors` moves them.
+
+The on-disk store (VECTOR_DB_PATH) may only be used by one process: a
+process that has loaded a collection keeps serving its own copy of the
+index and never sees vectors written by another one. With standalone
+workers, every process connects to a Chroma server (CHROMA_SERVER_URL).
 """
 
+import functools
+import inspect
+import threading
+from urllib.parse import urlsplit
+from collections import defaultdict
+
 import chromadb
+from chromadb.api.models.Collection import Collection
 from chromadb.config import Settings
-from typing import List, Dict, Optional
+from chromadb.utils import embedding_functions
+from typing import List, Dict, NamedTuple, Optional, Set
 from app.core.config import settings
+from app.services.chunking_service import Chunk, chunk_pages
+from app.services.embedding_cache import get_embedding_cache
+from app.services.result_cache import bump_version, get_result_cache, make_key, read_versions
+from app.services.search_batcher import SearchBatcher
+from app.services.vector_executor import get_vector_executor
+
+PARTITION_PREFIX = "content_"
+LEGACY_COLLECTION = "documents"
+
+
+def make_chunk_id(content_id: str, chunk: Chunk) -> str:
+    """Create the vector ID for a chunk"""
+    return f"content_{content_id}_page_{chunk.page_number}_chunk_{chunk.chunk_index}"
+
+
+def partition_name(content_id: str) -> str:
+    """Name of the collection holding one content's vectors"""
+    return f"{PARTITION_PREFIX}{content_id}"
+
+
+class SearchRequest(NamedTuple):
+    """One caller's search, as collected by the search batcher"""
+    query: str
+    content_ids: List[str]
+    n_results: int
+
+
+def _format_results(results: Dict, position: int = 0) -> List[Dict]:
+    """Flatten the results of one query embedding of a ChromaDB query into result dictionaries"""
+    formatted_results = []
+    if results and results['ids'] and results['ids'][position]:
+        for i in range(len(results['ids'][position])):
+            formatted_results.append({
+                "id": results['ids'][position][i],
+                "content": results['documents'][position][i],
+                "metadata": results['metadatas'][position][i],
+                "distance": results['distances'][position][i] if results.get('distances') else None
+            })
+    return formatted_results
+
+
+def _in_executor(method):
+    """Make a blocking VectorService method awaitable - it runs on the vector store executor"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await get_vector_executor().run(method, self, *args, **kwargs)
+    return wrapper
+
+
+def _bumps_version(content_arg: str):
+    """Bump the vector version of the content named by `content_arg` once the write is done (even if it failed)"""
+    def decorator(method):
+        signature = inspect.signature(method)
+        
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            content_id = signature.bind(self, *args, **kwargs).arguments[content_arg]
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                await bump_version(content_id)
+        return wrapper
+    return decorator
 
 
 class VectorService:
-    """Service for managing document vectors and semantic search"""
+    """
+    Service for managing document vectors and semantic search
+    
+    The async methods run the blocking chromadb calls on the vector store
+    executor, never on the event loop thread.
+    """
     
     def __init__(self):
         """Initialize ChromaDB client"""
-        # Create persistent ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=str(settings.VECTOR_DB_PATH),
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
+        client_settings = Settings(
+            anonymized_telemetry=False,
+            allow_reset=True
         )
+        if settings.CHROMA_SERVER_URL:
+            # Shared by the API and standalone workers
+            url = urlsplit(settings.CHROMA_SERVER_URL)
+            self.client = chromadb.HttpClient(
+                host=url.hostname or "localhost",
+                port=str(url.port or (443 if url.scheme == "https" else 8000)),
+                ssl=url.scheme == "https",
+                settings=client_settings
+            )
+        else:
+            # Files on disk - only this process may use them
+            self.client = chromadb.PersistentClient(
+                path=str(settings.VECTOR_DB_PATH),
+                settings=client_settings
+            )
         
-        # Get or create collection for documents
-        self.collection = self.client.get_or_create_collection(
-            name="documents",
-            metadata={"description": "User document embeddings"}
-        )
+        # One embedding function for all partitions - a query is embedded once
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        
+        # Collection objects of partitions, by content ID
+        self._partitions: Dict[str, Collection] = {}
+        self._partitions_lock = threading.Lock()  # Methods run on several executor threads
+        
+        # Global collection from before partitioning (None once migrated)
+        self.legacy_collection = self._get_collection(LEGACY_COLLECTION)
+        
+        # Groups concurrent searches into search_batch calls
+        self._batcher = SearchBatcher(self.search_batch)
     
-    async def add_document(
+    def _get_collection(self, name: str) -> Optional[Collection]:
+        try:
+            return self.client.get_collection(name=name, embedding_function=self.embedding_function)
+        except ValueError:
+            return None
+    
+    def get_partition(self, content_id: str, create: bool = False) -> Optional[Collection]:
+        """
+        Collection holding one content's vectors
+        
+        Args:
+            content_id: Shared document content ID
+            create: Create the collection if it does not exist yet
+        
+        Returns:
+            The collection, or None if it does not exist and create is False
+        """
+        collection = self._partitions.get(content_id)
+        if collection is None:
+            with self._partitions_lock:
+                collection = self._partitions.get(content_id)
+                if collection is None:
+                    if create:
+                        collection = self.client.get_or_create_collection(
+                            name=partition_name(content_id),
+                            metadata={"content_id": content_id},
+                            embedding_function=self.embedding_function
+                        )
+                    else:
+                        collection = self._get_collection(partition_name(content_id))
+                    if collection is not None:
+                        self._partitions[content_id] = collection
+        return collection
+    
+    def _invalidate(self, content_id: str):
+        """
+        Drop cached search results of content whose vectors just changed (call after the write)
+        
+        This only frees them early in this process - writers are wrapped
+        in _bumps_version, which makes them stale for every process.
+        """
+        cache = get_result_cache()
+        if cache is not None:
+            cache.invalidate(content_id)
+    
+    def _sources(self, content_id: str) -> List[Collection]:
+        """Collections that may hold vectors of a content (its partition, then the legacy one)"""
+        partition = self.get_partition(content_id)
+        return [c for c in (partition, self.legacy_collection) if c is not None]
+    
+    def _get(self, content_id: str, where: Optional[Dict] = None, include: Optional[List[str]] = None) -> Dict:
+        """collection.get over all sources of a content, results concatenated"""
+        merged = {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+        for collection in self._sources(content_id):
+            if collection is self.legacy_collection:
+                scoped = {"content_id": content_id}
+                query_where = {"$and": [scoped, where]} if where else scoped
+            else:
+                query_where = where
+            
+            results = collection.get(where=query_where, include=include or [])
+            for key in merged:
+                merged[key].extend(results.get(key) or [])
+        return merged
+    
+    @_bumps_version("content_id")
+    @_in_executor
+    def add_document(
         self,
-        document_id: str,
+        content_id: str,
         pages: List[Dict[str, any]],
-        user_id: int
+        chunks: Optional[List[Chunk]] = None
     ) -> bool:
         """
         Add document pages to vector database
         
+        Pages are split into overlapping token-sized chunks; each chunk is
+        stored with its page number and character offsets so search results
+        are short, citable snippets. Uses upsert, so re-adding is safe.
+        
+        Vectors belong to shared document content, not to a user - access
+        is checked when document IDs are mapped to content IDs. They are
+        written to the content's own partition.
+        
         Args:
-            document_id: ID of the document (UUID string)
+            content_id: ID of the shared document content (UUID string)
             pages: List of page dictionaries with 'page_number' and 'content'
-            user_id: ID of the user who owns the document
+            chunks: The pages' chunks, if the caller has them already
             
         Returns:
             True if successful
@@ -52,125 +232,337 @@ class VectorService:
             documents = []
             metadatas = []
             
-            for page in pages:
-                # Create unique ID for this page
-                page_id = f"doc_{document_id}_page_{page['page_number']}"
-                
-                # Skip empty pages
-                if not page['content'] or not page['content'].strip():
-                    continue
-                
-                ids.append(page_id)
-                documents.append(page['content'])
+            for chunk in chunk_pages(pages) if chunks is None else chunks:
+                ids.append(make_chunk_id(content_id, chunk))
+                documents.append(chunk.text)
                 metadatas.append({
-                    "document_id": document_id,
-                    "page_number": page['page_number'],
-                    "user_id": user_id
+                    "content_id": content_id,
+                    "page_number": chunk.page_number,
+                    "chunk_index": chunk.chunk_index,
+                    "start_char": chunk.start_char,
+                    "end_char": chunk.end_char
                 })
             
-            # Add to ChromaDB
+            # Add to the content's partition
             if ids:
-                self.collection.add(
+                self.get_partition(content_id, create=True).upsert(
                     ids=ids,
                     documents=documents,
                     metadatas=metadatas
                 )
                 
-                print(f"✅ Vectorized {len(ids)} pages for document {document_id}")
+                print(f"✅ Vectorized {len(ids)} chunks from {len(pages)} pages for content {content_id}")
                 return True
             else:
-                print(f"⚠️ No content to vectorize for document {document_id}")
+                print(f"⚠️ No content to vectorize for content {content_id}")
                 return False
                 
         except Exception as e:
-            print(f"❌ Error vectorizing document {document_id}: {e}")
+            print(f"❌ Error vectorizing content {content_id}: {e}")
             return False
+        finally:
+            self._invalidate(content_id)
+    
+    @_bumps_version("target_content_id")
+    @_in_executor
+    def copy_pages(
+        self,
+        source_content_id: str,
+        target_content_id: str,
+        pages: Dict[int, int]
+    ) -> Set[int]:
+        """
+        Copy the stored chunk vectors of some pages to other content
+        
+        Used when a file is replaced: pages whose text did not change keep
+        their embeddings, so the embedding model is not called for them.
+        A page may have moved (e.g. a page was inserted before it) - its
+        vectors are stored under the new page number and chunk IDs.
+        
+        Args:
+            source_content_id: Content the vectors are copied from
+            target_content_id: Content the vectors are copied to
+            pages: Target page number -> source page number with the same text
+        
+        Returns:
+            Target page numbers whose vectors were copied (pages stored
+            before chunking was introduced are skipped and must be re-embedded)
+        """
+        if not pages:
+            return set()
+        
+        targets_by_source = defaultdict(list)
+        for target_page, source_page in pages.items():
+            targets_by_source[source_page].append(target_page)
+        
+        results = self._get(
+            source_content_id,
+            where={"page_number": {"$in": list(targets_by_source)}},
+            include=["embeddings", "documents", "metadatas"]
+        )
+        
+        ids = []
+        embeddings = []
+        documents = []
+        metadatas = []
+        skipped = set()
+        
+        for i in range(len(results['ids'])):
+            metadata = results['metadatas'][i]
+            target_pages = targets_by_source[metadata["page_number"]]
+            if "chunk_index" not in metadata:
+                skipped.update(target_pages)
+                continue
+            for target_page in target_pages:
+                chunk = Chunk(
+                    page_number=target_page,
+                    chunk_index=metadata["chunk_index"],
+                    start_char=metadata["start_char"],
+                    end_char=metadata["end_char"],
+                    text=results['documents'][i]
+                )
+                ids.append(make_chunk_id(target_content_id, chunk))
+                embeddings.append(results['embeddings'][i])
+                documents.append(chunk.text)
+                metadatas.append({**metadata, "content_id": target_content_id, "page_number": target_page})
+        
+        if ids:
+            try:
+                self.get_partition(target_content_id, create=True).upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=documents,
+                    metadatas=metadatas
+                )
+            finally:
+                self._invalidate(target_content_id)
+        
+        return set(pages) - skipped
+    
+    @_in_executor
+    def get_ids(self, content_id: str) -> List[str]:
+        """Get the IDs of all vectors stored for shared document content"""
+        return self._get(content_id)['ids']
+    
+    @_bumps_version("content_id")
+    @_in_executor
+    def delete_ids(self, content_id: str, ids: List[str]):
+        """Delete vectors of shared document content by ID"""
+        if ids:
+            try:
+                for collection in self._sources(content_id):
+                    collection.delete(ids=ids)
+            finally:
+                self._invalidate(content_id)
     
     async def search(
         self,
         query: str,
-        user_id: int,
-        document_ids: Optional[List[str]] = None,
+        content_ids: List[str],
         n_results: int = 5
     ) -> List[Dict]:
         """
         Search for relevant document chunks
         
+        Repeated searches are answered from the result cache without
+        embedding or querying. Others arriving within SEARCH_BATCH_WINDOW_MS
+        of each other are run together (see search_batch) - each still gets
+        only hits from its own content IDs.
+        
         Args:
             query: Search query
-            user_id: User ID to filter results
-            document_ids: Optional list of document IDs (UUID strings) to search within
+            content_ids: Content IDs to search within - get them from
+                content_service.get_content_ids so ownership is checked
             n_results: Number of results to return
             
         Returns:
             List of matching chunks with metadata
         """
+        if not content_ids:
+            return []
+        
+        cache = get_result_cache()
+        if cache is not None:
+            key = make_key(query, content_ids, n_results)
+            versions = await read_versions(key[0])
+            hits = cache.get(key, versions)
+            if hits is not None:
+                results = await self._with_texts(hits)
+                if results is not None:
+                    return results
+        
         try:
-            # Build where filter
-            where_filter = {"user_id": user_id}
-            
-            if document_ids:
-                # ChromaDB requires $in operator for lists
-                where_filter["document_id"] = {"$in": document_ids}
-            
-            # Query ChromaDB
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=where_filter
-            )
-            
-            # Format results
-            formatted_results = []
-            if results and results['ids'] and results['ids'][0]:
-                for i in range(len(results['ids'][0])):
-                    formatted_results.append({
-                        "content": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i],
-                        "distance": results['distances'][0][i] if 'distances' in results else None
-                    })
-            
-            return formatted_results
-            
+            results = await self._batcher.submit(SearchRequest(query, list(content_ids), n_results))
         except Exception as e:
             print(f"❌ Error searching vectors: {e}")
             return []
+        
+        if cache is not None:
+            cache.put(key, results, versions)
+        return results
     
-    async def delete_document(self, document_id: str) -> bool:
+    async def _with_texts(self, hits: List[Dict]) -> Optional[List[Dict]]:
+        """Cached results with their chunk text loaded, or None if a chunk no longer exists"""
+        if not hits:
+            return []
+        
+        ids_by_content = defaultdict(list)
+        for hit in hits:
+            ids_by_content[hit["metadata"].get("content_id")].append(hit["id"])
+        
+        try:
+            texts = await self.get_texts(dict(ids_by_content))
+        except Exception as e:
+            print(f"⚠️ Could not load cached chunks: {e}")
+            return None
+        
+        if any(hit["id"] not in texts for hit in hits):
+            return None
+        return [{**hit, "content": texts[hit["id"]]} for hit in hits]
+    
+    @_in_executor
+    def get_texts(self, ids_by_content: Dict[str, List[str]]) -> Dict[str, str]:
+        """
+        Stored chunk text by vector ID
+        
+        Args:
+            ids_by_content: Content ID -> vector IDs of that content
+        
+        Returns:
+            Vector ID -> text, for the IDs that exist
+        """
+        texts = {}
+        for content_id, ids in ids_by_content.items():
+            if content_id is None:
+                continue
+            for collection in self._sources(content_id):
+                results = collection.get(ids=ids, include=["documents"])
+                texts.update(zip(results['ids'], results['documents']))
+        return texts
+    
+    def search_batch(self, requests: List[SearchRequest]) -> List[List[Dict]]:
+        """
+        Run several searches with one embedding call and one query per collection (blocking)
+        
+        Each content's partition is queried once with the embeddings of all
+        requests that include it; each request then merges its own hits by
+        distance. Content not yet migrated is searched in the legacy
+        collection, one filtered query per distinct set of content IDs.
+        
+        Returns:
+            Results for each request, in request order
+        
+        Raises:
+            Exception: Whatever chromadb or the embedding model raised - it
+                fails the whole batch
+        """
+        # Embed every distinct query text in one pass (cached ones skip the model)
+        texts = list(dict.fromkeys(request.query for request in requests))
+        cache = get_embedding_cache()
+        if cache is not None:
+            embeddings = dict(zip(texts, cache.embed(texts, self.embedding_function)))
+        else:
+            embeddings = dict(zip(texts, self.embedding_function(texts)))
+        
+        by_partition: Dict[str, List[int]] = {}
+        by_filter: Dict[tuple, List[int]] = {}
+        for index, request in enumerate(requests):
+            unmigrated = []
+            for content_id in dict.fromkeys(request.content_ids):
+                if self.get_partition(content_id) is not None:
+                    by_partition.setdefault(content_id, []).append(index)
+                elif self.legacy_collection is not None:
+                    unmigrated.append(content_id)
+            if unmigrated:
+                by_filter.setdefault(tuple(sorted(unmigrated)), []).append(index)
+        
+        formatted_results: List[List[Dict]] = [[] for _ in requests]
+        
+        def query(collection: Collection, indexes: List[int], limit: int, where: Optional[Dict] = None):
+            results = collection.query(
+                query_embeddings=[embeddings[requests[i].query] for i in indexes],
+                n_results=limit,
+                where=where
+            )
+            for position, index in enumerate(indexes):
+                formatted_results[index].extend(_format_results(results, position)[:requests[index].n_results])
+        
+        for content_id, indexes in by_partition.items():
+            partition = self.get_partition(content_id)
+            count = partition.count() if partition is not None else 0
+            if count:
+                query(partition, indexes, min(max(requests[i].n_results for i in indexes), count))
+        
+        for unmigrated, indexes in by_filter.items():
+            # ChromaDB requires $in operator for lists
+            query(
+                self.legacy_collection,
+                indexes,
+                max(requests[i].n_results for i in indexes),
+                where={"content_id": {"$in": list(unmigrated)}}
+            )
+        
+        for index, request in enumerate(requests):
+            formatted_results[index].sort(key=lambda result: result["distance"])
+            del formatted_results[index][request.n_results:]
+        return formatted_results
+    
+    @_bumps_version("content_id")
+    @_in_executor
+    def delete_document(self, content_id: str) -> bool:
         """
-        Delete all vectors for a document
+        Delete all vectors for shared document content
         
         Args:
-            document_id: Document ID (UUID string) to delete
+            content_id: Content ID (UUID string) to delete
             
         Returns:
             True if successful
         """
         try:
-            # Get all IDs for this document
-            results = self.collection.get(
-                where={"document_id": document_id}
-            )
+            deleted = False
+            
+            # The partition goes away as a whole - no per-vector deletes
+            if self.get_partition(content_id) is not None:
+                with self._partitions_lock:
+                    self.client.delete_collection(name=partition_name(content_id))
+                    self._partitions.pop(content_id, None)
+                deleted = True
             
-            if results and results['ids']:
-                self.collection.delete(ids=results['ids'])
-                print(f"✅ Deleted vectors for document {document_id}")
+            if self.legacy_collection is not None:
+                results = self.legacy_collection.get(where={"content_id": content_id}, include=[])
+                if results and results['ids']:
+                    self.legacy_collection.delete(ids=results['ids'])
+                    deleted = True
+            
+            if deleted:
+                print(f"✅ Deleted vectors for content {content_id}")
                 return True
             else:
-                print(f"⚠️ No vectors found for document {document_id}")
+                print(f"⚠️ No vectors found for content {content_id}")
                 return False
                 
         except Exception as e:
-            print(f"❌ Error deleting vectors for document {document_id}: {e}")
+            print(f"❌ Error deleting vectors for content {content_id}: {e}")
             return False
+        finally:
+            self._invalidate(content_id)
 
 
 # Singleton instance
 _vector_service = None
+_vector_service_lock = threading.Lock()
 
 def get_vector_service() -> VectorService:
-    """Get or create vector service instance"""
+    """Get or create vector service instance (opening the store blocks - see init_vector_service)"""
     global _vector_service
     if _vector_service is None:
-        _vector_service = VectorService()
+        with _vector_service_lock:
+            if _vector_service is None:
+                _vector_service = VectorService()
     return _vector_service
+
+
+async def init_vector_service() -> VectorService:
+    """Open the vector store on the vector store executor instead of the event loop"""
+    return await get_vector_executor().run(get_vector_service)
@@ -0,0 +1,76 @@
+"""
+Ingestion Worker
+Standalone process that runs document ingestion jobs
+
+Usage:
+    python -m app.worker                  # one worker
+    python -m app.worker --concurrency 2  # two job loops in this process
+
+Start as many worker processes as needed - they coordinate through
+leases on the ingestion_jobs table. Set INGESTION_EMBEDDED_WORKERS=0
+to keep the API process from running jobs itself.
+
+Workers and the API must share a Chroma server (CHROMA_SERVER_URL): the
+on-disk vector store only works within one process, and an API process
+would keep answering searches from its own stale copy of the index.
+"""
+
+import argparse
+import asyncio
+import signal
+
+from app.core.config import settings
+from app.db.database import init_db, AsyncSessionLocal
+from app.db.hooks import wait_for_callbacks
+from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+from app.services.ingestion_service import run_worker, make_worker_id, recover_ingestion
+from app.services.pdf_service import shutdown_process_pool
+from app.services.progress_service import run_progress_writer
+from app.services.vector_executor import shutdown_vector_executor
+from app.services.vector_service import init_vector_service
+
+
+async def main(concurrency: int):
+    """Run worker loops until SIGINT/SIGTERM"""
+    if not settings.CHROMA_SERVER_URL:
+        raise SystemExit(
+            "❌ Standalone workers need a Chroma server shared with the API - "
+            "set CHROMA_SERVER_URL (e.g. `chroma run --path data/vector_db/chroma_db --port 8001`)"
+        )
+    
+    await init_db()
+    await init_vector_service()
+    
+    if settings.INGESTION_RECOVER_ON_STARTUP:
+        async with AsyncSessionLocal() as db:
+            await recover_ingestion(db)
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows - fall back to KeyboardInterrupt
+            pass
+    
+    try:
+        await asyncio.gather(
+            *[run_worker(make_worker_id(), stop_event) for _ in range(concurrency)],
+            run_progress_writer(stop_event)
+        )
+    finally:
+        await wait_for_callbacks()
+        shutdown_process_pool()
+        shutdown_vector_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Mentora ingestion workers")
+    parser.add_argument("--concurrency", type=int, default=1, help="Job loops to run in this process")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(main(args.concurrency))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Mentora backend
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.bench_pdf_extraction
+"""
@@ -0,0 +1,111 @@
+"""
+Benchmark: batch upload vs. sequential single uploads
+
+Uploads N distinct generated PDFs through the FastAPI app, once as N
+POST /api/reader/documents/upload requests and once as a single
+POST /api/reader/documents/upload/batch request, and reports files/sec.
+Only the upload requests are timed - ingestion workers are disabled, so
+extraction and embedding do not compete for the CPU.
+
+Usage (from backend directory):
+    python -m benchmarks.bench_batch_upload --files 10 20 50 --pages 10
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def _upload_sequential(client, headers, pdf_paths):
+    for path in pdf_paths:
+        with open(path, "rb") as file:
+            response = client.post(
+                "/api/reader/documents/upload",
+                files={"file": (path.name, file, "application/pdf")},
+                headers=headers
+            )
+        response.raise_for_status()
+
+
+def _upload_batch(client, headers, pdf_paths):
+    handles = [open(path, "rb") for path in pdf_paths]
+    try:
+        response = client.post(
+            "/api/reader/documents/upload/batch",
+            files=[("files", (path.name, handle, "application/pdf")) for path, handle in zip(pdf_paths, handles)],
+            headers=headers
+        )
+    finally:
+        for handle in handles:
+            handle.close()
+    response.raise_for_status()
+    assert all(result["status"] != "rejected" for result in response.json()["files"])
+
+
+def run(file_counts, pages: int, workdir: Path):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from benchmarks.pdf_factory import make_pdf
+    
+    seed = 0
+    
+    def make_pdfs(count):
+        # Distinct seeds, so no upload is deduplicated against another
+        nonlocal seed
+        paths = []
+        for _ in range(count):
+            seed += 1
+            paths.append(make_pdf(workdir / f"bench_{seed}.pdf", pages, seed=seed))
+        return paths
+    
+    with TestClient(app) as client:
+        response = client.post("/api/auth/register", json={
+            "username": "bench",
+            "email": "bench@example.com",
+            "password": "benchmark123",
+            "password_confirm": "benchmark123",
+            "first_name": "Bench",
+            "last_name": "Mark"
+        })
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        
+        print(f"{'files':>6} {'sequential (s)':>15} {'batch (s)':>10} {'seq files/s':>12} {'batch files/s':>14} {'speedup':>8}")
+        
+        for count in file_counts:
+            sequential_paths = make_pdfs(count)
+            batch_paths = make_pdfs(count)
+            
+            start = time.perf_counter()
+            _upload_sequential(client, headers, sequential_paths)
+            sequential = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            _upload_batch(client, headers, batch_paths)
+            batch = time.perf_counter() - start
+            
+            print(
+                f"{count:>6} {sequential:>15.3f} {batch:>10.3f} "
+                f"{count / sequential:>12.1f} {count / batch:>14.1f} {sequential / batch:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--pages", type=int, default=10, help="Pages per generated PDF")
+    args = parser.parse_args()
+    
+    # Never touch the real database or media folder - set before the app is imported
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ["VECTOR_DB_PATH"] = f"{tmp}/chroma"
+        os.environ["MEDIA_ROOT"] = f"{tmp}/media"
+        os.environ["DOCUMENTS_PATH"] = f"{tmp}/media/documents"
+        os.environ["AVATARS_PATH"] = f"{tmp}/media/avatars"
+        os.environ["INGESTION_EMBEDDED_WORKERS"] = "0"
+        os.environ["INGESTION_RECOVER_ON_STARTUP"] = "False"
+        os.environ["DEBUG"] = "False"
+        run(args.files, args.pages, Path(tmp))
@@ -0,0 +1,113 @@
+"""
+Benchmark: peak memory of the streaming ingestion pipeline
+
+Runs process_document on generated PDFs of increasing size, each in a
+fresh Python process with its own temporary SQLite database, and reports
+peak RSS. With batched streaming the peak should stay flat as the page
+count grows.
+
+Embeddings go to a counting sink by default so the numbers show the
+pipeline itself; pass --embed to use the real Chroma vector service.
+
+Usage (from backend directory):
+    python -m benchmarks.bench_ingestion_memory --pages 100 500 1000 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+class CountingVectorSink:
+    """Stands in for VectorService - counts pages instead of embedding them"""
+    
+    def __init__(self):
+        self.pages = 0
+    
+    async def add_document(self, content_id, pages):
+        self.pages += len(pages)
+        return True
+    
+    async def delete_document(self, content_id):
+        return True
+
+
+def _current_rss_kb() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def _child(pages: int, workdir: Path, embed: bool):
+    from app.db.database import init_db, AsyncSessionLocal
+    from app.models import user, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+    from app.models.document import DocumentContent
+    from app.services import ingestion_service, vector_service
+    from benchmarks.pdf_factory import make_pdf
+    
+    pdf_path = make_pdf(workdir / "bench.pdf", pages)
+    await init_db()
+    
+    if not embed:
+        vector_service._vector_service = CountingVectorSink()
+    
+    async with AsyncSessionLocal() as db:
+        content = DocumentContent(sha256="bench", file_path=str(pdf_path), ref_count=1)
+        db.add(content)
+        await db.commit()
+        
+        rss_before = _current_rss_kb()
+        await ingestion_service.process_document(db, content)
+    
+    # The parser sandbox has reaped its processes, so their peak RSS is reported
+    print(json.dumps({
+        "pages": pages,
+        "rss_before_kb": rss_before,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "workers_peak_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }))
+
+
+def run(page_counts, embed: bool):
+    print(f"{'pages':>7} {'RSS before (MB)':>16} {'peak RSS (MB)':>14} {'worker peak (MB)':>17}")
+    
+    for pages in page_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+            env["VECTOR_DB_PATH"] = f"{tmp}/chroma"
+            env["DEBUG"] = "False"
+            
+            args = [sys.executable, "-m", "benchmarks.bench_ingestion_memory", "--child", str(pages), "--workdir", tmp]
+            if embed:
+                args.append("--embed")
+            
+            output = subprocess.run(args, env=env, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+        
+        print(
+            f"{pages:>7} {result['rss_before_kb'] / 1024:>16.1f} "
+            f"{result['peak_rss_kb'] / 1024:>14.1f} {result['workers_peak_rss_kb'] / 1024:>17.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--embed", action="store_true", help="Use the real Chroma vector service")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        asyncio.run(_child(args.child, args.workdir, args.embed))
+    else:
+        run(args.pages, args.embed)
@@ -0,0 +1,172 @@
+"""
+Benchmark: page text compression - database size and read latency
+
+Stores the same pages once per PAGE_COMPRESSION mode (none, zlib, zstd and
+zstd with a trained dictionary when the zstandard package is installed)
+in separate temporary SQLite databases, then measures:
+
+- database file size after VACUUM
+- latency of the document summary query (first 3 pages of a document)
+- latency of the chat fallback query (first 5 pages of several documents)
+
+Page text is prose taken from Python docstrings (standard library and
+installed packages), which compresses much like lecture notes - generated
+benchmark PDFs use a tiny vocabulary and would overstate the savings. The
+dictionary is trained on separate pages that are not stored, as it would
+be in production.
+
+Usage (from backend directory):
+    python -m benchmarks.bench_page_compression --documents 8 --pages 250
+"""
+
+import argparse
+import ast
+import asyncio
+import os
+import statistics
+import sysconfig
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+
+def _corpus_pages(count: int, page_chars: int = 2500) -> List[str]:
+    """Split docstrings of the standard library and installed packages into pages of about page_chars"""
+    docs = {}  # Ordered set - packages repeat some docstrings
+    paths = sysconfig.get_paths()
+    sources = [Path(paths["stdlib"]), Path(paths["purelib"])]
+    
+    for path in (path for source in sources for path in sorted(source.rglob("*.py"))):
+        if "test" in path.parts or "tests" in path.parts:
+            continue
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8"))
+        except (SyntaxError, UnicodeDecodeError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                doc = ast.get_docstring(node)
+                if doc and len(doc) > 200 and doc not in docs:
+                    docs[doc] = len(doc)
+        if sum(docs.values()) > (count + 1) * page_chars:
+            break
+    
+    corpus = "\n\n".join(docs)
+    pages = [corpus[start:start + page_chars] for start in range(0, len(corpus) - page_chars, page_chars)]
+    if len(pages) < count:
+        raise SystemExit(f"Only {len(pages)} distinct pages of text available - ask for fewer")
+    return pages[:count]
+
+
+def _time_ms(samples: List[float]) -> str:
+    return f"{statistics.median(samples) * 1000:.2f}"
+
+
+async def bench_mode(mode: str, workdir: Path, documents: List[List[str]], repeat: int, dictionary_path=None):
+    from sqlalchemy import select, text
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+    from app.core.config import settings
+    from app.db.database import Base
+    from app.services.lexical_service import create_fts_table
+    from app.models.document import Page
+    from app.services.content_service import bulk_insert_pages, get_sample_pages
+    
+    settings.PAGE_COMPRESSION = "zstd" if mode.startswith("zstd") else mode
+    settings.ZSTD_DICTIONARY_PATH = dictionary_path
+    
+    db_path = workdir / f"{mode}.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await create_fts_table(conn)
+    
+    content_ids = []
+    start = time.perf_counter()
+    async with session_factory() as db:
+        for pages in documents:
+            content_id = str(uuid.uuid4())
+            content_ids.append(content_id)
+            await bulk_insert_pages(db, content_id, list(enumerate(pages, start=1)))
+            await db.commit()
+    insert_seconds = time.perf_counter() - start
+    
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM"))
+    
+    summary, fallback = [], []
+    async with session_factory() as db:
+        for i in range(repeat):
+            # Summary: sample pages of one document, previews only
+            start = time.perf_counter()
+            previews = await get_sample_pages(db, content_ids[i % len(content_ids)])
+            summary.append(time.perf_counter() - start)
+            
+            # Chat fallback: first pages of the selected documents
+            start = time.perf_counter()
+            result = await db.execute(
+                select(Page.page_number, Page.content)
+                .where(Page.content_id.in_(content_ids[:3]))
+                .order_by(Page.page_number)
+                .limit(5)
+            )
+            context = "\n\n".join(page.content for page in result.all())
+            fallback.append(time.perf_counter() - start)
+            
+            db.expunge_all()
+            assert previews and context
+    
+    await engine.dispose()
+    return db_path.stat().st_size, insert_seconds, _time_ms(summary), _time_ms(fallback)
+
+
+async def run(document_count: int, pages_per_document: int, repeat: int, workdir: Path):
+    from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+    from app.db.types import zstandard
+    
+    training_pages = 1000
+    pages = _corpus_pages(document_count * pages_per_document + training_pages)
+    training, pages = pages[:training_pages], pages[training_pages:]
+    documents = [
+        pages[i * pages_per_document:(i + 1) * pages_per_document]
+        for i in range(document_count)
+    ]
+    
+    modes = [("none", None), ("zlib", None)]
+    if zstandard is not None:
+        dictionary_path = workdir / "pages.zdict"
+        samples = [page.encode("utf-8") for page in training]
+        dictionary_path.write_bytes(zstandard.train_dictionary(112640, samples).as_bytes())
+        modes += [("zstd", None), ("zstd+dict", dictionary_path)]
+    else:
+        print("(zstandard not installed - skipping zstd)")
+    
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1024 / 1024:.1f} MB of text")
+    print(f"{'mode':>10} {'DB size (MB)':>13} {'vs none':>8} {'insert (s)':>11} {'summary (ms)':>13} {'fallback (ms)':>14}")
+    
+    baseline = None
+    for mode, dictionary_path in modes:
+        size, insert_seconds, summary, fallback = await bench_mode(mode, workdir, documents, repeat, dictionary_path)
+        baseline = baseline or size
+        print(
+            f"{mode:>10} {size / 1024 / 1024:>13.1f} {size / baseline:>7.0%} "
+            f"{insert_seconds:>11.2f} {summary:>13} {fallback:>14}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=250, help="Pages per document")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    
+    # Never touch the real database
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ["DEBUG"] = "False"
+        asyncio.run(run(args.documents, args.pages, args.repeat, Path(tmp)))
@@ -0,0 +1,77 @@
+"""
+Benchmark: bulk page inserts vs. the per-object ORM path
+
+Inserts 100, 1,000 and 5,000 pages into a temporary SQLite database with
+the aiosqlite engine from app/db/database.py, once through db.add(Page(...))
+and the unit of work, and once through bulk_insert_pages (Core executemany).
+
+Usage (from backend directory):
+    python -m benchmarks.bench_page_insert --pages 100 1000 5000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+
+def _page_text(page_number: int) -> str:
+    return f"Page {page_number} " + "lorem ipsum dolor sit amet " * 80
+
+
+async def _orm_insert(db, Page, content_id: str, pages: int):
+    for page_number in range(1, pages + 1):
+        db.add(Page(content_id=content_id, page_number=page_number, content=_page_text(page_number)))
+    await db.commit()
+
+
+async def _bulk_insert(db, bulk_insert_pages, content_id: str, pages: int, batch_size: int):
+    await bulk_insert_pages(
+        db, content_id,
+        [(page_number, _page_text(page_number)) for page_number in range(1, pages + 1)],
+        batch_size=batch_size
+    )
+    await db.commit()
+
+
+async def run(page_counts, batch_size: int, repeat: int):
+    from app.db.database import init_db, engine, AsyncSessionLocal
+    from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+    from app.models.document import Page
+    from app.services.content_service import bulk_insert_pages
+    
+    await init_db()
+    print(f"{'pages':>7} {'ORM (s)':>9} {'bulk (s)':>9} {'ORM pages/s':>12} {'bulk pages/s':>13} {'speedup':>8}")
+    
+    for pages in page_counts:
+        timings = {"orm": [], "bulk": []}
+        for _ in range(repeat):
+            for path in ("orm", "bulk"):
+                async with AsyncSessionLocal() as db:
+                    start = time.perf_counter()
+                    if path == "orm":
+                        await _orm_insert(db, Page, str(uuid.uuid4()), pages)
+                    else:
+                        await _bulk_insert(db, bulk_insert_pages, str(uuid.uuid4()), pages, batch_size)
+                    timings[path].append(time.perf_counter() - start)
+        
+        orm, bulk = min(timings["orm"]), min(timings["bulk"])
+        print(f"{pages:>7} {orm:>9.3f} {bulk:>9.3f} {pages / orm:>12.0f} {pages / bulk:>13.0f} {orm / bulk:>7.1f}x")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    # Never touch the real database
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ["DEBUG"] = "False"
+        asyncio.run(run(args.pages, args.batch_size, args.repeat))
@@ -0,0 +1,107 @@
+"""
+Benchmark: PDF download - first open, re-open and lazy page loads
+
+Uploads one large PDF (50 MB by default) and times what a browser PDF
+viewer does with GET /api/reader/documents/{id}/file:
+
+- first open: the whole file (what every open cost before - no validators)
+- re-open: revalidation with If-None-Match, answered with an empty 304
+- page load: a 64 KB Range request at a random offset (206)
+
+The file is padding behind a PDF header; ingestion workers are disabled,
+so only serving is measured.
+
+Usage (from backend directory):
+    python -m benchmarks.bench_pdf_download --size-mb 50 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def _median_ms(samples):
+    return f"{statistics.median(samples) * 1000:.1f}"
+
+
+def run(size_mb: int, repeat: int, workdir: Path):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    
+    pdf_path = workdir / "textbook.pdf"
+    with open(pdf_path, "wb") as file:
+        file.write(b"%PDF-1.4\n")
+        for _ in range(size_mb):
+            file.write(os.urandom(1024 * 1024))
+    size = pdf_path.stat().st_size
+    
+    with TestClient(app) as client:
+        response = client.post("/api/auth/register", json={
+            "username": "bench",
+            "email": "bench@example.com",
+            "password": "benchmark123",
+            "password_confirm": "benchmark123",
+            "first_name": "Bench",
+            "last_name": "Mark"
+        })
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        
+        with open(pdf_path, "rb") as file:
+            response = client.post(
+                "/api/reader/documents/upload",
+                files={"file": (pdf_path.name, file, "application/pdf")},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+        response.raise_for_status()
+        url = f"/api/reader/documents/{response.json()['document']['id']}/file?token={token}"
+        
+        first, reopen, page = [], [], []
+        rng = random.Random(0)
+        etag = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url)
+            first.append(time.perf_counter() - start)
+            assert response.status_code == 200 and len(response.content) == size
+            etag = response.headers["etag"]
+            
+            start = time.perf_counter()
+            response = client.get(url, headers={"If-None-Match": etag})
+            reopen.append(time.perf_counter() - start)
+            assert response.status_code == 304 and not response.content
+            
+            offset = rng.randrange(0, size - 65536)
+            start = time.perf_counter()
+            response = client.get(url, headers={"Range": f"bytes={offset}-{offset + 65535}"})
+            page.append(time.perf_counter() - start)
+            assert response.status_code == 206 and len(response.content) == 65536
+    
+    print(f"{size / 1024 / 1024:.0f} MB PDF, median of {repeat} (ms)")
+    print(f"{'request':>22} {'time (ms)':>10} {'bytes sent':>12}")
+    print(f"{'first open (200)':>22} {_median_ms(first):>10} {size:>12}")
+    print(f"{'re-open (304)':>22} {_median_ms(reopen):>10} {0:>12}")
+    print(f"{'64 KB page load (206)':>22} {_median_ms(page):>10} {65536:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    # Never touch the real database or media folder - set before the app is imported
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ["VECTOR_DB_PATH"] = f"{tmp}/chroma"
+        os.environ["MEDIA_ROOT"] = f"{tmp}/media"
+        os.environ["DOCUMENTS_PATH"] = f"{tmp}/media/documents"
+        os.environ["AVATARS_PATH"] = f"{tmp}/media/avatars"
+        os.environ["INGESTION_EMBEDDED_WORKERS"] = "0"
+        os.environ["INGESTION_RECOVER_ON_STARTUP"] = "False"
+        os.environ["DEBUG"] = "False"
+        run(args.size_mb, args.repeat, Path(tmp))
@@ -0,0 +1,118 @@
+"""
+Benchmark: retrieval throughput of concurrent chat requests - batched vs one by one
+
+Fills a partitioned vector store with N documents and replays the
+retrieval step of chat (VectorService.search over the caller's document)
+from 1, 10 and 100 concurrent clients, each sending queries back to back:
+
+- unbatched: SEARCH_BATCH_MAX_SIZE=1 - one embedding pass and one index
+  walk per search
+- batched: searches within SEARCH_BATCH_WINDOW_MS share one embedding
+  pass and one query per collection
+
+Queries are embedded with the real ONNX all-MiniLM-L6-v2 model (downloaded
+on first use) since that is most of the cost batching removes;
+--fake-embeddings uses random vectors instead. Popular documents are
+shared by many clients (Zipf), like a class reading the same textbook.
+
+Usage (from backend directory):
+    python -m benchmarks.bench_search_batching --documents 1000 --concurrency 1,10,100 --seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_vector_executor import RandomEmbedding
+from benchmarks.bench_vector_partitions import fill, make_corpus
+
+QUESTIONS = [
+    "What is the main idea of this chapter?",
+    "Explain the difference between mitosis and meiosis",
+    "Summarize the proof of the theorem on page 12",
+    "What are the key assumptions of the model?",
+    "Give an example of a first-order differential equation",
+    "How does the author define opportunity cost?",
+]
+
+
+def _percentile_ms(samples, percentile):
+    return f"{np.percentile(samples, percentile) * 1000:.1f}"
+
+
+async def run_clients(vector_service, documents: int, concurrency: int, seconds: float):
+    """Searches per second and latencies of `concurrency` clients searching back to back"""
+    rng = np.random.default_rng(concurrency)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    
+    async def client(number: int):
+        document = min(int(rng.zipf(1.3)) - 1, documents - 1)
+        while time.perf_counter() < deadline:
+            query = f"{QUESTIONS[rng.integers(0, len(QUESTIONS))]} ({number})"
+            start = time.perf_counter()
+            await vector_service.search(query, [f"doc{document}"], n_results=5)
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[client(number) for number in range(concurrency)])
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+
+def run(documents: int, levels, seconds: float, fake_embeddings: bool, workdir: Path):
+    from app.core.config import settings
+    from app.services.search_batcher import SearchBatcher
+    from app.services.vector_executor import get_vector_executor
+    from app.services.vector_service import VectorService
+    
+    settings.VECTOR_DB_PATH = workdir / "chroma"
+    settings.EMBEDDING_CACHE_MAX_MB = 0  # Every search embeds its query - batching is what is measured
+    settings.RESULT_CACHE_MAX_ENTRIES = 0
+    vector_service = VectorService()
+    fill(vector_service, make_corpus(documents, 8, 384, np.random.default_rng(documents)), partitioned=True)
+    if fake_embeddings:
+        vector_service.embedding_function = RandomEmbedding(384)
+    else:
+        vector_service.embedding_function(["warm up"])  # Loads the model
+    
+    print(
+        f"{documents} documents, {settings.VECTOR_STORE_WORKERS} executor threads, "
+        f"window {settings.SEARCH_BATCH_WINDOW_MS:g} ms, max batch {settings.SEARCH_BATCH_MAX_SIZE}"
+    )
+    print(f"{'clients':>8} {'mode':>10} {'searches/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    
+    max_size = settings.SEARCH_BATCH_MAX_SIZE
+    for concurrency in levels:
+        for mode, batch_size in (("unbatched", 1), ("batched", max_size)):
+            vector_service._batcher = SearchBatcher(vector_service.search_batch, max_size=batch_size)
+            throughput, latencies = asyncio.run(run_clients(vector_service, documents, concurrency, seconds))
+            print(
+                f"{concurrency:>8} {mode:>10} {throughput:>11.1f} "
+                f"{_percentile_ms(latencies, 50):>9} {_percentile_ms(latencies, 99):>9}"
+            )
+    
+    print(f"Executor metrics: {get_vector_executor().metrics()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--concurrency", default="1,10,100", help="Comma-separated numbers of concurrent clients")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each run")
+    parser.add_argument("--fake-embeddings", action="store_true")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VECTOR_DB_PATH"] = f"{tmp}/chroma"
+        run(
+            args.documents,
+            [int(level) for level in args.concurrency.split(",")],
+            args.seconds,
+            args.fake_embeddings,
+            Path(tmp)
+        )
@@ -0,0 +1,120 @@
+"""
+Benchmark: document summary latency - full page rows vs stored previews
+
+Stores one large document (1000 pages by default) and times the sample
+pages query behind GET /api/reader/documents/{id}/summary two ways:
+
+- before: full Page rows with their text (decompressed if needed), sliced
+  to 200 characters in Python
+- after: get_sample_pages - page_number, preview and word_count only,
+  ordered by page number
+
+Each is run with PAGE_COMPRESSION=none and zlib, for ordinary pages and
+for long ones (dense textbook pages).
+
+Usage (from backend directory):
+    python -m benchmarks.bench_summary --pages 1000 --repeat 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from benchmarks.pdf_factory import WORDS
+
+
+def _page_text(chars: int, rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+async def bench(mode: str, page_chars: int, pages: int, repeat: int, workdir: Path):
+    from sqlalchemy import select
+    from sqlalchemy.orm import undefer
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+    from app.core.config import settings
+    from app.db.database import Base
+    from app.services.lexical_service import create_fts_table
+    from app.models.document import Page
+    from app.services.content_service import bulk_insert_pages, get_sample_pages
+    
+    settings.PAGE_COMPRESSION = mode
+    
+    engine = create_async_engine(f"sqlite+aiosqlite:///{workdir / f'{mode}_{page_chars}.db'}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await create_fts_table(conn)
+    
+    rng = random.Random(page_chars)
+    content_id = str(uuid.uuid4())
+    async with session_factory() as db:
+        await bulk_insert_pages(db, content_id, [(n, _page_text(page_chars, rng)) for n in range(1, pages + 1)])
+        await db.commit()
+    
+    async def before(db):
+        # The summary query as it was: whole rows, no ORDER BY, sliced in Python
+        result = await db.execute(
+            select(Page).options(undefer(Page.content)).where(Page.content_id == content_id).limit(3)
+        )
+        return [
+            {"page_number": page.page_number, "content_preview": page.content[:200] + "..."}
+            for page in result.scalars().all()
+        ]
+    
+    async def after(db):
+        return await get_sample_pages(db, content_id)
+    
+    timings = {}
+    async with session_factory() as db:
+        for name, query in (("before", before), ("after", after)):
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                assert len(await query(db)) == 3
+                samples.append(time.perf_counter() - start)
+                db.expunge_all()
+            samples.sort()
+            timings[name] = (statistics.median(samples) * 1000, samples[int(len(samples) * 0.99)] * 1000)
+    
+    await engine.dispose()
+    return timings
+
+
+async def run(pages: int, repeat: int, workdir: Path):
+    from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+    
+    print(f"{pages}-page document, {repeat} summaries per case (ms)")
+    print(f"{'compression':>12} {'page chars':>11} {'before p50':>11} {'before p99':>11} {'after p50':>10} {'after p99':>10} {'speedup':>8}")
+    for mode in ("none", "zlib"):
+        for page_chars in (2500, 20000):
+            timings = await bench(mode, page_chars, pages, repeat, workdir)
+            (before_p50, before_p99), (after_p50, after_p99) = timings["before"], timings["after"]
+            print(
+                f"{mode:>12} {page_chars:>11} {before_p50:>11.3f} {before_p99:>11.3f} "
+                f"{after_p50:>10.3f} {after_p99:>10.3f} {before_p50 / after_p50:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    
+    # Never touch the real database
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ["DEBUG"] = "False"
+        asyncio.run(run(args.pages, args.repeat, Path(tmp)))
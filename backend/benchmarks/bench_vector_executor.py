@@ -0,0 +1,140 @@
+"""
+Benchmark: /health latency while vector searches run
+
+Fills a partitioned vector store with N documents, then fires bursts of
+50 concurrent VectorService.search calls while a client keeps requesting
+/health on the same event loop, the way uvicorn serves both:
+
+- inline: the blocking chromadb calls run on the event loop (how search
+  ran before the vector store executor)
+- executor: the calls run on the VECTOR_STORE_WORKERS thread pool
+
+Query vectors are random unless --real-embeddings is given (downloads and
+runs the ONNX all-MiniLM-L6-v2 model, so each search also pays for
+embedding the query).
+
+Usage (from backend directory):
+    python -m benchmarks.bench_vector_executor --documents 10000 --searches 50 --bursts 10
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_vector_partitions import fill, make_corpus
+
+
+class RandomEmbedding:
+    """Stands in for the embedding model - every query gets a random unit vector"""
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.rng = np.random.default_rng(0)
+    
+    def __call__(self, input):
+        vectors = self.rng.standard_normal((len(input), self.dim))
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).tolist()
+
+
+def _percentile_ms(samples, percentile):
+    return f"{np.percentile(samples, percentile) * 1000:.1f}"
+
+
+async def _burst(vector_service, search, client, documents: int, searches: int, docs_per_query: int, rng):
+    """Run concurrent searches and poll /health until they are done; return both latencies"""
+    search_latencies = []
+    health_latencies = []
+    
+    async def one_search():
+        docs = rng.choice(documents, size=docs_per_query, replace=False)
+        start = time.perf_counter()
+        await search(vector_service, "what is covered in this chapter?", [f"doc{doc}" for doc in docs], 5)
+        search_latencies.append(time.perf_counter() - start)
+    
+    tasks = [asyncio.create_task(one_search()) for _ in range(searches)]
+    while not all(task.done() for task in tasks):
+        start = time.perf_counter()
+        response = await client.get("/health")
+        health_latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+        await asyncio.sleep(0.005)
+    await asyncio.gather(*tasks)
+    return search_latencies, health_latencies
+
+
+async def run_mode(vector_service, mode: str, documents: int, searches: int, bursts: int, docs_per_query: int):
+    import httpx
+    from app.main import app
+    from app.services.vector_service import SearchRequest
+    
+    if mode == "inline":
+        async def search(service, query, content_ids, n_results):
+            return service.search_batch([SearchRequest(query, content_ids, n_results)])[0]
+    else:
+        async def search(service, query, content_ids, n_results):
+            return await service.search(query, content_ids, n_results)
+    
+    rng = np.random.default_rng(1)
+    search_latencies, health_latencies = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(bursts):
+            searched, health = await _burst(vector_service, search, client, documents, searches, docs_per_query, rng)
+            search_latencies.extend(searched)
+            health_latencies.extend(health)
+    return search_latencies, health_latencies
+
+
+def run(documents: int, searches: int, bursts: int, docs_per_query: int, dim: int, real_embeddings: bool, workdir: Path):
+    from app.core.config import settings
+    from app.services.vector_executor import get_vector_executor
+    from app.services.vector_service import VectorService
+    
+    settings.VECTOR_DB_PATH = workdir / "chroma"
+    settings.SEARCH_BATCH_MAX_SIZE = 1  # Measure one executor call per search
+    settings.EMBEDDING_CACHE_MAX_MB = 0  # Every search embeds its query
+    settings.RESULT_CACHE_MAX_ENTRIES = 0
+    vector_service = VectorService()
+    
+    start = time.perf_counter()
+    fill(vector_service, make_corpus(documents, 8, 384 if real_embeddings else dim, np.random.default_rng(documents)), partitioned=True)
+    print(f"Filled {documents} documents in {time.perf_counter() - start:.1f} s")
+    if not real_embeddings:
+        vector_service.embedding_function = RandomEmbedding(dim)
+    
+    print(f"{bursts} bursts of {searches} concurrent searches over {docs_per_query} document(s), {settings.VECTOR_STORE_WORKERS} executor threads")
+    print(f"{'mode':>9} {'search p50':>11} {'search p99':>11} {'/health n':>10} {'/health p50':>12} {'/health p99':>12}")
+    
+    for mode in ("inline", "executor"):
+        # Warm up - loads the indexes the searches touch
+        asyncio.run(run_mode(vector_service, mode, documents, searches, 1, docs_per_query))
+        search_latencies, health_latencies = asyncio.run(
+            run_mode(vector_service, mode, documents, searches, bursts, docs_per_query)
+        )
+        print(
+            f"{mode:>9} {_percentile_ms(search_latencies, 50):>11} {_percentile_ms(search_latencies, 99):>11} "
+            f"{len(health_latencies):>10} {_percentile_ms(health_latencies, 50):>12} {_percentile_ms(health_latencies, 99):>12}"
+        )
+    
+    print(f"Executor metrics: {get_vector_executor().metrics()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--searches", type=int, default=50, help="Concurrent searches per burst")
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--docs-per-query", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--real-embeddings", action="store_true")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VECTOR_DB_PATH"] = f"{tmp}/chroma"
+        os.environ["INGESTION_EMBEDDED_WORKERS"] = "0"
+        run(args.documents, args.searches, args.bursts, args.docs_per_query, args.dim, args.real_embeddings, Path(tmp))
@@ -0,0 +1,165 @@
+"""
+Benchmark: vector search latency - one global collection vs per-content partitions
+
+Fills a vector store with N documents (8 chunks each, 384-dim like
+all-MiniLM-L6-v2) and times VectorService.search scoped to the documents
+of one user, the way chat does:
+
+- global: the pre-partitioning layout - every vector in one "documents"
+  collection, searched with a content_id metadata filter
+- partitioned: one collection per content, only the caller's are queried
+
+Chunks cluster around a document, documents around one of 50 topics, and
+queries are drawn from a random topic - so most hits in the global index
+belong to other users and the filter has to throw them away. recall@k is
+measured against an exact search over the caller's chunks.
+
+Usage (from backend directory):
+    python -m benchmarks.bench_vector_partitions --documents 1000,10000,100000 --queries 500
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+TOPICS = 50
+
+
+class QueryEmbedding:
+    """Stands in for the embedding model - the benchmark passes query vectors through it"""
+    
+    def __init__(self):
+        self.next = None
+    
+    def __call__(self, input):
+        return [self.next.tolist()]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def _percentile_ms(samples, percentile):
+    return f"{np.percentile(samples, percentile) * 1000:.1f}"
+
+
+def make_corpus(documents: int, chunks: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Chunk vectors, shape (documents, chunks, dim)"""
+    topics = _normalize(rng.standard_normal((TOPICS, dim)))
+    centers = _normalize(topics[rng.integers(0, TOPICS, documents)] + 0.6 * _normalize(rng.standard_normal((documents, dim))))
+    return _normalize(centers[:, None, :] + 0.4 * _normalize(rng.standard_normal((documents, chunks, dim))))
+
+
+def fill(vector_service, vectors: np.ndarray, partitioned: bool, batch_size: int = 4000):
+    """Write the corpus in the global or the partitioned layout"""
+    from app.services.vector_service import LEGACY_COLLECTION
+    
+    documents, chunks, _ = vectors.shape
+    
+    def records(doc_ids):
+        ids, embeddings, metadatas = [], [], []
+        for doc in doc_ids:
+            for chunk in range(chunks):
+                ids.append(f"content_doc{doc}_page_{chunk + 1}_chunk_0")
+                embeddings.append(vectors[doc, chunk].tolist())
+                metadatas.append({"content_id": f"doc{doc}", "page_number": chunk + 1, "chunk_index": 0})
+        return {"ids": ids, "embeddings": embeddings, "documents": ids, "metadatas": metadatas}
+    
+    if partitioned:
+        for doc in range(documents):
+            vector_service.get_partition(f"doc{doc}", create=True).upsert(**records([doc]))
+    else:
+        collection = vector_service.client.get_or_create_collection(
+            name=LEGACY_COLLECTION,
+            embedding_function=vector_service.embedding_function
+        )
+        per_batch = max(batch_size // chunks, 1)
+        for start in range(0, documents, per_batch):
+            collection.upsert(**records(range(start, min(start + per_batch, documents))))
+        vector_service.legacy_collection = collection
+
+
+def run_queries(vector_service, vectors: np.ndarray, queries: int, docs_per_query: int, k: int, rng: np.random.Generator):
+    """Latencies (s) and mean recall@k of scoped searches"""
+    documents, chunks, dim = vectors.shape
+    topics = _normalize(rng.standard_normal((TOPICS, dim)))
+    
+    latencies, recalls = [], []
+    for _ in range(queries):
+        docs = rng.choice(documents, size=docs_per_query, replace=False)
+        query = _normalize(topics[rng.integers(0, TOPICS)] + 0.5 * _normalize(rng.standard_normal(dim)))
+        vector_service.embedding_function.next = query
+        
+        start = time.perf_counter()
+        results = asyncio.run(vector_service.search("query", [f"doc{doc}" for doc in docs], n_results=k))
+        latencies.append(time.perf_counter() - start)
+        
+        # Exact top-k over the caller's chunks
+        scoped = vectors[docs].reshape(-1, dim)
+        order = np.argsort(np.linalg.norm(scoped - query, axis=1))[:k]
+        expected = {f"content_doc{docs[i // chunks]}_page_{i % chunks + 1}_chunk_0" for i in order}
+        recalls.append(len(expected & {result["id"] for result in results}) / len(expected))
+    
+    return latencies, statistics.mean(recalls)
+
+
+def run(sizes, chunks: int, dim: int, queries: int, docs_per_query: int, k: int, workdir: Path):
+    from app.core.config import settings
+    from app.services.vector_service import VectorService
+    
+    settings.SEARCH_BATCH_MAX_SIZE = 1  # Queries run one at a time - don't wait for a batch
+    settings.EMBEDDING_CACHE_MAX_MB = 0  # Every query passes its own vector under the same text
+    settings.RESULT_CACHE_MAX_ENTRIES = 0
+    
+    print(f"{chunks} chunks/document, {dim} dims, {queries} queries over {docs_per_query} document(s), k={k}")
+    print(f"{'documents':>10} {'layout':>12} {'fill (s)':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'recall@k':>9}")
+    
+    for documents in sizes:
+        vectors = make_corpus(documents, chunks, dim, np.random.default_rng(documents))
+        
+        for layout in ("global", "partitioned"):
+            settings.VECTOR_DB_PATH = workdir / f"{layout}_{documents}"
+            vector_service = VectorService()
+            vector_service.embedding_function = QueryEmbedding()
+            
+            start = time.perf_counter()
+            fill(vector_service, vectors, partitioned=layout == "partitioned")
+            fill_seconds = time.perf_counter() - start
+            
+            # Warm up - loads the indexes the queries touch
+            run_queries(vector_service, vectors, min(queries, 50), docs_per_query, k, np.random.default_rng(1))
+            latencies, recall = run_queries(vector_service, vectors, queries, docs_per_query, k, np.random.default_rng(2))
+            
+            print(
+                f"{documents:>10} {layout:>12} {fill_seconds:>9.1f} "
+                f"{_percentile_ms(latencies, 50):>9} {_percentile_ms(latencies, 99):>9} {recall:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", default="1000,10000,100000", help="Comma-separated corpus sizes")
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--docs-per-query", type=int, default=1)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VECTOR_DB_PATH"] = f"{tmp}/chroma"
+        run(
+            [int(size) for size in args.documents.split(",")],
+            args.chunks,
+            args.dim,
+            args.queries,
+            args.docs_per_query,
+            args.k,
+            Path(tmp)
+        )
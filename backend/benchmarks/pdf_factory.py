@@ -0,0 +1,89 @@
+"""
+PDF Factory
+Writes simple multi-page text PDFs for benchmarks (no extra dependencies)
+"""
+
+import random
+from pathlib import Path
+from typing import Optional
+
+WORDS = (
+    "matrix vector theorem proof lemma integral derivative entropy gradient "
+    "algorithm complexity graph tree network protein enzyme market equilibrium "
+    "velocity momentum energy field charge circuit signal sample variance"
+).split()
+
+
+def _page_lines(page_number: int, lines_per_page: int, rng: random.Random):
+    """Random study-text lines for one page"""
+    yield f"Chapter {page_number // 20 + 1} - Page {page_number}"
+    for _ in range(lines_per_page):
+        yield " ".join(rng.choice(WORDS) for _ in range(12))
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(path: Path, pages: int, lines_per_page: int = 40, seed: Optional[int] = 0) -> Path:
+    """
+    Write a text PDF with the given number of pages
+    
+    Objects are streamed to disk one page at a time, so very large
+    page counts do not need much memory.
+    
+    Args:
+        path: Output file
+        pages: Number of pages
+        lines_per_page: Text lines on every page
+        seed: Random seed for reproducible text
+    
+    Returns:
+        The output path
+    """
+    rng = random.Random(seed)
+    path = Path(path)
+    offsets = {}
+    
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    def page_obj(i):
+        return 4 + 2 * i
+    
+    with open(path, "wb") as out:
+        def write_obj(num: int, body: bytes):
+            offsets[num] = out.tell()
+            out.write(f"{num} 0 obj\n".encode() + body + b"\nendobj\n")
+        
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        write_obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{page_obj(i)} 0 R" for i in range(pages))
+        write_obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+        write_obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        
+        for i in range(pages):
+            text_ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+            for line in _page_lines(i + 1, lines_per_page, rng):
+                text_ops.append(f"({_escape(line)}) Tj T*")
+            text_ops.append("ET")
+            stream = "\n".join(text_ops).encode("latin-1")
+            
+            write_obj(page_obj(i), (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_obj(i) + 1} 0 R >>"
+            ).encode())
+            write_obj(page_obj(i) + 1, (
+                f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+            ))
+        
+        xref_offset = out.tell()
+        total_objects = 3 + 2 * pages
+        out.write(f"xref\n0 {total_objects + 1}\n".encode())
+        out.write(b"0000000000 65535 f \n")
+        for num in range(1, total_objects + 1):
+            out.write(f"{offsets[num]:010d} 00000 n \n".encode())
+        out.write((
+            f"trailer\n<< /Size {total_objects + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n"
+        ).encode())
+    
+    return path
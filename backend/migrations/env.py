@@ -0,0 +1,74 @@
+"""
+Alembic environment
+Runs migrations against DATABASE_URL with a synchronous driver
+
+init_db passes its own connection (config.attributes["connection"]) so the
+upgrade runs inside the startup transaction; the alembic command line
+opens one from the settings.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.db.database import Base
+from app.models import user, document, chat, analytics, password_reset, ingestion  # noqa: F401 - register tables
+
+target_metadata = Base.metadata
+
+# Created with raw SQL (lexical_service) - FTS5 and its shadow tables are not models
+FTS_TABLE_PREFIX = "page_chunks_fts"
+
+# Logging is left to the app when init_db runs the migrations
+if context.config.attributes.get("connection") is None and context.config.config_file_name:
+    fileConfig(context.config.config_file_name)
+
+
+def sync_url(url: str) -> str:
+    """Same database, default (synchronous) driver - sqlite+aiosqlite becomes sqlite"""
+    url = make_url(url)
+    return url.set(drivername=url.get_backend_name()).render_as_string(hide_password=False)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping the keyword index"""
+    return not (type_ == "table" and name.startswith(FTS_TABLE_PREFIX))
+
+
+def run_migrations(connection):
+    # SQLite can't alter tables in place - batch mode recreates them
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+        include_object=include_object
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_offline():
+    context.configure(url=sync_url(settings.DATABASE_URL), target_metadata=target_metadata, literal_binds=True, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    
+    engine = create_engine(sync_url(settings.DATABASE_URL), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        run_migrations(connection)
+        connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
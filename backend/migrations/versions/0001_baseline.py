@@ -0,0 +1,24 @@
+"""Baseline - the schema created by create_all before migrations existed
+
+Users, chats, analytics, password resets, documents (with file_path) and
+pages (with document_id). Databases without an alembic_version table that
+still have this schema are stamped with this revision by init_db and then
+upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
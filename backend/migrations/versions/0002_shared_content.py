@@ -0,0 +1,237 @@
+"""Shared document contents, ingestion jobs and page metadata
+
+Moves the baseline schema to content-addressed storage:
+
+- document_contents is created from the existing documents, one row per
+  distinct file (SHA-256 of the stored PDF). ref_count is the number of
+  documents with that file. Files that can no longer be read get a
+  placeholder hash and the failed status.
+- documents gain content_id, word_count, content_hash, processing_status
+  and processing_error; file_path moves to the content.
+- pages are repointed from document_id to content_id. When several
+  documents share a file, the pages of one of them are kept. preview,
+  word_count and content_hash are computed from the stored text.
+- ingestion_jobs is created, with a pending job for every content that
+  was never processed.
+
+Vectors and the keyword index are not touched here - run
+app.cli.partition_vectors and app.cli.index_pages afterwards (see README).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+import hashlib
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+PREVIEW_CHARS = 200
+BATCH_SIZE = 500
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_sha256(file_path):
+    """SHA-256 of a stored file, or None if it can't be read"""
+    sha256 = hashlib.sha256()
+    try:
+        with open(Path(file_path), "rb") as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+    except OSError:
+        return None
+    return sha256.hexdigest()
+
+
+def _page_preview(text):
+    return text[:PREVIEW_CHARS] + "..." if len(text) > PREVIEW_CHARS else text
+
+
+def upgrade():
+    bind = op.get_bind()
+    
+    document_contents = op.create_table(
+        "document_contents",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("file_path", sa.String(500), nullable=False),
+        sa.Column("file_size", sa.Integer(), nullable=True),
+        sa.Column("total_pages", sa.Integer(), nullable=True),
+        sa.Column("word_count", sa.Integer(), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=True),
+        sa.Column("processing_status", sa.String(20), nullable=True),
+        sa.Column("is_processed", sa.Boolean(), nullable=True),
+        sa.Column("is_embedded", sa.Boolean(), nullable=True),
+        sa.Column("processing_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_document_contents_sha256", "document_contents", ["sha256"], unique=True)
+    
+    ingestion_jobs = op.create_table(
+        "ingestion_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content_id", sa.String(36), sa.ForeignKey("document_contents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("source_content_id", sa.String(36), sa.ForeignKey("document_contents.id"), nullable=True),
+        sa.Column("status", sa.String(20), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("max_attempts", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("lease_owner", sa.String(64), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("run_after", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_ingestion_jobs_id", "ingestion_jobs", ["id"])
+    op.create_index("ix_ingestion_jobs_content_id", "ingestion_jobs", ["content_id"])
+    op.create_index("ix_ingestion_jobs_status", "ingestion_jobs", ["status"])
+    
+    with op.batch_alter_table("documents") as batch:
+        batch.add_column(sa.Column("content_id", sa.String(36), nullable=True))
+        batch.add_column(sa.Column("word_count", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("content_hash", sa.String(64), nullable=True))
+        batch.add_column(sa.Column("processing_status", sa.String(20), nullable=True))
+        batch.add_column(sa.Column("processing_error", sa.Text(), nullable=True))
+    
+    with op.batch_alter_table("pages") as batch:
+        batch.add_column(sa.Column("content_id", sa.String(36), nullable=True))
+        batch.add_column(sa.Column("preview", sa.String(255), nullable=True))
+        batch.add_column(sa.Column("word_count", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("content_hash", sa.String(64), nullable=True))
+        batch.add_column(sa.Column("is_embedded", sa.Boolean(), nullable=True))
+    
+    # One content per distinct file; the oldest processed document provides the pages
+    documents = bind.execute(sa.text(
+        "SELECT id, file_path, total_pages, file_size, is_processed, is_embedded "
+        "FROM documents ORDER BY upload_date, id"
+    )).all()
+    contents = {}
+    for document in documents:
+        file_hash = _file_sha256(document.file_path)
+        sha256 = file_hash or f"missing-{document.id}"
+        content = contents.get(sha256)
+        if content is None:
+            content = contents[sha256] = {
+                "id": str(uuid.uuid4()),
+                "sha256": sha256,
+                "file_path": document.file_path,
+                "file_size": document.file_size or 0,
+                "total_pages": document.total_pages or 0,
+                "ref_count": 0,
+                "is_processed": bool(document.is_processed),
+                "is_embedded": bool(document.is_embedded),
+                "processing_status": "ready" if document.is_processed else "queued",
+                "processing_error": None,
+                "page_source": document.id,
+            }
+            if file_hash is None:
+                content["processing_status"] = "failed"
+                content["processing_error"] = "The stored file was missing when the database was migrated"
+        elif document.is_processed and not content["is_processed"]:
+            content.update(
+                total_pages=document.total_pages or 0,
+                is_processed=True,
+                is_embedded=bool(document.is_embedded),
+                processing_status="ready",
+                page_source=document.id,
+            )
+        content["ref_count"] += 1
+        
+        bind.execute(
+            sa.text("UPDATE documents SET content_id = :content_id, content_hash = :content_hash WHERE id = :id"),
+            {"content_id": content["id"], "content_hash": file_hash, "id": document.id}
+        )
+    
+    if contents:
+        op.bulk_insert(document_contents, [
+            {key: value for key, value in content.items() if key != "page_source"}
+            for content in contents.values()
+        ])
+        bind.execute(
+            sa.text("UPDATE pages SET content_id = :content_id, is_embedded = :is_embedded WHERE document_id = :document_id"),
+            [
+                {"content_id": content["id"], "is_embedded": content["is_embedded"], "document_id": content["page_source"]}
+                for content in contents.values()
+            ]
+        )
+        now = datetime.utcnow()
+        jobs = [
+            {"content_id": content["id"], "status": "pending", "attempts": 0, "max_attempts": 3, "run_after": now}
+            for content in contents.values()
+            if content["processing_status"] == "queued"
+        ]
+        if jobs:
+            op.bulk_insert(ingestion_jobs, jobs)
+    
+    # Pages of the other copies, and duplicate page numbers, are dropped
+    bind.execute(sa.text("DELETE FROM pages WHERE content_id IS NULL"))
+    bind.execute(sa.text(
+        "DELETE FROM pages WHERE id NOT IN (SELECT MIN(id) FROM pages GROUP BY content_id, page_number)"
+    ))
+    
+    # Page metadata, computed once like bulk_insert_pages does
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, content FROM pages WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE pages SET preview = :preview, word_count = :word_count, content_hash = :content_hash WHERE id = :id"),
+            [
+                {
+                    "id": page_id,
+                    "preview": _page_preview(text or ""),
+                    "word_count": len((text or "").split()),
+                    "content_hash": hashlib.sha256((text or "").encode("utf-8")).hexdigest(),
+                }
+                for page_id, text in rows
+            ]
+        )
+        last_id = rows[-1][0]
+    
+    bind.execute(sa.text(
+        "UPDATE document_contents SET word_count = "
+        "(SELECT COALESCE(SUM(word_count), 0) FROM pages WHERE pages.content_id = document_contents.id)"
+    ))
+    bind.execute(sa.text(
+        "UPDATE documents SET "
+        "word_count = (SELECT word_count FROM document_contents WHERE id = documents.content_id), "
+        "total_pages = (SELECT total_pages FROM document_contents WHERE id = documents.content_id), "
+        "is_processed = (SELECT is_processed FROM document_contents WHERE id = documents.content_id), "
+        "is_embedded = (SELECT is_embedded FROM document_contents WHERE id = documents.content_id), "
+        "processing_status = (SELECT processing_status FROM document_contents WHERE id = documents.content_id), "
+        "processing_error = (SELECT processing_error FROM document_contents WHERE id = documents.content_id)"
+    ))
+    
+    with op.batch_alter_table("pages", recreate="always") as batch:
+        batch.drop_column("document_id")
+        batch.alter_column("content_id", existing_type=sa.String(36), nullable=False)
+        batch.create_foreign_key("fk_pages_content_id", "document_contents", ["content_id"], ["id"], ondelete="CASCADE")
+        batch.create_index("ix_pages_content_id", ["content_id"])
+        batch.create_index("ix_pages_content_page", ["content_id", "page_number"], unique=True)
+    
+    with op.batch_alter_table("documents", recreate="always") as batch:
+        batch.drop_column("file_path")
+        batch.alter_column("content_id", existing_type=sa.String(36), nullable=False)
+        batch.create_foreign_key("fk_documents_content_id", "document_contents", ["content_id"], ["id"])
+        batch.create_index("ix_documents_content_id", ["content_id"])
+        batch.create_index("ix_documents_content_hash", ["content_hash"])
+
+
+def downgrade():
+    raise NotImplementedError(
+        "Shared contents can't be split back into per-document files - restore a backup taken before the upgrade"
+    )
@@ -0,0 +1,53 @@
+"""Contentless keyword index with chunk positions in page_chunks
+
+The FTS5 table used to store every chunk's text a second time. It is
+replaced by a contentless one; page_chunks keeps each chunk's position in
+its page and provides the rowids. The new index starts empty - run
+app.cli.index_pages afterwards.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Same as lexical_service.CREATE_FTS_TABLE at this revision
+CREATE_FTS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS page_chunks_fts USING fts5(
+    text,
+    content_id,
+    content = '',
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+
+def upgrade():
+    op.create_table(
+        "page_chunks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content_id", sa.String(36), sa.ForeignKey("document_contents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("chunk_id", sa.String(100), nullable=False),
+        sa.Column("page_number", sa.Integer(), nullable=False),
+        sa.Column("chunk_index", sa.Integer(), nullable=False),
+        sa.Column("start_char", sa.Integer(), nullable=False),
+        sa.Column("end_char", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_page_chunks_content_id", "page_chunks", ["content_id"])
+    
+    op.execute("DROP TABLE IF EXISTS page_chunks_fts")
+    op.execute(CREATE_FTS_TABLE)
+
+
+def downgrade():
+    # init_db recreates the old index (empty) - run app.cli.index_pages at that revision
+    op.execute("DROP TABLE IF EXISTS page_chunks_fts")
+    op.drop_index("ix_page_chunks_content_id", table_name="page_chunks")
+    op.drop_table("page_chunks")
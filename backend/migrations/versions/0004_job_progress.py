@@ -0,0 +1,28 @@
+"""Progress snapshots on ingestion jobs
+
+Workers store the latest progress of a running job in
+ingestion_jobs.progress, so progress streams served by other processes
+can report it.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("ingestion_jobs") as batch:
+        batch.add_column(sa.Column("progress", sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("ingestion_jobs") as batch:
+        batch.drop_column("progress")
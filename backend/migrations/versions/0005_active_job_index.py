@@ -0,0 +1,41 @@
+"""One active ingestion job per content
+
+Startup recovery in several processes at once could queue the same
+content twice. Duplicate active jobs that hold no reference to a previous
+version are dropped (the oldest job, or the one holding a reference,
+stays), then a partial unique index on content_id over pending and
+running jobs prevents new ones.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "DELETE FROM ingestion_jobs "
+        "WHERE status IN ('pending', 'running') AND source_content_id IS NULL AND EXISTS ("
+        "SELECT 1 FROM ingestion_jobs AS other "
+        "WHERE other.content_id = ingestion_jobs.content_id AND other.status IN ('pending', 'running') "
+        "AND (other.source_content_id IS NOT NULL OR other.id < ingestion_jobs.id))"
+    )
+    op.create_index(
+        "ix_ingestion_jobs_active_content",
+        "ingestion_jobs",
+        ["content_id"],
+        unique=True,
+        sqlite_where=sa.text("status IN ('pending', 'running')")
+    )
+
+
+def downgrade():
+    op.drop_index("ix_ingestion_jobs_active_content", table_name="ingestion_jobs")
@@ -0,0 +1,28 @@
+"""Vector versions on shared content
+
+Every write to a content's vectors bumps document_contents.vector_version.
+Cached search results are keyed on the versions of their contents, so a
+write made by any process (API, standalone worker, CLI) invalidates them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("document_contents") as batch:
+        batch.add_column(sa.Column("vector_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("document_contents") as batch:
+        batch.drop_column("vector_version")
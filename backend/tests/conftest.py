@@ -0,0 +1,74 @@
+"""
+Test setup
+Points the app at a throwaway database, media folder and vector store
+
+The environment is set before anything from app is imported, since the
+settings and the database engine are created at import time. Vector
+tests embed with a word-hash function instead of the embedding model,
+which would be downloaded on first use.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+TEST_ROOT = Path(tempfile.mkdtemp(prefix="mentora-tests-"))
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{TEST_ROOT / 'mentora.db'}",
+    "MEDIA_ROOT": str(TEST_ROOT / "media"),
+    "DOCUMENTS_PATH": str(TEST_ROOT / "media" / "documents"),
+    "AVATARS_PATH": str(TEST_ROOT / "media" / "avatars"),
+    "VECTOR_DB_PATH": str(TEST_ROOT / "vector_db"),
+    "DEBUG": "false",  # No SQL echo
+})
+
+import pytest
+from chromadb.utils.embedding_functions import EmbeddingFunction
+
+from app.db.database import AsyncSessionLocal, engine, init_db
+from app.services import vector_service as vector_service_module
+
+
+@pytest.fixture(scope="session", autouse=True)
+async def database():
+    """Create the schema once for the whole run, remove everything afterwards"""
+    await init_db()
+    yield
+    await engine.dispose()
+    shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+
+@pytest.fixture
+async def db():
+    """Database session, rolled back if a test leaves it uncommitted"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+class WordHashEmbeddingFunction(EmbeddingFunction):
+    """Deterministic embeddings - texts sharing words are close, so rankings are predictable"""
+    
+    dimensions = 64
+    
+    def __call__(self, input):
+        embeddings = []
+        for text in input:
+            vector = [0.0] * self.dimensions
+            for word in re.findall(r"\w+", text.lower()):
+                vector[hashlib.sha256(word.encode()).digest()[0] % self.dimensions] += 1.0
+            norm = sum(value * value for value in vector) ** 0.5 or 1.0
+            embeddings.append([value / norm for value in vector])
+        return embeddings
+
+
+@pytest.fixture
+def vector_service(monkeypatch):
+    """The VectorService singleton, on the test vector store with word-hash embeddings"""
+    service = vector_service_module.VectorService()
+    service.embedding_function = WordHashEmbeddingFunction()
+    monkeypatch.setattr(vector_service_module, "_vector_service", service)
+    return service
@@ -0,0 +1,67 @@
+import uuid
+
+from app.cli.rechunk import rechunk_content
+from app.services import lexical_service
+from app.services.chunking_service import Chunk, chunk_page, chunk_pages, count_tokens
+from app.services.content_service import bulk_insert_pages
+from app.services.vector_service import make_chunk_id
+
+TEXT = "Eigenvalues of a symmetric matrix are real. Its eigenvectors, for distinct eigenvalues, are orthogonal."
+
+
+def test_chunk_offsets_point_into_the_page_text():
+    chunks = chunk_page(7, TEXT, chunk_size=6, overlap=2)
+    
+    assert [chunk.chunk_index for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk.page_number == 7
+        assert chunk.text == TEXT[chunk.start_char:chunk.end_char]
+        assert count_tokens(chunk.text) <= 6
+    # The chunks cover the whole page, neighbours sharing two tokens
+    assert chunks[0].start_char == 0
+    assert chunks[-1].end_char == len(TEXT)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert count_tokens(TEXT[chunk.start_char:previous.end_char]) == 2
+
+
+def test_short_and_blank_pages():
+    assert chunk_page(1, "Short page.", chunk_size=50) == [Chunk(1, 0, 0, 11, "Short page.")]
+    assert chunk_page(1, "  \n ") == []
+    assert chunk_page(1, None) == []
+
+
+def test_chunks_never_cross_pages():
+    chunks = chunk_pages([{"page_number": 1, "content": "a b c"}, {"page_number": 2, "content": "d e"}])
+    
+    assert {(chunk.page_number, chunk.text) for chunk in chunks} == {(1, "a b c"), (2, "d e")}
+
+
+async def test_rechunk_replaces_page_vectors_with_chunks(db, vector_service):
+    content_id = str(uuid.uuid4())
+    pages = [(1, TEXT), (2, "Integration by parts follows from the product rule.")]
+    await bulk_insert_pages(db, content_id, pages)
+    await db.commit()
+    
+    # Vectors from before chunking - one per page
+    vector_service.get_partition(content_id, create=True).upsert(
+        ids=[f"content_{content_id}_page_{number}" for number, _ in pages],
+        documents=[text for _, text in pages],
+        metadatas=[{"content_id": content_id, "page_number": number} for number, _ in pages]
+    )
+    
+    assert await rechunk_content(content_id)
+    
+    expected = {
+        make_chunk_id(content_id, chunk)
+        for chunk in chunk_pages([{"page_number": number, "content": text} for number, text in pages])
+    }
+    assert set(await vector_service.get_ids(content_id)) == expected
+    # The keyword index uses the same chunks
+    results = await lexical_service.search(db, "product rule", [content_id])
+    assert [result["id"] for result in results] == [
+        make_chunk_id(content_id, chunk) for chunk in chunk_page(2, pages[1][1])
+    ]
+    
+    # Already chunked - skipped unless forced
+    assert not await rechunk_content(content_id)
+    assert await rechunk_content(content_id, force=True)
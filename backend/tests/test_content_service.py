@@ -0,0 +1,82 @@
+import hashlib
+import uuid
+
+from sqlalchemy import select
+
+from app.db.hooks import wait_for_callbacks
+from app.models.document import DocumentContent, Page
+from app.services.content_service import acquire_content, bulk_insert_pages, release_content
+from app.services.pdf_service import SavedUpload
+from app.services.storage_service import get_storage
+
+
+def _pdf_bytes() -> bytes:
+    return b"%PDF-1.4\n" + uuid.uuid4().bytes
+
+
+def _save(tmp_path, data: bytes) -> SavedUpload:
+    """A saved upload, as save_uploaded_file leaves it"""
+    path = tmp_path / f"{uuid.uuid4().hex}.pdf"
+    path.write_bytes(data)
+    return SavedUpload(str(path), len(data), hashlib.sha256(data).hexdigest())
+
+
+async def test_identical_uploads_share_one_content(db, tmp_path):
+    data = _pdf_bytes()
+    first_upload, second_upload = _save(tmp_path, data), _save(tmp_path, data)
+    
+    first, created = await acquire_content(db, first_upload)
+    assert created
+    second, created = await acquire_content(db, second_upload)
+    await db.commit()
+    
+    assert not created
+    assert second.id == first.id
+    assert second.ref_count == 2
+    assert await get_storage().exists(first.file_path)
+    # The duplicate is deleted, the first copy moved into storage
+    assert not any(tmp_path.iterdir())
+
+
+async def test_release_keeps_content_until_the_last_reference(db, tmp_path):
+    data = _pdf_bytes()
+    content, _ = await acquire_content(db, _save(tmp_path, data))
+    await acquire_content(db, _save(tmp_path, data))
+    await bulk_insert_pages(db, content.id, [(1, "First page"), (2, "Second page")])
+    await db.commit()
+    
+    assert await release_content(db, content.id) is None
+    await db.commit()
+    assert (await db.get(DocumentContent, content.id, populate_existing=True)).ref_count == 1
+    
+    assert await release_content(db, content.id) is not None
+    await db.commit()
+    await wait_for_callbacks()
+    
+    assert await db.get(DocumentContent, content.id) is None
+    assert (await db.execute(select(Page.id).where(Page.content_id == content.id))).first() is None
+    assert not await get_storage().exists(content.file_path)
+
+
+async def test_released_file_stays_until_commit(db, tmp_path):
+    content, _ = await acquire_content(db, _save(tmp_path, _pdf_bytes()))
+    content_id, file_path = content.id, content.file_path
+    await db.commit()
+    
+    assert await release_content(db, content_id) is not None
+    await db.rollback()
+    await wait_for_callbacks()
+    
+    assert await db.scalar(select(DocumentContent.ref_count).where(DocumentContent.id == content_id)) == 1
+    assert await get_storage().exists(file_path)
+
+
+async def test_uncommitted_upload_removes_its_file(db, tmp_path):
+    content, created = await acquire_content(db, _save(tmp_path, _pdf_bytes()))
+    file_path = content.file_path
+    assert created and await get_storage().exists(file_path)
+    
+    await db.rollback()
+    await wait_for_callbacks()
+    
+    assert not await get_storage().exists(file_path)
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import uuid
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import delete, select
+
+from app.api.routes import documents
+from app.core.config import settings
+from app.db.hooks import wait_for_callbacks
+from app.models.document import Document, DocumentContent, Page
+from app.models.ingestion import IngestionJob
+from app.models.user import User
+from app.services.content_service import bulk_insert_pages
+from app.services.ingestion_service import claim_next_job, run_job
+from app.services.storage_service import get_storage, shard_key
+from benchmarks.pdf_factory import make_pdf
+
+
+def _upload(filename: str, data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), size=len(data), filename=filename)
+
+
+def _stored_files():
+    return {path for path in settings.DOCUMENTS_PATH.rglob("*") if path.is_file()}
+
+
+def _pdf_bytes() -> bytes:
+    return b"%PDF-1.4\n" + uuid.uuid4().bytes
+
+
+async def _user(db) -> User:
+    name = uuid.uuid4().hex[:12]
+    user = User(username=name, email=f"{name}@example.com", hashed_password="x")
+    db.add(user)
+    await db.commit()
+    return user
+
+
+async def test_batch_reports_rejected_files(db):
+    user = await _user(db)
+    
+    response = await documents.upload_documents_batch(
+        files=[_upload("notes.txt", b"plain text"), _upload("fake.pdf", b"not a pdf"), _upload("real.pdf", _pdf_bytes())],
+        current_user=user,
+        db=db
+    )
+    
+    assert response["message"] == "1 of 3 files uploaded"
+    assert [result["status"] for result in response["files"]] == ["rejected", "rejected", "queued"]
+    assert response["files"][1]["error"] == "File is not a valid PDF"
+    assert response["files"][2]["job_id"] is not None
+
+
+async def test_failed_batch_removes_saved_files(db, monkeypatch):
+    user = await _user(db)
+    first, second = _pdf_bytes(), _pdf_bytes()
+    saved_before = _stored_files()
+    
+    acquire_content = documents.acquire_content
+    calls = []
+    
+    async def failing_acquire_content(session, saved):
+        calls.append(saved)
+        if len(calls) == 2:
+            raise RuntimeError("database is locked")
+        return await acquire_content(session, saved)
+    
+    monkeypatch.setattr(documents, "acquire_content", failing_acquire_content)
+    
+    with pytest.raises(RuntimeError):
+        await documents.upload_documents_batch(
+            files=[_upload("first.pdf", first), _upload("second.pdf", second)],
+            current_user=user,
+            db=db
+        )
+    await wait_for_callbacks()
+    
+    assert _stored_files() == saved_before
+    digests = [hashlib.sha256(data).hexdigest() for data in (first, second)]
+    assert (await db.scalars(select(DocumentContent).where(DocumentContent.sha256.in_(digests)))).all() == []
+    # The first file had already been moved into storage
+    first_key = shard_key("documents", f"{digests[0]}.pdf", digest=digests[0])
+    assert not await get_storage().exists(first_key)
+
+
+class CountingEmbeddingFunction:
+    """Wraps an embedding function and records the texts it embedded"""
+    
+    def __init__(self, embedding_function):
+        self.embedding_function = embedding_function
+        self.texts = []
+    
+    def __call__(self, input):
+        self.texts.extend(input)
+        return self.embedding_function(input)
+
+
+async def _run_queued_job(db):
+    job = await claim_next_job(db, "test-worker")
+    await run_job(job, "test-worker")
+    await wait_for_callbacks()
+
+
+async def test_replace_embeds_only_changed_pages(db, vector_service, tmp_path):
+    await db.execute(delete(IngestionJob))  # Claims only see this test's jobs
+    user = await _user(db)
+    # Same seed: the second version repeats the first four pages and adds one
+    first = make_pdf(tmp_path / "v1.pdf", 4, lines_per_page=10, seed=7).read_bytes()
+    second = make_pdf(tmp_path / "v2.pdf", 5, lines_per_page=10, seed=7).read_bytes()
+    
+    response = await documents.upload_document(file=_upload("notes.pdf", first), current_user=user, db=db)
+    await _run_queued_job(db)
+    document_id = response["document"].id
+    previous_content_id = (await db.get(Document, document_id)).content_id
+    
+    embedding_function = CountingEmbeddingFunction(vector_service.embedding_function)
+    vector_service.embedding_function = embedding_function
+    response = await documents.replace_document_file(
+        document_id=document_id, file=_upload("notes-v2.pdf", second), current_user=user, db=db
+    )
+    assert response["job_id"] is not None
+    await _run_queued_job(db)
+    
+    document = await db.get(Document, document_id, populate_existing=True)
+    assert document.content_id != previous_content_id
+    assert document.total_pages == 5
+    assert document.processing_status == "ready"
+    
+    # Only the new page was embedded
+    pages = (await db.execute(
+        select(Page.content, Page.is_embedded).where(Page.content_id == document.content_id).order_by(Page.page_number)
+    )).all()
+    assert all(page.is_embedded for page in pages)
+    assert embedding_function.texts
+    assert all(text in pages[4].content for text in embedding_function.texts)
+    assert {metadata["page_number"] for metadata in vector_service.get_partition(document.content_id).get()["metadatas"]} == {1, 2, 3, 4, 5}
+    
+    # The previous version was only used by this document
+    assert await db.get(DocumentContent, previous_content_id, populate_existing=True) is None
+    assert vector_service.get_partition(previous_content_id) is None
+
+
+async def test_replace_with_the_same_file_changes_nothing(db):
+    user = await _user(db)
+    data = _pdf_bytes()
+    response = await documents.upload_document(file=_upload("notes.pdf", data), current_user=user, db=db)
+    
+    response = await documents.replace_document_file(
+        document_id=response["document"].id, file=_upload("again.pdf", data), current_user=user, db=db
+    )
+    
+    assert response["message"] == "File unchanged"
+    assert response["job_id"] is None
+
+
+async def test_pages_are_read_in_windows(db, monkeypatch):
+    monkeypatch.setattr(settings, "READER_MAX_PAGES_PER_REQUEST", 3)
+    user = await _user(db)
+    content = DocumentContent(sha256=uuid.uuid4().hex, file_path="documents/x.pdf", total_pages=7, ref_count=1)
+    db.add(content)
+    await db.flush()
+    document = Document(user_id=user.id, content_id=content.id, title="notes.pdf", total_pages=7)
+    db.add(document)
+    await bulk_insert_pages(db, content.id, [(number, f"Page {number}") for number in range(1, 8)])
+    await db.commit()
+    
+    async def read(from_page, to_page=None):
+        response = await documents.get_document_pages(
+            document_id=document.id, from_page=from_page, to_page=to_page, current_user=user, db=db
+        )
+        return [page["page_number"] for page in response["pages"]], response["next_from"]
+    
+    assert await read(1) == ([1, 2, 3], 4)
+    assert await read(4) == ([4, 5, 6], 7)
+    assert await read(7) == ([7], None)
+    assert await read(2, 3) == ([2, 3], None)
+    assert await read(6, 50) == ([6, 7], None)  # Clamped to the page count
+    assert await read(9) == ([], None)
@@ -0,0 +1,100 @@
+import sqlite3
+
+from app.services import embedding_cache
+from app.services.embedding_cache import EmbeddingCache, normalize_query
+
+
+class FakeModel:
+    """Embedding function that records its calls - vectors are exact in float32"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [[len(text) / 4, 0.5, -1.0] for text in input]
+
+
+class OtherModel(FakeModel):
+    pass
+
+
+def _disk_rows(path):
+    with sqlite3.connect(str(path)) as connection:
+        return dict(connection.execute("SELECT query, used_at FROM embeddings").fetchall())
+
+
+def test_normalize_query():
+    assert normalize_query("  What IS\ta  Group?\n") == "what is a group?"
+    assert normalize_query("ﬁnite") == "finite"  # NFKC folds the ligature
+
+
+def test_misses_are_embedded_once_in_one_call():
+    cache = EmbeddingCache(max_bytes=1024 * 1024)
+    model = FakeModel()
+    
+    first = cache.embed(["Limits", "limits ", "Series"], model)
+    second = cache.embed(["SERIES", "Proofs"], model)
+    
+    assert model.calls == [["limits", "series"], ["proofs"]]
+    assert first[0] == first[1] == [1.5, 0.5, -1.0]
+    assert second[0] == first[2]
+    assert cache.metrics()["hits"] == 1
+
+
+def test_memory_tier_is_bounded():
+    cache = EmbeddingCache(max_bytes=2 * (3 * 4 + 1))  # Two 3-float vectors with 1-char keys
+    model = FakeModel()
+    cache.embed(["a", "b"], model)
+    cache.embed(["a"], model)
+    cache.embed(["c"], model)
+    
+    cache.embed(["a", "b"], model)
+    
+    assert model.calls[-1] == ["b"]  # Least recently used
+    assert cache.size <= cache.max_bytes
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = tmp_path / "embeddings.db"
+    model = FakeModel()
+    vectors = EmbeddingCache(max_bytes=1024, disk_path=path).embed(["What is a ring?"], model)
+    
+    restarted = EmbeddingCache(max_bytes=1024, disk_path=path)
+    assert restarted.embed(["what is a RING?"], model) == vectors
+    assert len(model.calls) == 1
+    assert restarted.metrics()["disk_hits"] == 1
+    
+    # Another model never gets these vectors
+    other = OtherModel()
+    restarted.embed(["What is a ring?"], other)
+    assert other.calls == [["what is a ring?"]]
+
+
+def test_disk_hits_save_access_times_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "TOUCH_FLUSH_INTERVAL", 2)
+    path = tmp_path / "embeddings.db"
+    model = FakeModel()
+    EmbeddingCache(max_bytes=1024, disk_path=path).embed(["a", "b"], model)
+    written = _disk_rows(path)
+    
+    cache = EmbeddingCache(max_bytes=1024, disk_path=path)
+    cache.embed(["a"], model)
+    assert _disk_rows(path) == written  # Not saved yet
+    cache.embed(["b"], model)
+    
+    rows = _disk_rows(path)
+    assert rows["a"] > written["a"] and rows["b"] > written["b"]
+
+
+def test_disk_tier_drops_least_recently_used_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "TRIM_INTERVAL", 1)
+    path = tmp_path / "embeddings.db"
+    model = FakeModel()
+    row_bytes = 3 * 4 + 1
+    cache = EmbeddingCache(max_bytes=1024, disk_path=path, disk_max_bytes=3 * row_bytes)
+    
+    for key in "abcde":
+        cache.embed([key], model)
+    
+    assert set(_disk_rows(path)) == {"c", "d", "e"}
@@ -0,0 +1,37 @@
+import pytest
+
+from app.api.file_responses import RangeNotSatisfiable, parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-499", (0, 499)),
+    ("bytes=500-", (500, 999)),
+    ("bytes=-200", (800, 999)),
+    ("bytes=-5000", (0, 999)),  # Suffix longer than the file - whole file
+    ("bytes=900-5000", (900, 999)),  # End clamped to the last byte
+    ("Bytes = 0-0", (0, 0)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-10",  # Other unit
+    "bytes=0-10,20-30",  # Several ranges
+    "bytes=abc-",
+    "bytes=5",
+    "bytes=-",
+    "bytes=10-5",  # End before start
+])
+def test_parse_range_ignored(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
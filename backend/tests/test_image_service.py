@@ -0,0 +1,60 @@
+import asyncio
+import io
+import os
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfWriter
+
+from app.core.config import settings
+from app.services import pdf_service
+from app.services.image_service import ImageProcessingError, render_avatar
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def _break_process_pool():
+    """Kill a worker of the shared pool, as the OOM killer would"""
+    with pytest.raises(pdf_service.BrokenProcessPool):
+        await asyncio.wrap_future(pdf_service.get_process_pool().submit(os._exit, 1))
+
+
+async def test_render_avatar_variants():
+    variants = await render_avatar(_png(400, 300))
+    
+    assert sorted(variants) == sorted(settings.AVATAR_SIZES)
+    for size, data in variants.items():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            assert image.size == (size, size)
+
+
+async def test_render_avatar_rejects_non_images():
+    with pytest.raises(ImageProcessingError):
+        await render_avatar(b"not an image")
+
+
+async def test_render_avatar_restarts_broken_pool():
+    await _break_process_pool()
+    broken = pdf_service.get_process_pool()
+    
+    variants = await render_avatar(_png(64, 64))
+    
+    assert sorted(variants) == sorted(settings.AVATAR_SIZES)
+    assert pdf_service.get_process_pool() is not broken
+
+
+async def test_extract_pdf_text_restarts_broken_pool(tmp_path):
+    pdf_path = tmp_path / "blank.pdf"
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    writer.add_blank_page(width=200, height=200)
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+    await _break_process_pool()
+    
+    assert await pdf_service.extract_pdf_text(str(pdf_path)) == ["", ""]
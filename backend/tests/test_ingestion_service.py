@@ -0,0 +1,141 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.core.config import settings
+from app.models.document import DocumentContent, Page
+from app.models.ingestion import IngestionJob
+from app.services.ingestion_service import (
+    JobCancelled,
+    _renew_lease,
+    _run_while_leased,
+    _store_page_batch,
+    claim_next_job,
+    enqueue_content,
+    enqueue_if_idle,
+    fail_exhausted_jobs
+)
+
+
+@pytest.fixture
+async def content(db):
+    """New content with an empty queue - claims only see this test's jobs"""
+    await db.execute(delete(IngestionJob))
+    content = DocumentContent(sha256=uuid.uuid4().hex, file_path=f"documents/{uuid.uuid4().hex}.pdf", ref_count=1)
+    db.add(content)
+    await db.commit()
+    return content
+
+
+async def _enqueue(db, content, **values) -> IngestionJob:
+    job = enqueue_content(db, content)
+    for key, value in values.items():
+        setattr(job, key, value)
+    await db.commit()
+    return job
+
+
+async def test_claim_takes_a_lease(db, content):
+    job = await _enqueue(db, content)
+    
+    claimed = await claim_next_job(db, "worker-a")
+    
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.lease_owner == "worker-a"
+    assert claimed.attempts == 1
+    assert claimed.lease_expires_at > datetime.utcnow()
+    assert await claim_next_job(db, "worker-b") is None
+
+
+async def test_job_is_not_claimed_before_run_after(db, content):
+    await _enqueue(db, content, run_after=datetime.utcnow() + timedelta(minutes=5))
+    
+    assert await claim_next_job(db, "worker-a") is None
+
+
+async def test_expired_lease_is_reclaimed(db, content):
+    job = await _enqueue(db, content)
+    await claim_next_job(db, "worker-a")
+    
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    await db.commit()
+    
+    claimed = await claim_next_job(db, "worker-b")
+    assert claimed.id == job.id
+    assert claimed.lease_owner == "worker-b"
+    assert claimed.attempts == 2
+
+
+async def test_expired_lease_after_last_attempt_fails_the_job(db, content):
+    job = await _enqueue(db, content, max_attempts=1)
+    await claim_next_job(db, "worker-a")
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    await db.commit()
+    
+    assert await claim_next_job(db, "worker-b") is None
+    assert await fail_exhausted_jobs(db) == 1
+    
+    await db.refresh(job)
+    await db.refresh(content)
+    assert job.status == "failed"
+    assert job.lease_owner is None
+    assert job.last_error == "Worker lease expired"
+    assert content.processing_status == "failed"
+
+
+async def test_enqueue_if_idle_keeps_one_active_job(db, content):
+    assert await enqueue_if_idle(db, content)
+    assert not await enqueue_if_idle(db, content)
+    await db.commit()
+    
+    jobs = await db.scalar(select(func.count()).select_from(IngestionJob).where(IngestionJob.content_id == content.id))
+    assert jobs == 1
+
+
+async def test_storing_pages_of_deleted_content_is_cancelled(db, content):
+    await db.delete(content)
+    await db.commit()
+    
+    with pytest.raises(JobCancelled):
+        await _store_page_batch(db, content, [(1, "First page")])
+    await db.rollback()
+    
+    assert (await db.execute(select(Page.id).where(Page.content_id == content.id))).first() is None
+
+
+async def test_lease_renewal_ends_when_the_job_is_gone(db, content, monkeypatch):
+    monkeypatch.setattr(settings, "INGESTION_LEASE_SECONDS", 3)  # Renewed every second
+    job = await _enqueue(db, content)
+    await claim_next_job(db, "worker-a")
+    
+    heartbeat = asyncio.create_task(_renew_lease(job.id, "worker-a"))
+    await asyncio.sleep(1.2)
+    assert not heartbeat.done()
+    
+    await db.delete(job)
+    await db.commit()
+    await asyncio.wait_for(heartbeat, timeout=3)
+
+
+async def test_work_is_cancelled_when_the_lease_is_lost():
+    cancelled = asyncio.Event()
+    
+    async def work():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    lost_lease = asyncio.create_task(asyncio.sleep(0))
+    with pytest.raises(JobCancelled):
+        await _run_while_leased(work(), lost_lease)
+    assert cancelled.is_set()
+    
+    heartbeat = asyncio.create_task(asyncio.sleep(60))
+    assert await _run_while_leased(asyncio.sleep(0, result="done"), heartbeat) == "done"
+    heartbeat.cancel()
@@ -0,0 +1,79 @@
+import uuid
+
+from sqlalchemy import func, select, text
+
+from app.models.document import PageChunk
+from app.services import lexical_service
+from app.services.content_service import bulk_insert_pages
+
+PAGES = [
+    (1, "The mean value theorem relates a function's average rate of change to its derivative."),
+    (2, "Integration by parts follows from the product rule."),
+]
+
+
+async def _store(db, pages=PAGES) -> str:
+    content_id = str(uuid.uuid4())
+    await bulk_insert_pages(db, content_id, pages)
+    await lexical_service.index_pages(db, content_id, pages)
+    await db.commit()
+    return content_id
+
+
+async def _chunk_rows(db, content_id) -> int:
+    return await db.scalar(select(func.count()).select_from(PageChunk).where(PageChunk.content_id == content_id))
+
+
+def test_match_query_quotes_every_term():
+    assert lexical_service.build_match_query('NEAR(a b) OR "x" -y') == '"near" OR "a" OR "b" OR "or" OR "x" OR "y"'
+    assert lexical_service.build_match_query("?!") == ""
+
+
+async def test_search_returns_chunk_text_from_the_page(db):
+    content_id = await _store(db)
+    
+    results = await lexical_service.search(db, "integration parts", [content_id])
+    
+    assert [result["metadata"]["page_number"] for result in results] == [2]
+    assert results[0]["content"] == PAGES[1][1]
+    assert results[0]["id"] == f"content_{content_id}_page_2_chunk_0"
+    assert results[0]["bm25"] < 0
+
+
+async def test_search_is_scoped_to_the_given_contents(db):
+    mine = await _store(db)
+    other = await _store(db, [(1, "Integration by substitution")])
+    
+    results = await lexical_service.search(db, "integration", [mine])
+    
+    assert {result["metadata"]["content_id"] for result in results} == {mine}
+    assert await lexical_service.search(db, "integration", []) == []
+    assert len(await lexical_service.search(db, "integration", [mine, other])) == 2
+
+
+async def test_delete_content_removes_its_chunks_only(db):
+    deleted = await _store(db)
+    kept = await _store(db)
+    
+    await lexical_service.delete_content(db, deleted)
+    await db.commit()
+    
+    assert await lexical_service.search(db, "theorem", [deleted]) == []
+    assert not await lexical_service.is_indexed(db, deleted)
+    assert await _chunk_rows(db, deleted) == 0
+    assert len(await lexical_service.search(db, "theorem", [kept])) == 1
+    # Deletes were given the indexed text - the index is consistent
+    await db.execute(text(
+        f"INSERT INTO {lexical_service.FTS_TABLE} ({lexical_service.FTS_TABLE}) VALUES ('integrity-check')"
+    ))
+
+
+async def test_reindex_replaces_the_rows(db):
+    content_id = await _store(db)
+    chunks = await _chunk_rows(db, content_id)
+    
+    assert await lexical_service.reindex_content(db, content_id, batch_size=1) == chunks
+    await db.commit()
+    
+    assert await _chunk_rows(db, content_id) == chunks
+    assert len(await lexical_service.search(db, "derivative", [content_id])) == 1
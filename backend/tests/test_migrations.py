@@ -0,0 +1,112 @@
+import hashlib
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import _migrate
+from app.models.document import Document, DocumentContent, Page
+from app.services.ingestion_service import claim_next_job
+
+# Tables of the baseline revision (0001) that the migrations touch, as create_all made them
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE users (
+        id INTEGER NOT NULL,
+        username VARCHAR(50) NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        hashed_password VARCHAR(255) NOT NULL,
+        first_name VARCHAR(50),
+        last_name VARCHAR(50),
+        bio TEXT,
+        phone VARCHAR(20),
+        avatar VARCHAR(255),
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE documents (
+        id VARCHAR(36) NOT NULL,
+        user_id INTEGER NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        file_path VARCHAR(500) NOT NULL,
+        total_pages INTEGER,
+        file_size INTEGER,
+        is_processed BOOLEAN,
+        is_embedded BOOLEAN,
+        upload_date DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE pages (
+        id INTEGER NOT NULL,
+        document_id VARCHAR(36) NOT NULL,
+        page_number INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(document_id) REFERENCES documents (id) ON DELETE CASCADE
+    )
+    """,
+]
+
+
+def _baseline_database(tmp_path):
+    """Baseline database with one processed and one unprocessed document"""
+    processed, unprocessed = tmp_path / "processed.pdf", tmp_path / "unprocessed.pdf"
+    processed.write_bytes(b"%PDF-1.4 processed")
+    unprocessed.write_bytes(b"%PDF-1.4 unprocessed")
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'ada', 'ada@example.com', 'x')"
+        ))
+        connection.execute(
+            text(
+                "INSERT INTO documents (id, user_id, title, file_path, total_pages, is_processed, is_embedded) "
+                "VALUES (:id, 1, :id, :file_path, :pages, :done, :done)"
+            ),
+            [
+                {"id": "doc-processed", "file_path": str(processed), "pages": 2, "done": True},
+                {"id": "doc-unprocessed", "file_path": str(unprocessed), "pages": 0, "done": False},
+            ]
+        )
+        connection.execute(text(
+            "INSERT INTO pages (document_id, page_number, content) VALUES "
+            "('doc-processed', 1, 'First page'), ('doc-processed', 2, 'Second page')"
+        ))
+    return engine
+
+
+async def test_baseline_database_is_migrated(tmp_path):
+    engine = _baseline_database(tmp_path)
+    with engine.begin() as connection:
+        _migrate(connection)
+    engine.dispose()
+    
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'baseline.db'}")
+    async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+        documents = {document.id: document for document in (await db.execute(Document.__table__.select())).all()}
+        contents = {content.id: content for content in (await db.execute(DocumentContent.__table__.select())).all()}
+        pages = (await db.execute(Page.__table__.select().order_by(Page.page_number))).all()
+        
+        processed = contents[documents["doc-processed"].content_id]
+        assert processed.sha256 == hashlib.sha256(b"%PDF-1.4 processed").hexdigest()
+        assert processed.processing_status == "ready"
+        assert processed.ref_count == 1
+        assert [(page.content_id, page.page_number) for page in pages] == [(processed.id, 1), (processed.id, 2)]
+        assert pages[0].word_count == 2
+        
+        # The unprocessed document's backfilled job can be claimed
+        queued = documents["doc-unprocessed"].content_id
+        assert contents[queued].processing_status == "queued"
+        job = await claim_next_job(db, "worker-a")
+        assert job is not None
+        assert job.content_id == queued
+    await async_engine.dispose()
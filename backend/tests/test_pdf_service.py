@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import io
+import time
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.chunking_service import count_tokens
+from app.services.pdf_service import (
+    PdfParseError,
+    PdfSandbox,
+    TextNormalizer,
+    UploadRejectedError,
+    find_boilerplate_lines,
+    normalize_text,
+    resource,
+    save_uploaded_file
+)
+
+
+def _upload(data: bytes, size_known: bool = True) -> UploadFile:
+    return UploadFile(io.BytesIO(data), size=len(data) if size_known else None, filename="notes.pdf")
+
+
+def _page(number: int, body: str) -> str:
+    return f"Linear Algebra - Lecture Notes\n{body}\nfirst line of the page\nsecond line of the page\nPage {number} of 40"
+
+
+def test_normalize_text_joins_hyphenated_words_and_collapses_spaces():
+    assert normalize_text("Intro-\nduction   to   graphs\n\n\n\n12") == "Introduction to graphs\n\n12"
+    # Hyphens before a capital (names, list items) are kept
+    assert normalize_text("Jean-\nPaul  ") == "Jean-\nPaul"
+
+
+def test_running_headers_and_footers_are_found_and_stripped():
+    pages = [_page(number, f"Body text of page {number} about eigenvalues.") for number in range(1, 6)]
+    
+    boilerplate = find_boilerplate_lines(pages, min_ratio=0.6, edge_lines=1)
+    
+    assert boilerplate == {"linear algebra - lecture notes", "page # of #"}
+    assert normalize_text(pages[2], boilerplate, edge_lines=1) == (
+        "Body text of page 3 about eigenvalues.\nfirst line of the page\nsecond line of the page"
+    )
+
+
+def test_too_few_pages_have_no_boilerplate():
+    assert find_boilerplate_lines([_page(1, "a"), _page(2, "b")]) == set()
+
+
+def test_normalizer_counts_what_it_removed():
+    raw = "Header\n" + "word   " * 10 + "\n\n\n\nFooter 1"
+    normalizer = TextNormalizer({"header"})
+    
+    (page_number, clean), = normalizer.normalize_batch([(7, raw)])
+    
+    assert page_number == 7
+    assert normalizer.pages == 1
+    assert normalizer.chars_saved == len(raw) - len(clean) > 0
+    assert normalizer.tokens_saved == count_tokens(raw) - count_tokens(clean) == 1
+    assert "saved" in normalizer.summary() and "1 pages" in normalizer.summary()
+
+
+async def test_sandbox_workers_are_not_forked():
+    with PdfSandbox(max_workers=1) as sandbox:
+        assert sandbox._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert await sandbox.wait(asyncio.get_running_loop().run_in_executor(sandbox, pow, 2, 10)) == 1024
+
+
+async def test_sandbox_time_limit():
+    with PdfSandbox(max_workers=1, timeout=0.5) as sandbox:
+        started = time.monotonic()
+        with pytest.raises(PdfParseError, match="longer than 0.5 seconds"):
+            await sandbox.wait(asyncio.get_running_loop().run_in_executor(sandbox, time.sleep, 30))
+        assert time.monotonic() - started < 5
+
+
+@pytest.mark.skipif(resource is None, reason="No address-space limits on this platform")
+async def test_sandbox_memory_limit():
+    with PdfSandbox(max_workers=1, memory_limit_mb=64) as sandbox:
+        with pytest.raises(PdfParseError, match="more than 64 MB"):
+            await sandbox.wait(asyncio.get_running_loop().run_in_executor(sandbox, bytearray, 512 * 1024 * 1024))
+
+
+async def test_upload_is_saved_with_its_hash(tmp_path):
+    data = b"\n%PDF-1.7\n" + b"x" * 3000
+    
+    saved = await save_uploaded_file(_upload(data), tmp_path, max_size=4096)
+    
+    assert saved.size == len(data)
+    assert saved.sha256 == hashlib.sha256(data).hexdigest()
+    assert saved.path.endswith(".pdf")
+    assert [path.read_bytes() for path in tmp_path.iterdir()] == [data]
+
+
+@pytest.mark.parametrize("data, status_code, detail", [
+    (b"PK\x03\x04 renamed zip file", 400, "File is not a valid PDF"),
+    (b"", 400, "File is empty"),
+    (b"%PDF-1.4\n" + b"x" * 5000, 413, "File is larger than"),
+])
+@pytest.mark.parametrize("size_known", [True, False])
+async def test_rejected_upload_leaves_no_file(tmp_path, data, status_code, detail, size_known):
+    with pytest.raises(UploadRejectedError) as rejected:
+        await save_uploaded_file(_upload(data, size_known), tmp_path, max_size=4096)
+    
+    assert rejected.value.status_code == status_code
+    assert rejected.value.detail.startswith(detail)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,60 @@
+import sys
+import uuid
+
+from sqlalchemy import delete
+
+from app.models.document import Page
+from app.services.content_service import bulk_insert_pages
+from app.services.reader_service import PageCache, get_page_cache, read_pages
+
+
+async def _content_with_pages(db, page_numbers) -> str:
+    content_id = str(uuid.uuid4())
+    await bulk_insert_pages(db, content_id, [(number, f"Text of page {number}") for number in page_numbers])
+    await db.commit()
+    return content_id
+
+
+def _page(number: int, text: str = "x" * 100):
+    return {"page_number": number, "content": text, "word_count": 1}
+
+
+async def test_window_is_read_in_page_order(db):
+    content_id = await _content_with_pages(db, [1, 2, 3, 5, 6])
+    
+    pages = await read_pages(db, content_id, 2, 5)
+    
+    # Page 4 is not extracted yet
+    assert [page["page_number"] for page in pages] == [2, 3, 5]
+    assert pages[0] == {"page_number": 2, "content": "Text of page 2", "word_count": 4}
+
+
+async def test_cached_pages_are_served_from_memory(db):
+    content_id = await _content_with_pages(db, range(1, 7))
+    await read_pages(db, content_id, 1, 3)
+    
+    # Cached pages no longer need the database
+    await db.execute(delete(Page).where(Page.content_id == content_id, Page.page_number <= 3))
+    await db.commit()
+    
+    pages = await read_pages(db, content_id, 1, 5)
+    assert [page["page_number"] for page in pages] == [1, 2, 3, 4, 5]
+    
+    assert get_page_cache().invalidate(content_id) == 5
+    assert await read_pages(db, content_id, 1, 3) == []
+
+
+def test_cache_is_bounded_by_text_size():
+    size = sys.getsizeof("x" * 100)
+    cache = PageCache(max_bytes=size * 2)
+    for number in (1, 2):
+        cache.put("c1", _page(number))
+    cache.get("c1", 1)
+    cache.put("c1", _page(3))
+    
+    assert cache.get("c1", 2) is None  # Least recently used
+    assert cache.get("c1", 1) is not None
+    assert cache.size == size * 2
+    
+    cache.put("c1", _page(4, "x" * 1000))  # Larger than the whole cache
+    assert cache.get("c1", 4) is None
@@ -0,0 +1,115 @@
+import time
+import uuid
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.models.document import DocumentContent
+from app.services.result_cache import ResultCache, bump_version, make_key, read_versions
+
+
+def _result(chunk_id, content_id="c1", distance=0.5):
+    return {"id": chunk_id, "content": "chunk text", "metadata": {"content_id": content_id}, "distance": distance}
+
+
+async def _content(db) -> str:
+    content = DocumentContent(sha256=uuid.uuid4().hex, file_path="documents/test.pdf")
+    db.add(content)
+    await db.commit()
+    return content.id
+
+
+def test_hit_returns_the_ranking_without_text():
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    key = make_key("What is a group?", ["c1"], 5)
+    cache.put(key, [_result("a"), _result("b", distance=0.7)], (0,))
+    
+    assert cache.get(make_key("  what is a GROUP? ", ["c1"], 5), (0,)) == [
+        {"id": "a", "metadata": {"content_id": "c1"}, "distance": 0.5},
+        {"id": "b", "metadata": {"content_id": "c1"}, "distance": 0.7},
+    ]
+
+
+def test_entries_of_changed_contents_are_not_used():
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    key = make_key("q", ["c1", "c2"], 5)
+    cache.put(key, [_result("a")], (3, 7))
+    
+    assert cache.get(key, (3, 8)) is None
+    assert cache.get(key, (3, 7)) is None  # The stale entry was dropped
+
+
+def test_invalidate_drops_entries_of_the_content():
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    both = make_key("q", ["c1", "c2"], 5)
+    other = make_key("q", ["c2"], 5)
+    cache.put(both, [_result("a")], (0, 0))
+    cache.put(other, [_result("b", "c2")], (0,))
+    
+    assert cache.invalidate("c1") == 1
+    assert cache.get(both, (0, 0)) is None
+    assert cache.get(other, (0,)) is not None
+
+
+async def test_versions_are_read_in_key_order(db):
+    first, second = await _content(db), await _content(db)
+    await bump_version(second)
+    
+    key = make_key("q", [second, first, "missing"], 5)
+    expected = {first: 0, second: 1, "missing": None}
+    assert await read_versions(key[0]) == tuple(expected[content_id] for content_id in key[0])
+
+
+async def test_results_of_a_search_that_raced_a_write_are_not_used(db):
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    key = make_key("q", [await _content(db)], 5)
+    
+    versions = await read_versions(key[0])  # Search starts...
+    await bump_version(key[0][0])  # ...vectors are rewritten meanwhile...
+    cache.put(key, [_result("stale")], versions)  # ...and its results arrive
+    
+    assert cache.get(key, await read_versions(key[0])) is None
+    
+    versions = await read_versions(key[0])
+    cache.put(key, [_result("fresh")], versions)
+    assert [hit["id"] for hit in cache.get(key, await read_versions(key[0]))] == ["fresh"]
+
+
+async def test_writes_of_other_processes_invalidate(db):
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    content_id = await _content(db)
+    key = make_key("q", [content_id], 5)
+    cache.put(key, [_result("a")], await read_versions(key[0]))
+    
+    # A standalone worker re-embeds the content through its own connection
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+    with engine.begin() as connection:
+        connection.execute(
+            text("UPDATE document_contents SET vector_version = vector_version + 1 WHERE id = :id"),
+            {"id": content_id}
+        )
+    engine.dispose()
+    
+    assert cache.get(key, await read_versions(key[0])) is None
+
+
+def test_entries_expire(monkeypatch):
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    key = make_key("q", ["c1"], 5)
+    cache.put(key, [_result("a")], (0,))
+    
+    now = time.monotonic()
+    monkeypatch.setattr("app.services.result_cache.time.monotonic", lambda: now + 61)
+    assert cache.get(key, (0,)) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    keys = [make_key(query, ["c1"], 5) for query in ("a", "b", "c")]
+    for key in keys[:2]:
+        cache.put(key, [_result("x")], (0,))
+    cache.get(keys[0], (0,))
+    cache.put(keys[2], [_result("x")], (0,))
+    
+    assert cache.get(keys[1], (0,)) is None
+    assert cache.get(keys[0], (0,)) is not None
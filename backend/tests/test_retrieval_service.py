@@ -0,0 +1,35 @@
+from app.services.retrieval_service import reciprocal_rank_fusion
+
+
+def _ranking(*ids, source):
+    return [{"id": chunk_id, "source": source} for chunk_id in ids]
+
+
+def test_chunks_in_both_rankings_come_first():
+    fused = reciprocal_rank_fusion([
+        _ranking("a", "b", "c", source="vector"),
+        _ranking("c", "d", source="keyword"),
+    ], k=60)
+    
+    assert [result["id"] for result in fused] == ["c", "a", "b", "d"]
+    assert fused[0]["score"] == 1 / 63 + 1 / 61
+
+
+def test_first_ranking_provides_the_result():
+    fused = reciprocal_rank_fusion([
+        _ranking("a", source="vector"),
+        _ranking("a", source="keyword"),
+    ], k=60)
+    
+    assert fused == [{"id": "a", "source": "vector", "score": 2 / 61}]
+
+
+def test_inputs_are_not_modified():
+    vector = _ranking("a", source="vector")
+    reciprocal_rank_fusion([vector], k=60)
+    assert vector == [{"id": "a", "source": "vector"}]
+
+
+def test_no_rankings():
+    assert reciprocal_rank_fusion([], k=60) == []
+    assert reciprocal_rank_fusion([[], []], k=60) == []
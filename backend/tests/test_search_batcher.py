@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.services.search_batcher import SearchBatcher
+
+
+class RecordingBatchFn:
+    """Batch function that doubles every request and records the batches it got"""
+    
+    def __init__(self, error: Exception = None):
+        self.batches = []
+        self.error = error
+    
+    def __call__(self, requests):
+        self.batches.append(list(requests))
+        if self.error is not None:
+            raise self.error
+        return [request * 2 for request in requests]
+
+
+async def test_concurrent_requests_share_one_batch():
+    batch_fn = RecordingBatchFn()
+    batcher = SearchBatcher(batch_fn, window_ms=20, max_size=10)
+    
+    results = await asyncio.gather(*(batcher.submit(number) for number in range(4)))
+    
+    assert results == [0, 2, 4, 6]
+    assert batch_fn.batches == [[0, 1, 2, 3]]
+
+
+async def test_full_batch_runs_without_waiting_for_the_window():
+    batch_fn = RecordingBatchFn()
+    batcher = SearchBatcher(batch_fn, window_ms=60_000, max_size=2)
+    
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(number) for number in range(4))), timeout=5)
+    
+    assert results == [0, 2, 4, 6]
+    assert batch_fn.batches == [[0, 1], [2, 3]]
+
+
+async def test_requests_after_the_window_start_a_new_batch():
+    batch_fn = RecordingBatchFn()
+    batcher = SearchBatcher(batch_fn, window_ms=10, max_size=10)
+    
+    assert await batcher.submit(1) == 2
+    assert await batcher.submit(2) == 4
+    assert batch_fn.batches == [[1], [2]]
+
+
+async def test_batching_can_be_turned_off():
+    batch_fn = RecordingBatchFn()
+    batcher = SearchBatcher(batch_fn, window_ms=20, max_size=1)
+    
+    await asyncio.gather(*(batcher.submit(number) for number in range(3)))
+    
+    assert sorted(batch_fn.batches) == [[0], [1], [2]]
+
+
+async def test_failed_batch_fails_every_request():
+    batcher = SearchBatcher(RecordingBatchFn(error=RuntimeError("index unavailable")), window_ms=10, max_size=10)
+    
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+    
+    assert [str(result) for result in results] == ["index unavailable", "index unavailable"]
+
+
+async def test_cancelled_request_does_not_affect_the_others():
+    batch_fn = RecordingBatchFn()
+    batcher = SearchBatcher(batch_fn, window_ms=20, max_size=10)
+    
+    cancelled = asyncio.ensure_future(batcher.submit(1))
+    kept = asyncio.ensure_future(batcher.submit(2))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    
+    assert await kept == 4
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
@@ -0,0 +1,94 @@
+import hashlib
+
+import pytest
+
+from app.core.config import settings
+from app.services.storage_service import S3Storage, shard_key
+
+moto = pytest.importorskip("moto")
+requests = pytest.importorskip("requests")
+
+BUCKET = "mentora-test"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """S3Storage on an in-memory S3 (moto)"""
+    monkeypatch.setattr(settings, "S3_BUCKET", BUCKET)
+    monkeypatch.setattr(settings, "S3_REGION", "us-east-1")
+    monkeypatch.setattr(settings, "S3_ACCESS_KEY_ID", "testing")
+    monkeypatch.setattr(settings, "S3_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(settings, "S3_KEY_PREFIX", "mentora/")
+    with moto.mock_aws():
+        storage = S3Storage()
+        storage.client.create_bucket(Bucket=BUCKET)
+        yield storage
+
+
+def _pdf(tmp_path, data: bytes = b"%PDF-1.4\n0123456789"):
+    path = tmp_path / "upload.pdf"
+    path.write_bytes(data)
+    digest = hashlib.sha256(data).hexdigest()
+    return path, shard_key("documents", f"{digest}.pdf", digest=digest, levels=2)
+
+
+async def test_put_moves_file_under_sharded_key(s3, tmp_path):
+    path, key = _pdf(tmp_path)
+    
+    await s3.put_file(path, key)
+    
+    assert not path.exists()
+    assert await s3.exists(key)
+    head = s3.client.head_object(Bucket=BUCKET, Key=f"mentora/{key}")
+    assert head["ContentType"] == "application/pdf"
+    # documents/<2 chars>/<2 chars>/<digest>.pdf, below the key prefix
+    listed = [obj["Key"] for obj in s3.client.list_objects_v2(Bucket=BUCKET, Prefix="mentora/documents/")["Contents"]]
+    assert listed == [f"mentora/{key}"]
+    assert [len(part) for part in key.split("/")[1:3]] == [2, 2]
+
+
+async def test_put_keeps_source_when_copying(s3, tmp_path):
+    path, key = _pdf(tmp_path)
+    
+    await s3.put_file(path, key, move=False)
+    
+    assert path.exists()
+    assert await s3.exists(key)
+
+
+async def test_open_local_downloads_the_file(s3, tmp_path):
+    path, key = _pdf(tmp_path)
+    await s3.put_file(path, key, move=False)
+    
+    async with s3.open_local(key) as local:
+        assert local.read_bytes() == path.read_bytes()
+        assert local.name == key.rsplit("/", 1)[1]
+    assert not local.exists()
+
+
+async def test_download_link_serves_range_requests(s3, tmp_path):
+    path, key = _pdf(tmp_path)
+    await s3.put_file(path, key)
+    
+    url = await s3.url(key, filename='Lecture "1".pdf')
+    response = requests.get(url, headers={"Range": "bytes=9-13"})
+    
+    assert response.status_code == 206
+    assert response.content == b"01234"
+    assert response.headers["Content-Range"] == "bytes 9-13/19"
+    assert "response-content-disposition" in url
+
+
+async def test_delete(s3, tmp_path):
+    path, key = _pdf(tmp_path)
+    await s3.put_file(path, key)
+    
+    assert await s3.delete(key)
+    assert not await s3.exists(key)
+    assert await s3.delete(key)  # Already gone
+
+
+async def test_invalid_keys_are_refused(s3):
+    for key in ("../outside.pdf", "/etc/passwd", "documents\\x.pdf"):
+        with pytest.raises(ValueError):
+            await s3.exists(key)
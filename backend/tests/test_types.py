@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select, text
+
+from app.core.config import settings
+from app.db.types import ZLIB_MARKER, CompressedText, compress_text, decompress_text
+
+PAGE_TEXT = "Theorem 2.1 (Mean value theorem). Let f be continuous on [a, b]. " * 40
+
+
+@pytest.fixture
+def compression(monkeypatch):
+    """Turn page compression on for a test"""
+    def use(method):
+        monkeypatch.setattr(settings, "PAGE_COMPRESSION", method)
+        monkeypatch.setattr(settings, "PAGE_COMPRESSION_MIN_BYTES", 256)
+    return use
+
+
+@pytest.fixture
+def table():
+    engine = create_engine("sqlite://")
+    pages = Table("pages", MetaData(), Column("id", Integer, primary_key=True), Column("content", CompressedText))
+    pages.metadata.create_all(engine)
+    with engine.connect() as connection:
+        yield connection, pages
+
+
+def test_zlib_round_trip(compression, table):
+    compression("zlib")
+    connection, pages = table
+    connection.execute(insert(pages).values(id=1, content=PAGE_TEXT))
+    
+    stored = connection.execute(text("SELECT content FROM pages")).scalar_one()
+    assert stored[:1] == ZLIB_MARKER and len(stored) < len(PAGE_TEXT)
+    assert connection.execute(select(pages.c.content)).scalar_one() == PAGE_TEXT
+
+
+def test_zstd_round_trip(compression):
+    pytest.importorskip("zstandard")
+    compression("zstd")
+    assert decompress_text(compress_text(PAGE_TEXT)) == PAGE_TEXT
+
+
+def test_short_and_uncompressed_text_stay_plain(compression, table):
+    compression("zlib")
+    connection, pages = table
+    connection.execute(insert(pages), [{"id": 1, "content": "short"}, {"id": 2, "content": None}])
+    
+    assert connection.execute(text("SELECT content FROM pages ORDER BY id")).scalars().all() == ["short", None]
+    assert connection.execute(select(pages.c.content).order_by(pages.c.id)).scalars().all() == ["short", None]
+
+
+def test_rows_written_before_compression_still_read(compression, table):
+    connection, pages = table
+    compression("none")
+    connection.execute(insert(pages).values(id=1, content=PAGE_TEXT))
+    compression("zlib")
+    connection.execute(insert(pages).values(id=2, content=PAGE_TEXT))
+    
+    assert connection.execute(select(pages.c.content)).scalars().all() == [PAGE_TEXT, PAGE_TEXT]
+
+
+def test_unicode_round_trip(compression):
+    compression("zlib")
+    page_text = "∫ eˣ dx = eˣ + C — Übung für Schüler " * 20
+    assert decompress_text(compress_text(page_text)) == page_text
@@ -0,0 +1,82 @@
+import asyncio
+import uuid
+
+from app.services.chunking_service import chunk_pages
+from app.services.vector_service import make_chunk_id
+
+PAGES = [
+    {"page_number": 1, "content": "Limits describe the behaviour of a function near a point."},
+    {"page_number": 2, "content": "The derivative is the limit of difference quotients. " * 40},
+    {"page_number": 3, "content": "Integrals accumulate change."},
+]
+
+
+async def test_copy_pages_moves_vectors_to_new_page_numbers(vector_service):
+    source, target = str(uuid.uuid4()), str(uuid.uuid4())
+    assert await vector_service.add_document(content_id=source, pages=PAGES)
+    
+    # Target page 3 has the text of source page 2 (a page was inserted before it)
+    copied = await vector_service.copy_pages(source, target, {1: 1, 3: 2})
+    
+    assert copied == {1, 3}
+    stored = vector_service.get_partition(target).get(include=["embeddings", "documents", "metadatas"])
+    source_chunks = {chunk.text: chunk for chunk in chunk_pages(PAGES)}
+    assert len(stored["ids"]) == 1 + len([chunk for chunk in source_chunks.values() if chunk.page_number == 2])
+    
+    source_stored = vector_service.get_partition(source).get(include=["embeddings", "documents"])
+    source_embeddings = dict(zip(source_stored["ids"], source_stored["embeddings"]))
+    for chunk_id, text, metadata, embedding in zip(
+        stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"]
+    ):
+        chunk = source_chunks[text]
+        target_page = {1: 1, 2: 3}[chunk.page_number]
+        assert metadata["content_id"] == target
+        assert metadata["page_number"] == target_page
+        assert chunk_id == make_chunk_id(target, chunk._replace(page_number=target_page))
+        # Copied, not embedded again
+        assert list(embedding) == list(source_embeddings[make_chunk_id(source, chunk)])
+
+
+async def test_copy_pages_skips_pages_stored_before_chunking(vector_service):
+    source, target = str(uuid.uuid4()), str(uuid.uuid4())
+    vector_service.get_partition(source, create=True).upsert(
+        ids=[f"content_{source}_page_1"],
+        documents=["One vector for the whole page."],
+        metadatas=[{"content_id": source, "page_number": 1}]
+    )
+    
+    assert await vector_service.copy_pages(source, target, {1: 1}) == set()
+    assert await vector_service.get_ids(target) == []
+
+
+async def test_concurrent_searches_are_batched_and_stay_scoped(vector_service, monkeypatch):
+    calculus, algebra = str(uuid.uuid4()), str(uuid.uuid4())
+    await vector_service.add_document(content_id=calculus, pages=PAGES)
+    await vector_service.add_document(content_id=algebra, pages=[
+        {"page_number": 1, "content": "A group is a set with an associative operation."},
+        {"page_number": 2, "content": "Every vector space has a basis."},
+    ])
+    
+    batches = []
+    search_batch = vector_service.search_batch
+    
+    def recording_search_batch(requests):
+        batches.append(requests)
+        return search_batch(requests)
+    
+    monkeypatch.setattr(vector_service._batcher, "batch_fn", recording_search_batch)
+    monkeypatch.setattr(vector_service._batcher, "window", 0.2)  # Searches first read the result cache
+    
+    calculus_results, algebra_results, both_results = await asyncio.gather(
+        vector_service.search("limit of a function", [calculus], 2),
+        vector_service.search("basis of a vector space", [algebra], 1),
+        vector_service.search("integrals and groups", [calculus, algebra], 3),
+    )
+    
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert {result["metadata"]["content_id"] for result in calculus_results} == {calculus}
+    assert len(calculus_results) == 2
+    assert [result["metadata"]["page_number"] for result in algebra_results] == [2]
+    assert {result["metadata"]["content_id"] for result in both_results} <= {calculus, algebra}
+    assert len(both_results) == 3
+    assert [result["distance"] for result in both_results] == sorted(result["distance"] for result in both_results)
@@ -0,0 +1,11 @@
+import pytest
+
+from app import worker
+from app.core.config import settings
+
+
+async def test_standalone_worker_needs_a_chroma_server(monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_SERVER_URL", None)
+    
+    with pytest.raises(SystemExit, match="CHROMA_SERVER_URL"):
+        await worker.main(concurrency=1)
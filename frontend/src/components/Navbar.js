@@ -170,7 +170,7 @@ const Navbar = () => {
                   <div className="w-8 h-8 rounded-full overflow-hidden border-2 border-transparent bg-gradient-to-br from-indigo-500 to-purple-600 flex items-center justify-center text-white font-bold shadow-md">
                     {user?.avatar ? (
                       <img 
-                        src={`http://localhost:8000/media/${user.avatar}`} 
+                        src={`http://localhost:8000${user.avatar_urls?.['96'] || `/media/${user.avatar}`}`} 
                         alt="Profile" 
                         className="w-full h-full object-cover"
                       />
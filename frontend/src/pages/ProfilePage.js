@@ -149,6 +149,7 @@ const ProfilePage = () => {
         // Update localStorage user data with the avatar path from database
         const storedUser = JSON.parse(localStorage.getItem('user') || '{}');
         storedUser.avatar = response.data.user.avatar;
+        storedUser.avatar_urls = response.data.user.avatar_urls;
         localStorage.setItem('user', JSON.stringify(storedUser));
         
         // Dispatch custom event to update Navbar
@@ -215,7 +216,7 @@ const ProfilePage = () => {
                     />
                   ) : profile?.user.avatar ? (
                     <img 
-                      src={`http://localhost:8000/media/${profile.user.avatar}`} 
+                      src={`http://localhost:8000${profile.user.avatar_urls?.['256'] || `/media/${profile.user.avatar}`}`} 
                       alt="Profile" 
                       className="w-full h-full object-cover"
                     />